@@ -2,38 +2,42 @@
 
 
 from langchain_core.output_parsers import StrOutputParser
-from langchain_cohere import ChatCohere
+from adam.agents.providers import chat_model
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage
 
-async def agent_builder(state: dict, agent_type: str):
+# System prompts used to build each member of the meta team, keyed by agent type. The builder
+# node generates one meta prompt per entry, so adding a team member only needs a new entry here.
+META_AGENT_PROMPTS = {
+    "one": (
+        "# ROLE:\nYou are an LLM and Generative AI expert specialises in writing system prompts. \n\n"
+        "# TASK:\nWrite the system prompt for an agent that is a subject matter expert in {subject}.\n\n"
+        "# NOTES:\n"
+        " - The system prompt should use advanced prompt engineering techniques.\n"
+        " - The *task* will be passed to the Agent separately.\n"
+        " - Be concise and specific.\n"
+        " - Only return the system prompt and nothing else."
+    ),
+    "two": (
+        "# ROLE:\nYou are an LLM and Generative AI expert specialises in writing system prompts. \n\n"
+        "# TASK:\nWrite the system prompt for an agent that is a senior team member and subject"
+        " matter expert in {subject}. The agent will critique the work of a junior team member "
+        " and provide feedback on how to improve.\n\n"
+        "# NOTES:\n"
+        " - The system prompt should use advanced prompt engineering techniques.\n"
+        " - Make sure the agent has the skills required to provide accurate and helpful feedback.\n"
+        " - be concise and specific.\n"
+        " - Only return the system prompt and nothing else."
+    ),
+}
+
+async def agent_builder(agent_type: str):
     
-    if agent_type == "one":
-        system_prompt = (
-            "# ROLE:\nYou are an LLM and Generative AI expert specialises in writing system prompts. \n\n"
-            "# TASK:\nWrite the system prompt for an agent that is a subject matter expert in {subject}.\n\n"
-            "# NOTES:\n"
-            " - The system prompt should use advanced prompt engineering techniques.\n"
-            " - The *task* will be passed to the Agent separately.\n"
-            " - Be concise and specific.\n"
-            " - Only return the system prompt and nothing else."
-        )
-    elif agent_type == "two":
-        system_prompt = (
-            "# ROLE:\nYou are an LLM and Generative AI expert specialises in writing system prompts. \n\n"
-            "# TASK:\nWrite the system prompt for an agent that is a senior team member and subject"
-            " matter expert in {subject}. The agent will critique the work of a junior team member "
-            " and provide feedback on how to improve.\n\n"
-            "# NOTES:\n"
-            " - The system prompt should use advanced prompt engineering techniques.\n"
-            " - Make sure the agent has the skills required to provide accurate and helpful feedback.\n"
-            " - be concise and specific.\n"
-            " - Only return the system prompt and nothing else."
-        )
-    else:
+    if agent_type not in META_AGENT_PROMPTS:
         raise ValueError(f"Invalid agent type: {agent_type}")
+    system_prompt = META_AGENT_PROMPTS[agent_type]
 
-    llm = ChatCohere(model="command-r-plus", temperature=0.2)
+    llm = chat_model(model="command-r-plus", temperature=0.2)
     
     # The ChatPromptTemplate class in LangChain is used to create and format prompts for 
     # conversational models. It provides a structured way to define the messages that will be sent
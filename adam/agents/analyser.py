@@ -4,18 +4,9 @@ If the human responds in the affirmitive and seems agreeable to the re-engineere
 returns "Proceed" and the flow gets routed to the subject node. For any other response the analyser 
 will return "Try Again" and the flow will be routed to the engineer node.
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-sys.path.insert(1, PROJECT_DIRECTORY)  # Include project directory in the system path for module imports
-
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_cohere import ChatCohere
+from adam.agents.providers import chat_model
 
 # LangChain's BaseModel and Field are derived from pydantic's BaseModel class and Field attribute and can be used to
 # enforce structure in an LLM's responses. Here we are using them to ensure that the LLM only responds in one of two
@@ -26,7 +17,7 @@ class AnalyserResponse(BaseModel):
     # response: str = Field(description="The human's response to the re-engineered prompt.")
     next_action: str = Field(description="The next action to be taken: 'Proceed' or 'Try Again'")
 
-async def analyser(state):
+async def analyser():
 
     analyser_preamble = (
         "You are an analyst that assesses the user's response to the re-engineered prompt and assigns it to one of the following values: \n"
@@ -35,7 +26,7 @@ async def analyser(state):
     )
 
     # Initialize the language model with zero randomness for consistent outputs
-    llm = ChatCohere(model="command-r-plus", temperature=0)
+    llm = chat_model(model="command-r-plus", temperature=0)
 
     # Structure the LLM's response using the AnalyserResponse model
     structured_llm = llm.with_structured_output(AnalyserResponse, preamble=analyser_preamble)
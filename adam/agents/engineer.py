@@ -2,11 +2,11 @@
 
 
 from langchain_core.output_parsers import StrOutputParser
-from langchain_cohere import ChatCohere
+from adam.agents.providers import chat_model
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage
 
-async def engineer(state: dict):
+async def engineer():
     system_prompt = (
         "# ROLE:\nYou are an expert prompt engineer. \n\n"
         "# TASK:\nRewrite the provided user prompt into clear and concise instructions for "
@@ -22,7 +22,7 @@ async def engineer(state: dict):
         " - The goal is not to answer the user's prompt but to provide clear instructions in the form "
         "of an LLM prompt."
     )
-    llm = ChatCohere(model="command-r-plus", temperature=0.2)
+    llm = chat_model(model="command-r-plus", temperature=0.2)
     
     # The ChatPromptTemplate class in LangChain is used to create and format prompts for 
     # conversational models. It provides a structured way to define the messages that will be sent
@@ -0,0 +1,193 @@
+"""
+Offline stand-in for the Cohere chat model, for benchmarking the server without a provider.
+
+Setting LLM_PROVIDER=fake makes `chat_model` (see providers.py) return a `FakeChatModel`, so every
+agent factory gets one without changing its chain. The fake answers without any network access:
+
+- Its replies are made of words picked from a hash of the prompt, so the same prompt always gets
+  the same reply, and they are FAKE_LLM_RESPONSE_TOKENS words long.
+- Each call waits for a first-token latency drawn from a lognormal distribution around
+  FAKE_LLM_LATENCY_MS (FAKE_LLM_LATENCY_SIGMA sets its spread, 0 makes it fixed), then produces
+  FAKE_LLM_TOKENS_PER_SECOND words a second, streamed one by one when the caller streams.
+- `with_structured_output` returns valid instances of the schema. The agents' schemas name their
+  allowed values in the field description ("'Proceed' or 'Try Again'"), and the fake answers with
+  the first of them unless FAKE_LLM_CHOICES picks another, e.g.
+  "MetaSupervisorResponse.next_action=Continue" to run the meta graph until its budget runs out.
+
+The search agent has no tools in this mode, see `fake_search`.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import PrivateAttr
+
+from adam.settings import settings
+
+WORDS = (
+    "the", "agent", "prompt", "should", "explain", "each", "step", "clearly", "and", "check",
+    "its", "answer", "against", "a", "simple", "example", "before", "moving", "on", "to",
+    "expert", "review", "of", "subject", "with", "concise", "detail", "for", "reader", "plan",
+    "context", "result",
+)
+
+# Quoted values listed in a field description, e.g. "The next action to be taken: 'Stop' or 'Continue'"
+CHOICE_PATTERN = re.compile(r"'([^']+)'")
+
+
+def parse_choices(value: str) -> Dict[str, str]:
+    """
+    Parse FAKE_LLM_CHOICES ("Schema.field=value,Schema.field=value") into a dict.
+    """
+    choices = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        key, _, choice = item.partition("=")
+        choices[key.strip()] = choice.strip()
+    return choices
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers deterministically after a simulated latency, see the module docstring.
+
+    Attributes:
+        model (str): Name of the model it stands in for, kept so response cache keys stay distinct.
+        temperature (float): Ignored, kept for the same reason.
+        latency (float): Median time to the first token in seconds.
+        latency_sigma (float): Sigma of the lognormal latency distribution.
+        tokens_per_second (float): Rate the reply is produced at, 0 for no delay.
+        response_tokens (int): Words in a reply.
+        seed (int): Seeds the replies and the latency draws.
+        choices (Dict[str, str]): Structured values to use instead of the first allowed one, by
+            "Schema.field".
+    """
+    model: str = "fake"
+    temperature: float = 0
+    latency: float = 0.5
+    latency_sigma: float = 0.0
+    tokens_per_second: float = 0
+    response_tokens: int = 120
+    seed: int = 0
+    choices: Dict[str, str] = {}
+
+    _random: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def first_token_delay(self) -> float:
+        """Draw the time to the first token in seconds."""
+        if self.latency_sigma <= 0:
+            return self.latency
+        return self.latency * math.exp(self._random.gauss(0, self.latency_sigma))
+
+    def token_delay(self) -> float:
+        """Time between two tokens in seconds."""
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+
+    def structured_values(self, schema: type) -> Dict[str, Any]:
+        """
+        Return valid field values for `schema`: the chosen or first allowed value of string fields
+        whose description lists them, and fixed values of the field's type otherwise.
+        """
+        values = {}
+        for name, field in schema.model_fields.items():
+            allowed = CHOICE_PATTERN.findall(field.description or "")
+            if f"{schema.__name__}.{name}" in self.choices:
+                values[name] = self.choices[f"{schema.__name__}.{name}"]
+            elif allowed:
+                values[name] = allowed[0]
+            elif field.annotation is bool:
+                values[name] = True
+            elif field.annotation in (int, float):
+                values[name] = field.annotation(0)
+            else:
+                values[name] = " ".join(WORDS[:8])
+        return values
+
+    def reply(self, messages: List[BaseMessage], schema: Optional[type] = None) -> List[str]:
+        """Return the reply to `messages` as a list of tokens."""
+        if schema is not None:
+            return [json.dumps(self.structured_values(schema))]
+        digest = hashlib.sha256(f"{self.seed}:{self.model}:{messages[-1].content}".encode()).digest()
+        return [
+            (" " if index else "") + WORDS[(digest[index % len(digest)] + index // len(digest)) % len(WORDS)]
+            for index in range(self.response_tokens)
+        ]
+
+    def _result(self, tokens: List[str]) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        tokens = self.reply(messages, kwargs.get("schema"))
+        time.sleep(self.first_token_delay() + self.token_delay() * len(tokens))
+        return self._result(tokens)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        tokens = self.reply(messages, kwargs.get("schema"))
+        await asyncio.sleep(self.first_token_delay() + self.token_delay() * len(tokens))
+        return self._result(tokens)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_delay())
+        for index, token in enumerate(self.reply(messages, kwargs.get("schema"))):
+            if index:
+                time.sleep(self.token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_delay())
+        for index, token in enumerate(self.reply(messages, kwargs.get("schema"))):
+            if index:
+                await asyncio.sleep(self.token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: type, **kwargs) -> Runnable:
+        """
+        Return a runnable that answers with an instance of `schema`. Extra arguments, such as the
+        preamble the agents pass, are ignored.
+        """
+        return self.bind(schema=schema) | RunnableLambda(lambda message: schema.model_validate_json(message.content))
+
+
+def fake_chat_model(model: str, temperature: float) -> FakeChatModel:
+    """
+    Create a FakeChatModel configured from the settings.
+    """
+    return FakeChatModel(
+        model=model,
+        temperature=temperature,
+        latency=settings.fake_llm_latency_ms / 1000,
+        latency_sigma=settings.fake_llm_latency_sigma,
+        tokens_per_second=settings.fake_llm_tokens_per_second,
+        response_tokens=settings.fake_llm_response_tokens,
+        seed=settings.fake_llm_seed,
+        choices=parse_choices(settings.fake_llm_choices),
+    )
+
+
+def fake_search(llm: BaseChatModel) -> Runnable:
+    """
+    Return an offline replacement for the search agent: it answers the search prompt with `llm`
+    and returns the {"output": ...} dict AgentExecutor returns.
+    """
+    return RunnableLambda(lambda inputs: inputs["input"]) | llm | RunnableLambda(lambda message: {"output": message.content})
@@ -0,0 +1,348 @@
+"""
+Local fast path for the routing decisions of the analyser, planner and meta supervisor.
+
+Each of those agents returns a single label, which costs a full LLM round-trip. A
+`FastPathClassifier` sits in front of each of them and tries two cheap stages first:
+
+1. Keyword rules, which answer only when the patterns of exactly one label match.
+2. A small naive Bayes model trained on the decisions the LLM made earlier, logged in the
+   `routing_decisions` table. It answers when its confidence reaches `threshold`.
+
+When neither stage is confident, the LLM is called as before and its decision is logged for the
+next training run. Decisions the response cache answered (see response_cache.py) never reached the
+LLM, so they are not logged again. Logging, and the retraining it triggers, runs in a background
+task so the response isn't held up by the database. `stats` and `fast_path_rate` report how often
+the LLM was skipped.
+
+Set FAST_PATH_ENABLED=false to always call the LLM, and FAST_PATH_THRESHOLD to change the
+confidence the model needs.
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from adam.agents.analyser import AnalyserResponse
+from adam.agents.planner import PromptComplexity
+from adam.agents.meta_supervisor import MetaSupervisorResponse
+from adam.agents.response_cache import CachedChain
+from adam.database import db, Database, RoutingDecisionRecord, require_sqlite
+from adam.settings import settings
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_ENABLED = settings.fast_path_enabled
+FAST_PATH_THRESHOLD = settings.fast_path_threshold
+
+# Replies that approve anywhere, e.g. "No changes needed, looks good", are never sent back to the
+# engineer by the rules, the LLM decides the mixed ones
+UNLESS_APPROVED = r"^(?![\s\S]*\b(?:looks good|go ahead|perfect|proceed|no need to|no changes?)\b)"
+
+ANALYSER_RULES = {
+    "Proceed": [
+        r"^\W*(?:(?:yes|yep|yeah|yup|ok|okay|sure|perfect|great|proceed|go ahead|go for it|looks good|sounds good"
+        r"|lgtm|correct|approved?|do it|that'?s (?:it|right|good|great|perfect))\W*)+$",
+    ],
+    "Try Again": [
+        r"^\W*(?:no|nope|nah)\W*$",
+        UNLESS_APPROVED + r"[\s\S]*\b(?:instead|rather than|modify|rewrite|shorter|longer|not quite|try again)\b",
+    ],
+}
+
+PLANNER_RULES = {
+    "complex": [
+        r"\b(?:latest|today'?s?|tonight|this (?:week|month|year)|recently|news|up[- ]to[- ]date|price of"
+        r"|stock price|weather|forecast|look (?:it )?up|search (?:the web|online|the internet))\b",
+    ],
+}
+
+META_SUPERVISOR_RULES = {
+    "Stop": [
+        r"^\W*(?:complete|approved)\W*$",
+        r"\bno further (?:feedback|changes|improvements|suggestions)\b",
+    ],
+    "Continue": [
+        r"\b(?:is missing|are missing|incorrect|inaccurate|should (?:also )?(?:add|include|mention|clarify|explain))\b",
+    ],
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower case word unigrams and bigrams.
+    """
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def last_message_text(messages: Any) -> str:
+    """
+    Return the text of the last message of a message list, or the text itself.
+    """
+    if isinstance(messages, (list, tuple)):
+        messages = messages[-1] if messages else ""
+    if isinstance(messages, BaseMessage):
+        messages = messages.content
+    return str(messages)
+
+
+class KeywordRules:
+    """
+    Regular expressions per label. The rules answer only when the patterns of exactly one label
+    match, and are then fully confident.
+    """
+    def __init__(self, rules: Dict[str, Iterable[str]]):
+        self.rules = {label: [re.compile(pattern, re.IGNORECASE) for pattern in patterns] for label, patterns in rules.items()}
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        matched = {label for label, patterns in self.rules.items() if any(pattern.search(text) for pattern in patterns)}
+        if len(matched) == 1:
+            return matched.pop(), 1.0
+        return None
+
+
+class NaiveBayesClassifier:
+    """
+    Multinomial naive Bayes over word unigrams and bigrams with Laplace smoothing. Small enough to
+    retrain in a few milliseconds on the logged decisions, and needs nothing beyond the standard
+    library.
+    """
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.label_counts: Counter = Counter()
+        self.feature_counts: Dict[str, Counter] = {}
+        self.vocabulary: set = set()
+
+    def fit(self, texts: List[str], labels: List[str]) -> "NaiveBayesClassifier":
+        self.label_counts = Counter(labels)
+        self.feature_counts = {label: Counter() for label in self.label_counts}
+        for text, label in zip(texts, labels):
+            self.feature_counts[label].update(tokenize(text))
+        self.vocabulary = set().union(*self.feature_counts.values())
+        return self
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Return the most likely label and its probability, or None if the model has not seen any of
+        the words in the text.
+        """
+        features = [feature for feature in tokenize(text) if feature in self.vocabulary]
+        if not features:
+            return None
+        samples = sum(self.label_counts.values())
+        scores = {}
+        for label, count in self.label_counts.items():
+            counts = self.feature_counts[label]
+            denominator = sum(counts.values()) + self.alpha * len(self.vocabulary)
+            scores[label] = math.log(count / samples) + sum(math.log((counts[feature] + self.alpha) / denominator) for feature in features)
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / total
+
+
+class FastPathClassifier:
+    """
+    Answers a routing decision locally when the rules or the trained model are confident enough.
+
+    Attributes:
+        name (str): Name of the agent the classifier stands in for.
+        schema (Type[BaseModel]): The agent's structured response model.
+        field (str): The field of `schema` holding the label.
+        labels (Tuple[str, ...]): The labels the agent can return.
+        text_of (Callable): Extracts the text to classify from the chain inputs.
+        rules (KeywordRules): The keyword rules.
+        model (Optional[NaiveBayesClassifier]): The trained model, None until enough decisions are logged.
+        database (Optional[Database]): Database the LLM decisions are logged in, None to not log them.
+        threshold (float): Confidence the model needs to answer.
+        min_training_samples (int): Logged decisions needed before a model is trained.
+        retrain_every (int): Number of new logged decisions after which the model is retrained.
+        max_training_samples (int): Most recent logged decisions the model is trained on.
+        stats (Dict[str, int]): Decisions made by the `rules`, the `model`, the response `cache`
+            and the `llm`.
+        pending (Set[asyncio.Task]): Decisions being logged in the background.
+    """
+    def __init__(
+        self,
+        name: str,
+        schema: Type[BaseModel],
+        field: str,
+        labels: Tuple[str, ...],
+        text_of: Callable[[Any], str],
+        rules: Dict[str, Iterable[str]],
+        database: Optional[Database] = None,
+        threshold: float = FAST_PATH_THRESHOLD,
+        min_training_samples: int = 30,
+        retrain_every: int = 25,
+        max_training_samples: int = 5000,
+    ):
+        self.name = name
+        self.schema = schema
+        self.field = field
+        self.labels = labels
+        self.text_of = text_of
+        self.rules = KeywordRules(rules)
+        self.model: Optional[NaiveBayesClassifier] = None
+        self.database = database
+        self.threshold = threshold
+        self.min_training_samples = min_training_samples
+        self.retrain_every = retrain_every
+        self.max_training_samples = max_training_samples
+        self.untrained_decisions = 0
+        self.stats = {"rules": 0, "model": 0, "cache": 0, "llm": 0}
+        self.pending: Set[asyncio.Task] = set()
+
+    @property
+    def fast_path_rate(self) -> float:
+        """
+        Share of decisions that did not need the LLM.
+        """
+        decisions = sum(self.stats.values())
+        return (decisions - self.stats["llm"]) / decisions if decisions else 0.0
+
+    def classify(self, inputs: Any) -> Optional[str]:
+        """
+        Decide locally if possible.
+
+        Args:
+            inputs: The inputs the agent chain was invoked with.
+
+        Returns:
+            Optional[str]: The label, or None if the LLM has to decide.
+        """
+        text = self.text_of(inputs)
+        prediction = self.rules.predict(text)
+        source = "rules"
+        if prediction is None and self.model is not None:
+            prediction = self.model.predict(text)
+            source = "model"
+        if prediction is None or prediction[1] < self.threshold or prediction[0] not in self.labels:
+            self.stats["llm"] += 1
+            return None
+        self.stats[source] += 1
+        return prediction[0]
+
+    def count_cache_hit(self):
+        """
+        Count a decision that `classify` left to the LLM as answered by the response cache instead.
+        """
+        self.stats["llm"] -= 1
+        self.stats["cache"] += 1
+
+    def record_later(self, inputs: Any, label: str) -> asyncio.Task:
+        """
+        Log a decision made by the LLM in a background task, see `arecord`.
+        """
+        task = asyncio.create_task(self.arecord(inputs, label))
+        self.pending.add(task)
+        task.add_done_callback(self._record_done)
+        return task
+
+    def _record_done(self, task: asyncio.Task):
+        self.pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("[FastPath] Logging a %s decision failed: %r", self.name, task.exception())
+
+    async def adrain(self):
+        """
+        Wait until the decisions logged in the background are stored.
+        """
+        while self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+    async def arecord(self, inputs: Any, label: str):
+        """
+        Log a decision made by the LLM, retraining the model every `retrain_every` decisions.
+        """
+        if self.database is None or label not in self.labels:
+            return
+        async with self.database.session() as session:
+            session.add(RoutingDecisionRecord(classifier=self.name, text=self.text_of(inputs), label=label, created_at=time.time()))
+        self.untrained_decisions += 1
+        if self.untrained_decisions >= self.retrain_every:
+            await self.atrain()
+
+    async def atrain(self):
+        """
+        Train the model on the most recent logged decisions.
+        """
+        self.untrained_decisions = 0
+        if self.database is None:
+            return
+        async with self.database.session() as session:
+            rows = (await session.execute(
+                select(RoutingDecisionRecord.text, RoutingDecisionRecord.label)
+                .where(RoutingDecisionRecord.classifier == self.name)
+                .order_by(RoutingDecisionRecord.id.desc())
+                .limit(self.max_training_samples)
+            )).all()
+        labels = [label for _, label in rows]
+        if len(rows) >= self.min_training_samples and len(set(labels)) > 1:
+            self.model = NaiveBayesClassifier().fit([text for text, _ in rows], labels)
+
+    def report(self) -> str:
+        decisions = sum(self.stats.values())
+        return (
+            f"{self.name}: {decisions - self.stats['llm']}/{decisions} decisions without the LLM "
+            f"({self.fast_path_rate:.0%}; rules {self.stats['rules']}, model {self.stats['model']}, "
+            f"cache {self.stats['cache']}, llm {self.stats['llm']})"
+        )
+
+
+class FastPathChain(Runnable):
+    """
+    Wraps a routing agent chain so that `ainvoke` is answered by a FastPathClassifier when possible,
+    and the LLM's decision is logged for training otherwise. The wrapped chain is the CachedChain
+    of the agent when its responses are cached.
+    """
+    def __init__(self, classifier: FastPathClassifier, chain: Runnable):
+        self.classifier = classifier
+        self.chain = chain
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.chain.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        label = self.classifier.classify(input)
+        if label is not None:
+            logger.debug("[FastPath] %s: %s", self.classifier.name, label)
+            return self.classifier.schema(**{self.classifier.field: label})
+        if isinstance(self.chain, CachedChain):
+            response, cached = await self.chain.ainvoke_cached(input, config, **kwargs)
+        else:
+            response, cached = await self.chain.ainvoke(input, config, **kwargs), False
+        if cached:
+            self.classifier.count_cache_hit()
+        else:
+            self.classifier.record_later(input, getattr(response, self.classifier.field, None))
+        return response
+
+
+def default_fast_paths(database: Optional[Database] = db) -> Dict[str, FastPathClassifier]:
+    """
+    Create the fast-path classifiers for the analyser, planner and meta supervisor.
+    """
+    return {
+        "analyser": FastPathClassifier(
+            "analyser", AnalyserResponse, "next_action", ("Proceed", "Try Again"),
+            lambda inputs: last_message_text(inputs["human_response"]), ANALYSER_RULES, database,
+        ),
+        "planner": FastPathClassifier(
+            "planner", PromptComplexity, "complexity", ("simple", "complex"),
+            lambda inputs: last_message_text(inputs["rewritten_prompt"]), PLANNER_RULES, database,
+        ),
+        "meta_supervisor": FastPathClassifier(
+            "meta_supervisor", MetaSupervisorResponse, "next_action", ("Stop", "Continue"),
+            lambda inputs: last_message_text(inputs["meta_messages"]), META_SUPERVISOR_RULES, database,
+        ),
+    }
+
+# Create the global fast-path classifiers, empty when the fast path is disabled
+fast_paths = default_fast_paths(require_sqlite(db, "fast_path")) if FAST_PATH_ENABLED else {}
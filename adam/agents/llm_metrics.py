@@ -0,0 +1,111 @@
+"""
+Latency and token metrics of the chat model calls, by agent.
+
+The registry hands every chain it builds to `instrument`, which gives each chat model in the chain
+an `LLMMetrics` callback labelled with the agent's name. The callback records the duration of every
+call in adam_llm_latency_seconds and its input and output tokens in adam_llm_tokens (see
+metrics.py). Tokens come from the usage metadata of the reply when the provider reports it, and
+are estimated at CHARACTERS_PER_TOKEN otherwise, as the fake model doesn't report any.
+
+The callback is set on the chat model rather than passed in the call's config, so it only sees the
+model's own runs and is called inline, without the thread hop of the callback manager.
+"""
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable
+
+from adam.meta_budget import CHARACTERS_PER_TOKEN
+from adam.metrics import LLM_LATENCY, LLM_TOKENS
+
+
+class LLMMetrics(BaseCallbackHandler):
+    """
+    Callback recording the metrics of one agent's chat model calls.
+
+    Attributes:
+        agent (str): Name of the agent, the `agent` label of its metrics.
+        started (Dict[UUID, Tuple[float, int]]): Start time and input characters of the calls in
+            flight, by run ID.
+    """
+    run_inline = True
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.started: Dict[UUID, Tuple[float, int]] = {}
+
+    @property
+    def ignore_chain(self) -> bool:
+        return True
+
+    @property
+    def ignore_agent(self) -> bool:
+        return True
+
+    @property
+    def ignore_retriever(self) -> bool:
+        return True
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any):
+        characters = sum(len(str(message.content)) for batch in messages for message in batch)
+        self.started[run_id] = (time.perf_counter(), characters)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started = self.started.pop(run_id, None)
+        if started is None:
+            return
+        started_at, input_characters = started
+        LLM_LATENCY.observe(time.perf_counter() - started_at, self.agent)
+
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            input_tokens, output_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            output_characters = len(generation.text) if generation is not None else 0
+            input_tokens, output_tokens = input_characters // CHARACTERS_PER_TOKEN, output_characters // CHARACTERS_PER_TOKEN
+        LLM_TOKENS.observe(input_tokens, self.agent, "input")
+        LLM_TOKENS.observe(output_tokens, self.agent, "output")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self.started.pop(run_id, None)
+
+
+def chat_models(runnable: Any, seen: Optional[set] = None) -> Iterator[BaseChatModel]:
+    """
+    Yield every chat model in a chain: the steps of sequences, the runnables bound, mapped or
+    wrapped by other runnables, and the agent of an AgentExecutor.
+    """
+    seen = set() if seen is None else seen
+    if id(runnable) in seen:
+        return
+    seen.add(id(runnable))
+    if isinstance(runnable, BaseChatModel):
+        yield runnable
+        return
+    if isinstance(runnable, (list, tuple)):
+        children = runnable
+    elif isinstance(runnable, dict):
+        children = runnable.values()
+    elif isinstance(runnable, Runnable):
+        children = vars(runnable).values()
+    else:
+        return
+    for child in children:
+        if isinstance(child, (Runnable, list, tuple, dict)):
+            yield from chat_models(child, seen)
+
+
+def instrument(agent: str, chain: Runnable) -> Runnable:
+    """
+    Give every chat model in `chain` an LLMMetrics callback for `agent`, and return the chain.
+    """
+    for llm in chat_models(chain):
+        callbacks = [callback for callback in llm.callbacks or [] if not isinstance(callback, LLMMetrics)]
+        llm.callbacks = [*callbacks, LLMMetrics(agent)]
+    return chain
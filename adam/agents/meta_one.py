@@ -2,7 +2,7 @@
 
 
 from langchain_core.output_parsers import StrOutputParser
-from langchain_cohere import ChatCohere
+from adam.agents.providers import chat_model
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage
 
@@ -15,7 +15,7 @@ async def meta_one():
         " - Be methodical. Explain your reasoning step by step.\n"
     )
 
-    llm = ChatCohere(model="command-r-plus", temperature=0.2)
+    llm = chat_model(model="command-r-plus", temperature=0.2)
     
     # The ChatPromptTemplate class in LangChain is used to create and format prompts for 
     # conversational models. It provides a structured way to define the messages that will be sent
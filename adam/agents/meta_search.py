@@ -3,30 +3,41 @@
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage
-from langchain_cohere import ChatCohere
-from langchain_cohere.react_multi_hop.agent import create_cohere_react_agent
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain.agents import AgentExecutor
-
-from langchain import hub
+from adam.agents.fake_llm import fake_search
+from adam.agents.providers import chat_model, search_tool
+from adam.settings import settings
+
+# Vendored copy of the "langchain-ai/openai-functions-template" prompt from the LangChain hub, so
+# building the agent doesn't need a network round-trip to the hub.
+OPENAI_FUNCTIONS_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        ("system", "{instructions}"),
+        MessagesPlaceholder(variable_name="chat_history", optional=True),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ]
+)
 
 async def meta_search():
+    if settings.llm_provider == "fake":
+        # Offline runs have no search tool, the fake model answers the search prompt itself
+        return fake_search(chat_model(model="command-r-plus", temperature=0.1))
 
-    llm = ChatCohere(model="command-r-plus", temperature=0.1)
+    # The ReAct agent and AgentExecutor pull in most of langchain, import them only once the search
+    # agent is actually built
+    from langchain_cohere.react_multi_hop.agent import create_cohere_react_agent
+    from langchain.agents import AgentExecutor
 
-    search_tool = TavilySearchResults(include_answer = True, include_raw_content = False, include_images = False)
+    llm = chat_model(model="command-r-plus", temperature=0.1)
 
-    tools = [search_tool]
+    tools = [search_tool(include_answer = True, include_raw_content = False, include_images = False)]
 
-    base_prompt = hub.pull("langchain-ai/openai-functions-template")
-    system_prompt = base_prompt.partial(instructions=(
+    system_prompt = OPENAI_FUNCTIONS_TEMPLATE.partial(instructions=(
         "You are an expert at searching the web. You will be given a prompt and you"
         " will search the web to find the most relevant information. You will then "
         "return the most relevant information to the user."
     ))
 
-    llm_with_tools = llm.bind_tools(tools)
-
     agent = create_cohere_react_agent(llm, tools, system_prompt)
     agent_executor = AgentExecutor(
         agent=agent,
@@ -1,17 +1,8 @@
 """Module for planning which meta sub-flow to use
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-sys.path.insert(1, PROJECT_DIRECTORY)  # Include project directory in the system path for module imports
-
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_cohere import ChatCohere
+from adam.agents.providers import chat_model
 
 # LangChain's BaseModel and Field are derived from pydantic's BaseModel class and Field attribute and can be used to
 # enforce structure in an LLM's responses. Here we are using them to ensure that the LLM only responds in one of two
@@ -21,7 +12,7 @@ class PromptComplexity(BaseModel):
     """Whether the prompt is simple(can be answered easily) or complex(needs internet research)."""
     complexity: str = Field(description="Prompt Complexity: 'simple' or 'complex'")
 
-async def planner(state):
+async def planner():
 
     planner_preamble = (
         "You are an analyst that assesses the complexity of the prompt and will *ALWAYS* return one of the following values: \n"
@@ -30,7 +21,7 @@ async def planner(state):
     )
 
     # Initialize the language model with zero randomness for consistent outputs
-    llm = ChatCohere(model="command-r-plus", temperature=0)
+    llm = chat_model(model="command-r-plus", temperature=0)
 
     # Structure the LLM's response using the AnalyserResponse model
     structured_llm = llm.with_structured_output(PromptComplexity, preamble=planner_preamble)
@@ -0,0 +1,167 @@
+"""
+Shared clients for the LLM and search providers used by the agents.
+
+Each provider gets one pooled, keep-alive HTTP client for the whole process. Agent chains are built
+once by the registry (see registry.py), and every chat model and search tool they contain reuses
+these clients, so repeated calls don't pay for new connections and TLS handshakes. Search results
+are also cached and concurrent identical searches coalesced, see search_cache.py.
+
+The provider packages (langchain_cohere and the langchain_community Tavily tools) take seconds to
+import, so they are imported when the first chat model or search tool is created rather than when
+this module is imported. `PROVIDER_MODULES` lists them for the registry to preload.
+
+With LLM_PROVIDER=fake, `chat_model` returns the offline model of fake_llm.py instead and neither
+package is needed.
+"""
+import json
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import httpx
+
+from adam.agents.search_cache import search_cache
+from adam.settings import settings
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+# Modules imported on first use of a provider, by LLM_PROVIDER
+PROVIDER_MODULES = {
+    "cohere": ("cohere", "langchain_cohere", "langchain_community.tools.tavily_search", "langchain.agents"),
+    "fake": (),
+}
+
+# Matches the default request timeout of langchain_cohere
+TIMEOUT_SECONDS = 300
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+_cohere_clients: Optional[tuple] = None
+# The HTTP clients of the Cohere clients, kept so shutdown can close them without reaching into cohere
+_cohere_http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_tavily_http_client: Optional[httpx.AsyncClient] = None
+
+
+def cohere_clients() -> tuple:
+    """
+    Return the process-wide (cohere.Client, cohere.AsyncClient) pair, creating it on first use.
+    """
+    global _cohere_clients, _cohere_http_clients
+    if _cohere_clients is None:
+        import cohere
+        api_key = settings.cohere_api_key
+        _cohere_http_clients = (
+            httpx.Client(limits=POOL_LIMITS, timeout=TIMEOUT_SECONDS),
+            httpx.AsyncClient(limits=POOL_LIMITS, timeout=TIMEOUT_SECONDS),
+        )
+        _cohere_clients = (
+            cohere.Client(api_key=api_key, httpx_client=_cohere_http_clients[0]),
+            cohere.AsyncClient(api_key=api_key, httpx_client=_cohere_http_clients[1]),
+        )
+    return _cohere_clients
+
+
+def chat_model(model: str, temperature: float) -> "BaseChatModel":
+    """
+    Create a chat model that sends its requests through the shared Cohere clients, or the offline
+    fake model when LLM_PROVIDER is "fake".
+
+    Args:
+        model (str): Name of the Cohere model.
+        temperature (float): Sampling temperature.
+
+    Returns:
+        BaseChatModel: The chat model, a ChatCohere unless the fake provider is selected.
+    """
+    if settings.llm_provider == "fake":
+        from adam.agents.fake_llm import fake_chat_model
+        return fake_chat_model(model, temperature)
+
+    from langchain_cohere import ChatCohere
+
+    llm = ChatCohere(model=model, temperature=temperature)
+    # ChatCohere always creates its own clients on construction, swap them for the pooled ones.
+    llm.client, llm.async_client = cohere_clients()
+    return llm
+
+
+@lru_cache(maxsize=None)
+def pooled_tavily_wrapper() -> type:
+    """
+    Return the PooledTavilySearchAPIWrapper class, defining it on first use.
+    """
+    from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper, TAVILY_API_URL
+
+    class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+        """
+        Tavily wrapper whose async requests go through a shared httpx client instead of opening
+        a new aiohttp session per search, and are answered from the search cache when possible.
+        """
+        async def raw_results_async(
+            self,
+            query: str,
+            max_results: Optional[int] = 5,
+            search_depth: Optional[str] = "advanced",
+            include_domains: Optional[list] = [],
+            exclude_domains: Optional[list] = [],
+            include_answer: Optional[bool] = False,
+            include_raw_content: Optional[bool] = False,
+            include_images: Optional[bool] = False,
+        ) -> Dict:
+            params = {
+                "max_results": max_results,
+                "search_depth": search_depth,
+                "include_domains": include_domains,
+                "exclude_domains": exclude_domains,
+                "include_answer": include_answer,
+                "include_raw_content": include_raw_content,
+                "include_images": include_images,
+            }
+            return await search_cache.aget_or_fetch(query, params, lambda: self.post_search(query, params))
+
+        async def post_search(self, query: str, params: Dict) -> Dict:
+            """
+            Send a search request to Tavily.
+            """
+            global _tavily_http_client
+            if _tavily_http_client is None:
+                _tavily_http_client = httpx.AsyncClient(limits=POOL_LIMITS, timeout=TIMEOUT_SECONDS)
+            payload = {"api_key": self.tavily_api_key.get_secret_value(), "query": query, **params}
+            response = await _tavily_http_client.post(f"{TAVILY_API_URL}/search", json=payload)
+            if response.status_code != 200:
+                raise Exception(f"Error {response.status_code}: {response.reason_phrase}")
+            return json.loads(response.text)
+
+    return PooledTavilySearchAPIWrapper
+
+
+def __getattr__(name: str):
+    # PooledTavilySearchAPIWrapper subclasses a langchain_community class, so it is defined lazily
+    if name == "PooledTavilySearchAPIWrapper":
+        return pooled_tavily_wrapper()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def search_tool(**kwargs) -> "TavilySearchResults":
+    """
+    Create a Tavily search tool that uses the shared HTTP client.
+    """
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(api_wrapper=pooled_tavily_wrapper()(), **kwargs)
+
+
+async def aclose():
+    """
+    Close the shared provider clients. Called on application shutdown.
+    """
+    global _cohere_clients, _cohere_http_clients, _tavily_http_client
+    if _cohere_http_clients is not None:
+        sync_http_client, async_http_client = _cohere_http_clients
+        sync_http_client.close()
+        await async_http_client.aclose()
+        _cohere_http_clients = None
+    _cohere_clients = None
+    if _tavily_http_client is not None:
+        await _tavily_http_client.aclose()
+        _tavily_http_client = None
@@ -0,0 +1,145 @@
+"""
+Process-wide registry of agent chains.
+
+The agent factories build a new chat model, prompt template and output parser every time they are
+called. None of that depends on the graph state, so the registry calls each factory once and hands
+the same chain to every node call. `build_all` is awaited on application startup so the first
+request doesn't pay for construction either. On startup `warm` does so in the background, after
+importing the provider packages in a worker thread, so the server accepts requests while they load.
+
+Chains of the agents in CACHED_AGENTS are wrapped in a CachedChain, see response_cache.py, and the
+routing agents in `fast_paths` in a FastPathChain, see fast_path.py. Their chat models record
+latency and token metrics, see llm_metrics.py.
+"""
+import asyncio
+import importlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from adam.agents.engineer import engineer
+from adam.agents.analyser import analyser
+from adam.agents.subject_agent import subject_agent
+from adam.agents.agent_builder import agent_builder, META_AGENT_PROMPTS
+from adam.agents.planner import planner
+from adam.agents.meta_one import meta_one
+from adam.agents.meta_two import meta_two
+from adam.agents.meta_supervisor import meta_supervisor
+from adam.agents.meta_search import meta_search
+from adam.agents.response_cache import CACHED_AGENTS, CachedChain, ResponseCache, response_cache
+from adam.agents.fast_path import FastPathChain, FastPathClassifier, fast_paths
+from adam.agents.llm_metrics import instrument
+from adam.agents.providers import PROVIDER_MODULES
+from adam.settings import settings
+
+logger = logging.getLogger(__name__)
+
+AGENT_FACTORIES = {
+    "engineer": engineer,
+    "analyser": analyser,
+    "subject": subject_agent,
+    "builder": agent_builder,
+    "planner": planner,
+    "meta_one": meta_one,
+    "meta_two": meta_two,
+    "meta_supervisor": meta_supervisor,
+    "meta_search": meta_search,
+}
+
+class AgentRegistry:
+    """
+    Builds each agent chain once and caches it for the lifetime of the process.
+
+    Attributes:
+        factories (Dict[str, Callable]): Agent factories keyed by agent name.
+        chains (Dict[Tuple, Any]): Built chains keyed by agent name and factory arguments.
+        response_cache (Optional[ResponseCache]): Cache for the chains of `cached_agents`, None to
+            disable caching.
+        cached_agents (Tuple[str, ...]): Names of the agents whose responses are cached.
+        fast_paths (Dict[str, FastPathClassifier]): Local classifiers tried before the LLM, keyed by
+            agent name.
+    """
+    def __init__(
+        self,
+        factories: Dict[str, Any] = AGENT_FACTORIES,
+        response_cache: Optional[ResponseCache] = response_cache,
+        cached_agents: Tuple[str, ...] = CACHED_AGENTS,
+        fast_paths: Dict[str, FastPathClassifier] = fast_paths,
+    ):
+        self.factories = dict(factories)
+        self.chains: Dict[Tuple, Any] = {}
+        self.response_cache = response_cache
+        self.cached_agents = cached_agents
+        self.fast_paths = fast_paths
+
+    async def get(self, name: str, *args):
+        """
+        Return the chain for an agent, building it on first use.
+
+        Args:
+            name (str): Name of the agent, i.e. a key of `factories`.
+            *args: Arguments passed to the factory, e.g. the agent type for the builder.
+
+        Returns:
+            The agent chain.
+        """
+        key = (name, *args)
+        if key not in self.chains:
+            chain = instrument(name, await self.factories[name](*args))
+            if self.response_cache is not None and name in self.cached_agents:
+                chain = CachedChain(":".join((name, *args)), chain, self.response_cache)
+            if name in self.fast_paths:
+                chain = FastPathChain(self.fast_paths[name], chain)
+            self.chains.setdefault(key, chain)
+        return self.chains[key]
+
+    async def build_all(self):
+        """
+        Build every agent chain up front.
+        """
+        for name in self.factories:
+            if name == "builder":
+                for agent_type in META_AGENT_PROMPTS:
+                    await self.get(name, agent_type)
+            else:
+                await self.get(name)
+        logger.info("[AgentRegistry] Built %d agent chains", len(self.chains))
+
+    async def warm(self):
+        """
+        Import the provider packages in a worker thread, then build every agent chain. Meant to run
+        as a background task: requests served meanwhile build the chains they need themselves.
+        """
+        try:
+            await asyncio.to_thread(lambda: [importlib.import_module(module) for module in PROVIDER_MODULES[settings.llm_provider]])
+            await self.build_all()
+        except Exception:
+            logger.exception("[AgentRegistry] Warming the agent chains failed, they will be built on first use")
+
+    async def train_fast_paths(self):
+        """
+        Train the fast-path classifiers on the decisions logged so far.
+        """
+        for classifier in self.fast_paths.values():
+            await classifier.atrain()
+
+    async def drain_fast_paths(self):
+        """
+        Wait until the routing decisions logged in the background are stored.
+        """
+        for classifier in self.fast_paths.values():
+            await classifier.adrain()
+
+    def fast_path_report(self) -> Dict[str, str]:
+        """
+        Describe how often each fast-path classifier answered without the LLM.
+        """
+        return {name: classifier.report() for name, classifier in self.fast_paths.items()}
+
+    def clear(self):
+        """
+        Drop all built chains so they are rebuilt on next use.
+        """
+        self.chains.clear()
+
+# Create a global instance of the AgentRegistry class
+agent_registry = AgentRegistry()
@@ -0,0 +1,236 @@
+"""
+Response cache for agent chains whose answer only depends on their inputs.
+
+The analyser, planner and meta supervisor run at temperature 0, and the engineer and builder often
+see the same inputs again across retries and users. The registry wraps those chains in a
+`CachedChain`, so a repeated call is answered from an in-memory LRU or, after a restart, from the
+`llm_responses` table instead of a round-trip to the provider.
+
+Responses are keyed on the agent name, a hash of the chain's prompt template, the model, the
+temperature and the normalized inputs, so changing any of them misses the cache.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumpd
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import BasePromptTemplate
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableConfig, RunnableSequence
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from adam.database import db, Database, LLMResponseRecord, require_sqlite
+
+# Agents whose responses are cached, see AgentRegistry.get
+CACHED_AGENTS = ("analyser", "planner", "meta_supervisor", "engineer", "builder")
+
+_MISSING = object()
+
+
+def normalize_inputs(value: Any) -> Any:
+    """
+    Reduce chain inputs to plain JSON values. Whitespace differences in text are ignored and
+    messages are reduced to their type, name and content.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "name": value.name, "content": normalize_inputs(value.content)}
+    if isinstance(value, dict):
+        return {str(key): normalize_inputs(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_inputs(item) for item in value]
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return str(value)
+
+
+def chain_fingerprint(chain: Runnable) -> Tuple[str, Optional[str], Optional[float]]:
+    """
+    Describe a chain for the cache key.
+
+    Args:
+        chain (Runnable): The agent chain, a sequence of prompt, chat model and output parser.
+
+    Returns:
+        Tuple[str, Optional[str], Optional[float]]: Hash of the prompt template and the other
+            non-model steps, and the model name and temperature of the chat model.
+    """
+    parts = []
+    model: Dict[str, Any] = {}
+
+    def visit(step):
+        if isinstance(step, RunnableSequence):
+            for child in step.steps:
+                visit(child)
+        elif isinstance(step, RunnableBinding):
+            parts.append(json.dumps(step.kwargs, sort_keys=True, default=str))
+            visit(step.bound)
+        elif isinstance(step, BaseChatModel):
+            model.update(model=getattr(step, "model", step._llm_type), temperature=getattr(step, "temperature", None))
+        elif isinstance(step, BasePromptTemplate):
+            parts.append(json.dumps(dumpd(step), sort_keys=True, default=str))
+        else:
+            parts.append(f"{type(step).__module__}.{type(step).__qualname__}")
+
+    visit(chain)
+    template_hash = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return template_hash, model.get("model"), model.get("temperature")
+
+
+def cache_key(agent_name: str, template_hash: str, model: Optional[str], temperature: Optional[float], inputs: Any) -> str:
+    """
+    Build the cache key of a call.
+    """
+    payload = [agent_name, template_hash, model, temperature, normalize_inputs(inputs)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of agent responses: an in-memory LRU in front of the `llm_responses` table.
+
+    Attributes:
+        database (Optional[Database]): Database of the persistent tier, None to keep responses in
+            memory only.
+        max_entries (int): Responses kept in the in-memory tier.
+        ttl (float): Seconds a response is served for after it was stored.
+        stats (Dict[str, int]): Hit and miss counters: `memory_hits`, `database_hits` and `misses`.
+    """
+    def __init__(self, database: Optional[Database] = None, max_entries: int = 1024, ttl: float = 24 * 60 * 60):
+        self.database = database
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.serde = JsonPlusSerializer()
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "database_hits": 0, "misses": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Share of lookups answered from either tier.
+        """
+        hits = self.stats["memory_hits"] + self.stats["database_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def _remember(self, key: str, created_at: float, value: Any):
+        self.entries[key] = (created_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def aget(self, key: str) -> Any:
+        """
+        Look up a response.
+
+        Args:
+            key (str): The cache key, see `cache_key`.
+
+        Returns:
+            The cached response, or the `_MISSING` sentinel if there is no fresh one.
+        """
+        expired_before = time.time() - self.ttl
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] >= expired_before:
+                self.entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[1]
+            del self.entries[key]
+
+        if self.database is not None:
+            async with self.database.session() as session:
+                record = (await session.execute(select(LLMResponseRecord).where(LLMResponseRecord.key == key))).scalar_one_or_none()
+                if record is not None and record.created_at >= expired_before:
+                    value = self.serde.loads_typed((record.value_type, record.value))
+                    self._remember(key, record.created_at, value)
+                    self.stats["database_hits"] += 1
+                    return value
+                if record is not None:
+                    await session.delete(record)
+
+        self.stats["misses"] += 1
+        return _MISSING
+
+    async def aset(self, key: str, agent_name: str, value: Any):
+        """
+        Store a response in both tiers.
+
+        Args:
+            key (str): The cache key, see `cache_key`.
+            agent_name (str): Agent that produced the response.
+            value: The response.
+        """
+        created_at = time.time()
+        self._remember(key, created_at, value)
+        if self.database is not None:
+            value_type, value_bytes = self.serde.dumps_typed(value)
+            row = dict(key=key, agent_name=agent_name, value_type=value_type, value=value_bytes, created_at=created_at)
+            async with self.database.session() as session:
+                await session.execute(insert(LLMResponseRecord).values(**row).on_conflict_do_update(index_elements=["key"], set_=row))
+
+    async def aevict(self) -> int:
+        """
+        Delete expired responses from the persistent tier.
+
+        Returns:
+            int: Number of responses deleted.
+        """
+        if self.database is None:
+            return 0
+        async with self.database.session() as session:
+            result = await session.execute(delete(LLMResponseRecord).where(LLMResponseRecord.created_at < time.time() - self.ttl))
+        return result.rowcount
+
+    def clear(self):
+        """
+        Drop the in-memory tier and reset the counters.
+        """
+        self.entries.clear()
+        self.stats = dict.fromkeys(self.stats, 0)
+
+
+class CachedChain(Runnable):
+    """
+    Wraps an agent chain so that `ainvoke` is answered from a ResponseCache when possible.
+
+    Only the async path is cached, the graph nodes always call `ainvoke`. Callbacks are passed
+    through on a miss, so streaming and tracing of the wrapped chain are unchanged.
+    """
+    def __init__(self, agent_name: str, chain: Runnable, cache: ResponseCache):
+        self.agent_name = agent_name
+        self.chain = chain
+        self.cache = cache
+        self.template_hash, self.model, self.temperature = chain_fingerprint(chain)
+
+    def key(self, inputs: Any) -> str:
+        return cache_key(self.agent_name, self.template_hash, self.model, self.temperature, inputs)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.chain.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        value, _ = await self.ainvoke_cached(input, config, **kwargs)
+        return value
+
+    async def ainvoke_cached(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Tuple[Any, bool]:
+        """
+        Like `ainvoke`, but also return whether the response came from the cache rather than the model.
+        """
+        key = self.key(input)
+        value = await self.cache.aget(key)
+        if value is not _MISSING:
+            return value, True
+        value = await self.chain.ainvoke(input, config, **kwargs)
+        await self.cache.aset(key, self.agent_name, value)
+        return value, False
+
+
+# Create a global instance of the ResponseCache class
+response_cache = ResponseCache(require_sqlite(db, "response_cache"))
@@ -0,0 +1,153 @@
+"""
+Cache for web search results, shared by every conversation.
+
+Searches are keyed on the normalized query and the search parameters. Results are kept in an
+in-memory LRU and in the `search_results` table, both bounded in size and expiring after `ttl`
+seconds. Identical queries that arrive while a search is in flight wait for that search instead of
+sending their own request. The search runs in a task of its own, so it goes on for the others when
+the caller that started it is cancelled.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from adam.database import db, Database, SearchResultRecord, require_sqlite
+
+
+def normalize_query(query: str) -> str:
+    """
+    Reduce a query to lower case words, so differences in case, punctuation and whitespace hit
+    the same cache entry.
+    """
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+class SearchCache:
+    """
+    Two-tier cache of search results with request coalescing.
+
+    Attributes:
+        database (Optional[Database]): Database of the persistent tier, None to keep results in
+            memory only.
+        max_entries (int): Results kept in the in-memory tier.
+        max_stored_entries (int): Results kept in the persistent tier, the oldest are evicted first.
+        ttl (float): Seconds results are served for after they were stored.
+        stats (Dict[str, int]): Counters of `memory_hits`, `database_hits`, `coalesced` requests
+            and `misses`.
+    """
+    def __init__(
+        self,
+        database: Optional[Database] = None,
+        max_entries: int = 256,
+        max_stored_entries: int = 10000,
+        ttl: float = 6 * 60 * 60,
+    ):
+        self.database = database
+        self.max_entries = max_entries
+        self.max_stored_entries = max_stored_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"memory_hits": 0, "database_hits": 0, "coalesced": 0, "misses": 0}
+
+    @staticmethod
+    def key(query: str, params: Dict[str, Any]) -> str:
+        payload = [normalize_query(query), params]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _remember(self, key: str, created_at: float, results: Dict):
+        self.entries[key] = (created_at, results)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def _lookup(self, key: str) -> Optional[Dict]:
+        expired_before = time.time() - self.ttl
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] >= expired_before:
+                self.entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[1]
+            del self.entries[key]
+
+        if self.database is not None:
+            async with self.database.session() as session:
+                record = (await session.execute(select(SearchResultRecord).where(SearchResultRecord.key == key))).scalar_one_or_none()
+                if record is not None and record.created_at >= expired_before:
+                    results = json.loads(record.results)
+                    self._remember(key, record.created_at, results)
+                    self.stats["database_hits"] += 1
+                    return results
+        return None
+
+    async def _store(self, key: str, query: str, results: Dict):
+        created_at = time.time()
+        self._remember(key, created_at, results)
+        if self.database is None:
+            return
+        row = dict(key=key, query=normalize_query(query), results=json.dumps(results), created_at=created_at)
+        async with self.database.session() as session:
+            await session.execute(insert(SearchResultRecord).values(**row).on_conflict_do_update(index_elements=["key"], set_=row))
+            # Keep the table bounded: drop expired results and everything past the newest max_stored_entries
+            newest = select(SearchResultRecord.key).order_by(SearchResultRecord.created_at.desc()).limit(self.max_stored_entries)
+            await session.execute(delete(SearchResultRecord).where(
+                (SearchResultRecord.created_at < created_at - self.ttl) | SearchResultRecord.key.not_in(newest)
+            ))
+
+    async def aget_or_fetch(self, query: str, params: Dict[str, Any], fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Return the cached results of a search, running it with `fetch` on a miss.
+
+        Args:
+            query (str): The search query.
+            params (Dict[str, Any]): Other search parameters that change the results.
+            fetch (Callable[[], Awaitable[Dict]]): Sends the search request.
+
+        Returns:
+            Dict: The search response.
+        """
+        key = self.key(query, params)
+        if key in self.in_flight:
+            self.stats["coalesced"] += 1
+        else:
+            # The search runs in its own task that every caller shields, so a caller that is
+            # cancelled (its client disconnected) doesn't cancel the search for the others
+            task = asyncio.ensure_future(self._lookup_or_fetch(key, query, fetch))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda task: self._fetch_done(key, task))
+        return await asyncio.shield(self.in_flight[key])
+
+    async def _lookup_or_fetch(self, key: str, query: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        results = await self._lookup(key)
+        if results is None:
+            self.stats["misses"] += 1
+            results = await fetch()
+            await self._store(key, query, results)
+        return results
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # The callers that are still waiting get the error, retrieve it so it isn't logged again
+        # when they were all cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def clear(self):
+        """
+        Drop the in-memory tier and reset the counters.
+        """
+        self.entries.clear()
+        self.stats = dict.fromkeys(self.stats, 0)
+
+
+# Create a global instance of the SearchCache class
+search_cache = SearchCache(require_sqlite(db, "search_cache"))
@@ -2,11 +2,11 @@
 
 
 from langchain_core.output_parsers import StrOutputParser
-from langchain_cohere import ChatCohere
+from adam.agents.providers import chat_model
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage
 
-async def subject_agent(state: dict):
+async def subject_agent():
     system_prompt = (
         "# ROLE:\nYou are an expert prompt engineer. \n\n"
         "# TASK:\nAnalyse the prompt and determine the subject matter.\n\n"
@@ -24,7 +24,7 @@ async def subject_agent(state: dict):
         "## Input:\n{rewritten_prompt}\n\n"
         "## Output:\n"
     )
-    llm = ChatCohere(model="command-r-plus", temperature=0.2)
+    llm = chat_model(model="command-r-plus", temperature=0.2)
     
     # The ChatPromptTemplate class in LangChain is used to create and format prompts for 
     # conversational models. It provides a structured way to define the messages that will be sent
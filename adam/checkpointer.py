@@ -0,0 +1,332 @@
+"""
+Durable LangGraph checkpointer backed by the application's SQLite database.
+
+Checkpoints and pending writes are stored in the `checkpoints` and `checkpoint_writes` tables, so
+threads interrupted before the human node survive a restart. Memory stays flat under load because
+nothing is kept in process: each thread keeps at most `max_checkpoints_per_thread` checkpoints,
+and threads whose run has finished are evicted once they are older than `finished_thread_ttl` or
+fall outside the `max_finished_threads` most recently used.
+"""
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from adam.database import (
+    db,
+    Database,
+    CheckpointRecord,
+    CheckpointWriteRecord,
+    CheckpointThreadRecord,
+    require_sqlite,
+)
+
+logger = logging.getLogger(__name__)
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Async checkpoint saver that persists LangGraph checkpoints through `Database`.
+
+    Only the async interface is implemented, the graphs are always run with astream/aget_state.
+
+    Attributes:
+        database (Database): Database the checkpoints are stored in.
+        max_checkpoints_per_thread (int): Checkpoints kept per thread and namespace, older ones are pruned.
+        finished_thread_ttl (float): Seconds a finished thread is kept before it is evicted.
+        max_finished_threads (int): Finished threads kept, the least recently updated are evicted first.
+    """
+    def __init__(
+        self,
+        database: Database,
+        max_checkpoints_per_thread: int = 10,
+        finished_thread_ttl: float = 24 * 60 * 60,
+        max_finished_threads: int = 1000,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.database = database
+        self.max_checkpoints_per_thread = max(2, max_checkpoints_per_thread)
+        self.finished_thread_ttl = finished_thread_ttl
+        self.max_finished_threads = max_finished_threads
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Fetch a checkpoint. Returns the checkpoint named by `checkpoint_id` in the config, or the
+        latest checkpoint of the thread if there is none.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = select(CheckpointRecord).where(
+            CheckpointRecord.thread_id == thread_id,
+            CheckpointRecord.checkpoint_ns == checkpoint_ns,
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            query = query.where(CheckpointRecord.checkpoint_id == checkpoint_id)
+        else:
+            query = query.order_by(CheckpointRecord.checkpoint_id.desc()).limit(1)
+
+        async with self.database.session() as session:
+            record = (await session.execute(query)).scalar_one_or_none()
+            if record is None:
+                return None
+            return await self._load_tuple(session, record)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """
+        List checkpoints, newest first, optionally filtered by thread, namespace, metadata and
+        position relative to `before`.
+        """
+        query = select(CheckpointRecord)
+        if config:
+            query = query.where(CheckpointRecord.thread_id == config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query = query.where(CheckpointRecord.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.where(CheckpointRecord.checkpoint_id == checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            query = query.where(CheckpointRecord.checkpoint_id < before_checkpoint_id)
+        query = query.order_by(CheckpointRecord.checkpoint_id.desc())
+
+        tuples: List[CheckpointTuple] = []
+        async with self.database.session() as session:
+            for record in (await session.execute(query)).scalars():
+                if limit is not None and len(tuples) >= limit:
+                    break
+                metadata = self.serde.loads_typed((record.metadata_type, record.checkpoint_metadata))
+                if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                tuples.append(await self._load_tuple(session, record))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Save a checkpoint and prune the thread down to `max_checkpoints_per_thread`.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        stored.pop("pending_sends", None)
+        checkpoint_type, checkpoint_bytes = self.serde.dumps_typed(stored)
+        metadata_type, metadata_bytes = self.serde.dumps_typed(metadata)
+        values = {
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "checkpoint_type": checkpoint_type,
+            "checkpoint": checkpoint_bytes,
+            "metadata_type": metadata_type,
+            "checkpoint_metadata": metadata_bytes,
+        }
+
+        async with self.database.session() as session:
+            await session.execute(
+                insert(CheckpointRecord)
+                .values(thread_id=thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=checkpoint["id"], **values)
+                .on_conflict_do_update(index_elements=["thread_id", "checkpoint_ns", "checkpoint_id"], set_=values)
+            )
+            # Writing a checkpoint means the thread is running again
+            now = time.time()
+            await session.execute(
+                insert(CheckpointThreadRecord)
+                .values(thread_id=thread_id, updated_at=now, finished_at=None)
+                .on_conflict_do_update(index_elements=["thread_id"], set_={"updated_at": now, "finished_at": None})
+            )
+            await self._prune_thread(session, thread_id, checkpoint_ns)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str) -> None:
+        """
+        Save the pending writes a task made against a checkpoint.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_bytes = self.serde.dumps_typed(value)
+            rows.append({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+                "channel": channel,
+                "value_type": value_type,
+                "value": value_bytes,
+            })
+        if not rows:
+            return
+        statement = insert(CheckpointWriteRecord)
+        statement = statement.on_conflict_do_update(
+            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"],
+            set_={"channel": statement.excluded.channel, "value_type": statement.excluded.value_type, "value": statement.excluded.value},
+        )
+        async with self.database.session() as session:
+            await session.execute(statement, rows)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """
+        Delete every checkpoint and write of a thread.
+        """
+        async with self.database.session() as session:
+            await self._delete_threads(session, [thread_id])
+
+    async def afinish_thread(self, thread_id: str) -> None:
+        """
+        Mark a thread's run as finished, making it eligible for eviction, then evict expired threads.
+        """
+        async with self.database.session() as session:
+            await session.execute(
+                update(CheckpointThreadRecord)
+                .where(CheckpointThreadRecord.thread_id == thread_id)
+                .values(finished_at=time.time())
+            )
+        await self.aevict()
+
+    async def aevict(self) -> int:
+        """
+        Evict finished threads older than `finished_thread_ttl`, then the least recently updated
+        finished threads beyond `max_finished_threads`.
+
+        Returns:
+            int: The number of threads evicted.
+        """
+        async with self.database.session() as session:
+            expired = await session.execute(
+                select(CheckpointThreadRecord.thread_id)
+                .where(CheckpointThreadRecord.finished_at < time.time() - self.finished_thread_ttl)
+            )
+            overflow = await session.execute(
+                select(CheckpointThreadRecord.thread_id)
+                .where(CheckpointThreadRecord.finished_at.is_not(None))
+                .order_by(CheckpointThreadRecord.updated_at.desc())
+                .offset(self.max_finished_threads)
+            )
+            thread_ids = set(expired.scalars()) | set(overflow.scalars())
+            if thread_ids:
+                await self._delete_threads(session, list(thread_ids))
+        if thread_ids:
+            logger.info("[SQLiteCheckpointSaver] Evicted %d finished threads", len(thread_ids))
+        return len(thread_ids)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        """
+        Generate the next channel version, the same string versions MemorySaver uses.
+        """
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def _load_tuple(self, session, record: CheckpointRecord) -> CheckpointTuple:
+        writes = await session.execute(
+            select(CheckpointWriteRecord)
+            .where(
+                CheckpointWriteRecord.thread_id == record.thread_id,
+                CheckpointWriteRecord.checkpoint_ns == record.checkpoint_ns,
+                CheckpointWriteRecord.checkpoint_id == record.checkpoint_id,
+            )
+            .order_by(CheckpointWriteRecord.task_id, CheckpointWriteRecord.idx)
+        )
+        pending_writes = [
+            (write.task_id, write.channel, self.serde.loads_typed((write.value_type, write.value)))
+            for write in writes.scalars()
+        ]
+        pending_sends = []
+        if record.parent_checkpoint_id:
+            sends = await session.execute(
+                select(CheckpointWriteRecord.value_type, CheckpointWriteRecord.value)
+                .where(
+                    CheckpointWriteRecord.thread_id == record.thread_id,
+                    CheckpointWriteRecord.checkpoint_ns == record.checkpoint_ns,
+                    CheckpointWriteRecord.checkpoint_id == record.parent_checkpoint_id,
+                    CheckpointWriteRecord.channel == TASKS,
+                )
+                .order_by(CheckpointWriteRecord.task_id, CheckpointWriteRecord.idx)
+            )
+            pending_sends = [self.serde.loads_typed((value_type, value)) for value_type, value in sends]
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": record.thread_id,
+                    "checkpoint_ns": record.checkpoint_ns,
+                    "checkpoint_id": record.checkpoint_id,
+                }
+            },
+            checkpoint={
+                **self.serde.loads_typed((record.checkpoint_type, record.checkpoint)),
+                "pending_sends": pending_sends,
+            },
+            metadata=self.serde.loads_typed((record.metadata_type, record.checkpoint_metadata)),
+            parent_config={
+                "configurable": {
+                    "thread_id": record.thread_id,
+                    "checkpoint_ns": record.checkpoint_ns,
+                    "checkpoint_id": record.parent_checkpoint_id,
+                }
+            }
+            if record.parent_checkpoint_id
+            else None,
+            pending_writes=pending_writes,
+        )
+
+    async def _prune_thread(self, session, thread_id: str, checkpoint_ns: str) -> None:
+        kept = (
+            select(CheckpointRecord.checkpoint_id)
+            .where(CheckpointRecord.thread_id == thread_id, CheckpointRecord.checkpoint_ns == checkpoint_ns)
+            .order_by(CheckpointRecord.checkpoint_id.desc())
+            .limit(self.max_checkpoints_per_thread)
+        )
+        for model in (CheckpointRecord, CheckpointWriteRecord):
+            await session.execute(
+                delete(model).where(
+                    model.thread_id == thread_id,
+                    model.checkpoint_ns == checkpoint_ns,
+                    model.checkpoint_id.not_in(kept),
+                )
+            )
+
+    async def _delete_threads(self, session, thread_ids: List[str]) -> None:
+        for model in (CheckpointRecord, CheckpointWriteRecord, CheckpointThreadRecord):
+            await session.execute(delete(model).where(model.thread_id.in_(thread_ids)))
+
+# Create a global instance of the SQLiteCheckpointSaver class
+checkpointer = SQLiteCheckpointSaver(require_sqlite(db, "checkpointer"))
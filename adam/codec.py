@@ -0,0 +1,155 @@
+"""
+Typed websocket frames and their encoding.
+
+Every frame the server sends is one of the TypedDicts below, built where it is sent and encoded
+by `encode` once it leaves the connection's outbox. Frames are JSON text, encoded with orjson when
+it is installed. Clients that ask for the `adam.msgpack` subprotocol when they connect get binary
+msgpack frames instead (the msgpack package is optional); what clients send stays JSON.
+
+`FieldDelta` keeps `conversation_updated` frames small: a run sends the fields of its conversation
+once and after that only the ones that changed.
+"""
+import json
+from typing import Any, Dict, List, Literal, Optional, Tuple, TypedDict, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is a dependency, json is the fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Websocket subprotocols clients can ask for, and the codec each selects
+SUBPROTOCOLS = {"adam.json": JSON, "adam.msgpack": MSGPACK}
+
+Payload = Union[str, bytes]
+
+
+class TokenFrame(TypedDict):
+    type: Literal["token"]
+    conversation_id: int
+    node: str
+    message_id: str
+    content: str
+
+
+class NewMessageFrame(TypedDict):
+    type: Literal["new_message"]
+    conversation_id: int
+    message: str
+    sender_name: str
+    message_id: Optional[str]
+    conversation_state: str
+
+
+class PostedMessageFrame(TypedDict):
+    type: Literal["new_message"]
+    data: Dict[str, Any]
+
+
+class ConversationUpdatedFrame(TypedDict):
+    type: Literal["conversation_updated"]
+    conversation_id: int
+    updated_fields: Dict[str, Any]
+
+
+class ConversationHistoryFrame(TypedDict):
+    type: Literal["conversation_history"]
+    data: List[Dict[str, Any]]
+    conversation_id: Optional[int]
+    conversationState: Optional[str]
+    before_id: Optional[int]
+    next_before_id: Optional[int]
+
+
+class ConversationsFrame(TypedDict):
+    type: Literal["conversations"]
+    data: List[Dict[str, Any]]
+    before_id: Optional[int]
+    next_before_id: Optional[int]
+
+
+class LatestConversationFrame(TypedDict):
+    type: Literal["latest_conversation"]
+    data: Optional[Dict[str, Any]]
+
+
+class NewConversationFrame(TypedDict):
+    type: Literal["new_conversation"]
+    data: Dict[str, Any]
+
+
+class MessageFrame(TypedDict):
+    type: Literal["message"]
+    data: Dict[str, Any]
+
+
+class ErrorFrame(TypedDict, total=False):
+    type: Literal["error"]
+    message: str
+    request_type: str
+
+
+Frame = Union[
+    TokenFrame, NewMessageFrame, PostedMessageFrame, ConversationUpdatedFrame, ConversationHistoryFrame, ConversationsFrame,
+    LatestConversationFrame, NewConversationFrame, MessageFrame, ErrorFrame,
+]
+
+
+def encode(frame: Frame, codec: str = JSON) -> Payload:
+    """
+    Encode a frame: JSON text, or msgpack bytes for the MSGPACK codec.
+    """
+    if codec == MSGPACK:
+        return msgpack.packb(frame)
+    if orjson is not None:
+        return orjson.dumps(frame).decode()
+    return json.dumps(frame)
+
+
+def decode(payload: Payload) -> Dict[str, Any]:
+    """
+    Decode a frame from JSON text, or from msgpack bytes.
+    """
+    if isinstance(payload, bytes):
+        return msgpack.unpackb(payload)
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+def negotiate(subprotocols: List[str]) -> Tuple[str, Optional[str]]:
+    """
+    Choose the codec of a connection from the subprotocols the client offered.
+
+    Returns:
+        Tuple[str, Optional[str]]: The codec, and the subprotocol to accept (None if the client
+            offered none the server supports).
+    """
+    for subprotocol in subprotocols:
+        codec = SUBPROTOCOLS.get(subprotocol)
+        if codec == MSGPACK and msgpack is None:
+            continue
+        if codec is not None:
+            return codec, subprotocol
+    return JSON, None
+
+
+class FieldDelta:
+    """
+    Remembers the conversation fields already sent to a client and returns only those that changed.
+
+    Attributes:
+        sent (Dict[str, Any]): The fields as last sent.
+    """
+    def __init__(self):
+        self.sent: Dict[str, Any] = {}
+
+    def __call__(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        changed = {field: value for field, value in fields.items() if field not in self.sent or self.sent[field] != value}
+        self.sent.update(changed)
+        return changed
@@ -1,42 +1,293 @@
-from typing import List, Dict
+"""
+Websocket connections and their outbound frames.
+
+`send_personal_message` used to await `websocket.send_text` from inside graph execution, so a slow
+browser slowed down the run that produced the frames. Every connection now has an `Outbox`: a
+bounded queue of frames drained by its own writer task, so senders only enqueue.
+
+A `conversation_updated` frame that is still queued when a newer one for the same conversation
+arrives is merged into it, later fields winning, since only the latest values matter. When a
+client falls behind and its queue is full, SLOW_CONSUMER_POLICY decides what happens:
+
+- "drop": the new frame is dropped.
+- "coalesce": queued token frames of the same streamed message are merged into one, and the new
+  frame is dropped only if that frees no space.
+- "disconnect": the connection is closed, the client reconnects and reloads its history.
+
+Frames are queued as the dicts defined in codec.py and encoded by the writer, in the codec the
+connection negotiated. Pre-encoded payloads (cached history pages) are queued as they are.
+Websockets that were never connected through the manager (as in tests) are sent to directly.
+"""
 import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Union
+
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState
 
+from adam.codec import Frame, Payload, JSON, encode, negotiate
+from adam.metrics import WEBSOCKET_SEND, metrics
+from adam.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = settings.send_queue_size
+SLOW_CONSUMER_POLICY = settings.slow_consumer_policy
+SLOW_CONSUMER_POLICIES = ("drop", "coalesce", "disconnect")
+
+# Close code sent to clients disconnected for falling behind ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+class Outbox:
+    """
+    Bounded queue of one connection's outbound frames, drained by a writer task.
+
+    Attributes:
+        websocket (WebSocket): The connection.
+        max_size (int): Most frames queued at once.
+        policy (str): What to do when the queue is full, one of SLOW_CONSUMER_POLICIES.
+        codec (str): Codec the frames are encoded with, see codec.py.
+        frames (Deque[Union[Frame, Payload]]): Frames waiting to be sent, oldest first.
+        stats (Dict[str, int]): Counters of `sent`, `dropped` and `coalesced` frames, and the
+            `max_depth` the queue reached.
+    """
+    def __init__(self, websocket: WebSocket, max_size: int = SEND_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY, codec: str = JSON):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy {policy!r}, expected one of {SLOW_CONSUMER_POLICIES}")
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+        self.codec = codec
+        self.frames: Deque[Union[Frame, Payload]] = deque()
+        self.updates: Dict[int, Frame] = {}
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0, "max_depth": 0}
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._writer = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        return len(self.frames)
+
+    def put(self, frame: Union[Frame, Payload]) -> bool:
+        """
+        Queue a frame.
+
+        Returns:
+            bool: False if the queue is full and the policy is "disconnect", True otherwise.
+        """
+        update = isinstance(frame, dict) and frame["type"] == "conversation_updated"
+        if update:
+            queued = self.updates.get(frame["conversation_id"])
+            if queued is not None:
+                queued["updated_fields"] = {**queued["updated_fields"], **frame["updated_fields"]}
+                self.stats["coalesced"] += 1
+                return True
+
+        if len(self.frames) >= self.max_size:
+            if self.policy == "disconnect":
+                return False
+            if self.policy == "drop" or not self._coalesce_tokens():
+                self.stats["dropped"] += 1
+                return True
+
+        if update:
+            self.updates[frame["conversation_id"]] = frame
+        self.frames.append(frame)
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self.frames))
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    def _coalesce_tokens(self) -> bool:
+        # Merge runs of queued token frames of the same message, return whether any space was freed
+        merged: Deque[Union[Frame, Payload]] = deque()
+        for frame in self.frames:
+            previous = merged[-1] if merged else None
+            if (
+                isinstance(frame, dict) and frame["type"] == "token"
+                and isinstance(previous, dict) and previous["type"] == "token"
+                and previous["message_id"] == frame["message_id"]
+            ):
+                merged[-1] = {**previous, "content": previous["content"] + frame["content"]}
+                self.stats["coalesced"] += 1
+                continue
+            merged.append(frame)
+        freed = len(merged) < len(self.frames)
+        self.frames = merged
+        return freed
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.frames:
+                frame = self.frames.popleft()
+                if isinstance(frame, dict) and frame["type"] == "conversation_updated":
+                    self.updates.pop(frame["conversation_id"], None)
+                try:
+                    payload = frame if isinstance(frame, (str, bytes)) else encode(frame, self.codec)
+                except Exception as e:
+                    # A frame that can't be encoded is dropped, the frames behind it are still sent
+                    logger.error("[ConnectionManager] Dropped a %s frame that could not be encoded: %r", frame.get("type"), e)
+                    self.stats["dropped"] += 1
+                    continue
+                started = time.perf_counter()
+                try:
+                    if isinstance(payload, bytes):
+                        await self.websocket.send_bytes(payload)
+                    else:
+                        await self.websocket.send_text(payload)
+                except Exception as e:
+                    logger.warning("[ConnectionManager] Error while sending message: %r", e)
+                    self.closed = True
+                    self.frames.clear()
+                    self.updates.clear()
+                    break
+                WEBSOCKET_SEND.observe(time.perf_counter() - started)
+                self.stats["sent"] += 1
+                logger.debug("[ConnectionManager] Sent message to %s: %s", self.websocket, frame)
+            self._idle.set()
+
+    async def drain(self):
+        """
+        Wait until every queued frame has been sent.
+        """
+        await self._idle.wait()
+
+    def close(self):
+        """
+        Stop the writer, dropping any frames still queued.
+        """
+        self._writer.cancel()
+        self.frames.clear()
+        self.updates.clear()
+        self._idle.set()
+
 class ConnectionManager:
-    def __init__(self):
+    """
+    Keeps track of the connected websockets and sends frames to them through their outboxes.
+
+    Attributes:
+        input_queues (Dict[WebSocket, asyncio.Queue]): Input queue of each connection.
+        active_connections (List[WebSocket]): The connected websockets.
+        outboxes (Dict[WebSocket, Outbox]): Outbound queue of each connection.
+        max_queue_size (int): Most frames queued per connection.
+        policy (str): What to do when a connection's queue is full, see SLOW_CONSUMER_POLICIES.
+        stats (Dict[str, int]): Totals of closed connections' `sent`, `dropped` and `coalesced`
+            frames, and of `slow_disconnects`.
+    """
+    def __init__(self, max_queue_size: int = SEND_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY):
         # Maps WebSocket to its input queue
         self.input_queues: Dict[WebSocket, asyncio.Queue] = {}
         self.active_connections: List[WebSocket] = []
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0, "slow_disconnects": 0}
 
     async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+        codec, subprotocol = negotiate(getattr(websocket, "scope", {}).get("subprotocols", []))
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
         self.active_connections.append(websocket)
         self.input_queues[websocket] = asyncio.Queue()
-        print(f"[ConnectionManager] WebSocket connected: {websocket}")
+        self.outboxes[websocket] = Outbox(websocket, self.max_queue_size, self.policy, codec)
+        logger.debug("[ConnectionManager] WebSocket connected: %s (codec %s)", websocket, codec)
 
     async def disconnect(self, websocket: WebSocket):
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox is not None:
+            outbox.close()
+            for counter in ("sent", "dropped", "coalesced"):
+                self.stats[counter] += outbox.stats[counter]
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
             del self.input_queues[websocket]
-            print(f"[ConnectionManager] WebSocket disconnected: {websocket}")
+            logger.debug("[ConnectionManager] WebSocket disconnected: %s", websocket)
 
     async def receive_input(self, websocket: WebSocket, input_data: str):
         queue = self.input_queues.get(websocket)
         if queue:
             await queue.put(input_data)
-            print(f"[ConnectionManager] Input enqueued for {websocket}: {input_data}")
+            logger.debug("[ConnectionManager] Input enqueued for %s: %s", websocket, input_data)
         else:
-            print(f"[ConnectionManager] No input queue found for {websocket}")
+            logger.warning("[ConnectionManager] No input queue found for %s", websocket)
+
+    def codec(self, websocket: WebSocket) -> str:
+        """
+        Return the codec a connection negotiated.
+        """
+        outbox = self.outboxes.get(websocket)
+        return outbox.codec if outbox is not None else JSON
+
+    async def send_personal_message(self, message: Union[Frame, Payload], websocket: WebSocket):
+        """
+        Queue a frame for a connection. Frames are encoded in the connection's codec, str and
+        bytes payloads are sent as they are.
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is not None:
+            if outbox.closed:
+                logger.debug("[ConnectionManager] Cannot send message, WebSocket send failed: %s", websocket)
+            elif not outbox.put(message):
+                logger.warning("[ConnectionManager] Disconnecting slow consumer: %s", websocket)
+                self.stats["slow_disconnects"] += 1
+                await self.disconnect(websocket)
+                try:
+                    await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                except Exception as e:
+                    logger.warning("[ConnectionManager] Error while closing slow consumer: %r", e)
+            return
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
         if websocket.application_state == WebSocketState.CONNECTED:
             try:
-                await websocket.send_text(message)
-                print(f"[ConnectionManager] Sent message to {websocket}: {message}")
+                await websocket.send_text(message if isinstance(message, str) else encode(message))
+                logger.debug("[ConnectionManager] Sent message to %s: %s", websocket, message)
             except RuntimeError as e:
-                print(f"RuntimeError while sending message: {e}")
+                logger.warning("[ConnectionManager] RuntimeError while sending message: %s", e)
         else:
-            print(f"[ConnectionManager] Cannot send message, WebSocket state: {websocket.application_state}")
+            logger.debug("[ConnectionManager] Cannot send message, WebSocket state: %s", websocket.application_state)
+
+    async def drain(self, websocket: WebSocket):
+        """
+        Wait until every frame queued for a connection has been sent.
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is not None:
+            await outbox.drain()
+
+    def queue_stats(self) -> Dict[str, int]:
+        """
+        Return the current total `queue_depth` of the connections, the deepest queue
+        (`max_queue_depth`), and the `sent`, `dropped` and `coalesced` frames of all connections so
+        far, as well as the `slow_disconnects`.
+        """
+        outboxes = list(self.outboxes.values())
+        stats = dict(self.stats)
+        for counter in ("sent", "dropped", "coalesced"):
+            stats[counter] += sum(outbox.stats[counter] for outbox in outboxes)
+        stats["queue_depth"] = sum(outbox.depth for outbox in outboxes)
+        stats["max_queue_depth"] = max((outbox.depth for outbox in outboxes), default=0)
+        stats["connections"] = len(outboxes)
+        return stats
+
+manager = ConnectionManager()
 
-manager = ConnectionManager()
\ No newline at end of file
+# Read the outbound queues when the metrics are scraped
+metrics.callback("adam_outbound_queue_depth", "Frames queued for all connections.", lambda: manager.queue_stats()["queue_depth"])
+metrics.callback("adam_outbound_queue_max_depth", "Frames queued for the connection furthest behind.", lambda: manager.queue_stats()["max_queue_depth"])
+metrics.callback("adam_websocket_connections", "Connected websockets.", lambda: len(manager.outboxes))
+metrics.callback(
+    "adam_outbound_frames_total",
+    "Frames sent, dropped or merged into another frame, by outcome.",
+    lambda: {(outcome,): count for outcome, count in manager.queue_stats().items() if outcome in ("sent", "dropped", "coalesced")},
+    ("outcome",),
+    "counter",
+)
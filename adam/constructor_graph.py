@@ -2,21 +2,8 @@
 This module sets up a state graph for a project workflow, defining various nodes and edges that represent 
 different states and transitions in the workflow.
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv(".env")
-
-# Retrieve the project directory path from environment variables
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-
-# Insert the project directory into the system path for module resolution
-sys.path.insert(1, PROJECT_DIRECTORY)
-
 from langgraph.graph import END, StateGraph
-from states import Constructor_State, Meta_State
+from adam.states import Constructor_State, Meta_State
 from adam.nodes.engineer_node import engineer_node
 from adam.nodes.analyser_node import analyser_node
 from adam.nodes.human_node import human_node
@@ -25,6 +12,7 @@ from adam.nodes.builder_node import builder_node
 
 
 from adam.edges.analyser_edge import analyser_edge
+from adam.metrics import timed_node
 
 from adam.nodes.meta_graph_node import meta_graph_node
 
@@ -32,13 +20,14 @@ from adam.nodes.meta_graph_node import meta_graph_node
 # StateGraph: A graph structure that manages states and transitions.
 # State: The base state class used for initializing the graph.
 constructflow = StateGraph(Constructor_State)
-# Add nodes to the graph, each node will house an agent or tool within the graph
-constructflow.add_node("engineer_node", engineer_node)
-constructflow.add_node("analyser_node", analyser_node)
-constructflow.add_node("human_node", human_node)
-constructflow.add_node("subject_node", subject_node)
-constructflow.add_node("builder_node", builder_node)
-constructflow.add_node("meta_graph_node", meta_graph_node)
+# Add nodes to the graph, each node will house an agent or tool within the graph. timed_node records
+# the duration of each node call in the node duration metric (see metrics.py).
+constructflow.add_node("engineer_node", timed_node("constructor", "engineer_node", engineer_node))
+constructflow.add_node("analyser_node", timed_node("constructor", "analyser_node", analyser_node))
+constructflow.add_node("human_node", timed_node("constructor", "human_node", human_node))
+constructflow.add_node("subject_node", timed_node("constructor", "subject_node", subject_node))
+constructflow.add_node("builder_node", timed_node("constructor", "builder_node", builder_node))
+constructflow.add_node("meta_graph_node", timed_node("constructor", "meta_graph_node", meta_graph_node))
 
 # add_conditional_edges: Adds edges to the graph that are conditional based on the outcome of a node.
 # The first argument is the source node, the second is the function that determines the edge to take,
@@ -0,0 +1,131 @@
+"""
+In-process read-through cache of conversations and encoded history frames.
+
+Conversations are read far more often than they change: every meta run re-reads its conversation
+row, and clients ask for the same history pages again whenever they reconnect or switch
+conversations. `ConversationCache` keeps `ConversationModel`s and the JSON frames of history pages
+until the conversation is written to. The Database invalidates a conversation whenever it updates
+the conversation or adds a message to it, and so does the write-behind queue after each flush.
+
+Each conversation has a generation that every invalidation bumps. A reader takes the generation
+before it queries the database and hands it back when it stores the result, so a result read
+before a concurrent write is never cached after that write's invalidation. Entries are evicted
+least recently used first once their estimated size exceeds CONVERSATION_CACHE_BYTES. When the last
+entry of a conversation is evicted its generation is dropped too, so the generations stay as
+bounded as the entries, and the cache's epoch is bumped so no reader matches the restarted count.
+"""
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from adam.settings import settings
+
+DEFAULT_MAX_BYTES = settings.conversation_cache_bytes
+
+# Rough size of an entry's key, bookkeeping and object headers
+ENTRY_OVERHEAD = 200
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory held by a cached value: the length of a str, or the size of a model's fields.
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value) + ENTRY_OVERHEAD
+    return sum(sys.getsizeof(field) for field in vars(value).values()) + ENTRY_OVERHEAD
+
+
+class ConversationCache:
+    """
+    LRU cache of values belonging to conversations, bounded by estimated size.
+
+    Attributes:
+        max_bytes (int): Estimated size the entries may take up together.
+        size (int): Estimated size of the current entries.
+        entries (OrderedDict): Cached values by (conversation_id, key), least recently used first.
+        keys (Dict[int, Set[Hashable]]): Keys of the cached values, by conversation.
+        generations (Dict[int, int]): Invalidations of the conversations with cached values or
+            invalidated since their last eviction.
+        epoch (int): Bumped when generations are dropped, so generations taken before don't match.
+        stats (Dict[str, int]): Counters of `hits`, `misses`, `invalidations` and `evictions`.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[Tuple[int, Hashable], Tuple[Any, int]]" = OrderedDict()
+        self.keys: Dict[int, Set[Hashable]] = {}
+        self.generations: Dict[int, int] = {}
+        self.epoch = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def generation(self, conversation_id: int) -> Tuple[int, int]:
+        """
+        Return the conversation's generation, to be passed to `set` with a value read after this call.
+        """
+        return self.epoch, self.generations.get(conversation_id, 0)
+
+    def get(self, conversation_id: int, key: Hashable) -> Optional[Any]:
+        """
+        Return a cached value, or None on a miss.
+        """
+        entry = self.entries.get((conversation_id, key))
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end((conversation_id, key))
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def set(self, conversation_id: int, key: Hashable, value: Any, generation: Tuple[int, int]):
+        """
+        Cache a value, unless the conversation was invalidated since `generation` was taken.
+
+        Args:
+            conversation_id (int): The conversation the value belongs to.
+            key (Hashable): What the value is, unique within the conversation.
+            value (Any): A str or a pydantic model. Models are cached as given, callers must not modify them.
+            generation (Tuple[int, int]): The conversation's generation from before the value was read.
+        """
+        if generation != self.generation(conversation_id):
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._discard(conversation_id, key)
+        self.entries[(conversation_id, key)] = (value, size)
+        self.keys.setdefault(conversation_id, set()).add(key)
+        self.size += size
+        while self.size > self.max_bytes:
+            (evicted_id, evicted_key), _ = next(iter(self.entries.items()))
+            self._discard(evicted_id, evicted_key)
+            self.stats["evictions"] += 1
+            if evicted_id not in self.keys and self.generations.pop(evicted_id, None) is not None:
+                self.epoch += 1
+
+    def _discard(self, conversation_id: int, key: Hashable):
+        entry = self.entries.pop((conversation_id, key), None)
+        if entry is not None:
+            self.size -= entry[1]
+            keys = self.keys[conversation_id]
+            keys.discard(key)
+            if not keys:
+                del self.keys[conversation_id]
+
+    def invalidate(self, conversation_id: int):
+        """
+        Drop everything cached for a conversation. Called after the conversation is written to.
+        """
+        self.generations[conversation_id] = self.generations.get(conversation_id, 0) + 1
+        for key in list(self.keys.get(conversation_id, ())):
+            self._discard(conversation_id, key)
+        self.stats["invalidations"] += 1
+
+    def clear(self):
+        """
+        Drop every entry, e.g. after all conversations were deleted.
+        """
+        self.epoch += 1
+        self.entries.clear()
+        self.keys.clear()
+        self.generations.clear()
+        self.size = 0
@@ -3,10 +3,18 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select
 from sqlalchemy.orm import sessionmaker, relationship
 from pydantic import BaseModel, Field
-from typing import Optional, List, Tuple
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, delete, update
+from typing import Optional, List, Tuple, Callable
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, LargeBinary, Float, Index, delete, update
 from contextlib import asynccontextmanager
-from sqlalchemy import text, inspect
+from sqlalchemy import text, inspect, event
+import logging
+import time
+
+from adam.conversation_cache import ConversationCache
+from adam.metrics import DB_DURATION, time_methods
+from adam.settings import settings
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
@@ -25,6 +33,11 @@ class Conversation(Base):
         plan (Optional[str]): Plan associated with the conversation.
         messages (relationship): Relationship to associated messages.
         conversation_state (str): State of the conversation, defaults to "first_message".
+        construct_thread_id (Optional[str]): LangGraph thread ID for the conversation's construct runs.
+        meta_thread_id (Optional[str]): LangGraph thread ID for the conversation's meta runs.
+        meta_max_iterations (Optional[int]): Most meta_one/meta_two iterations per meta run.
+        meta_max_tokens (Optional[int]): Most tokens a meta run may spend.
+        meta_time_limit (Optional[float]): Seconds a meta run may take.
     """
     __tablename__ = 'conversations'
     id = Column(Integer, primary_key=True, index=True)
@@ -37,6 +50,11 @@ class Conversation(Base):
     plan = Column(Text, nullable=True)
     messages = relationship("Message", back_populates="conversation")
     conversation_state = Column(String, default="first_message")
+    construct_thread_id = Column(String, nullable=True)
+    meta_thread_id = Column(String, nullable=True)
+    meta_max_iterations = Column(Integer, nullable=True)
+    meta_max_tokens = Column(Integer, nullable=True)
+    meta_time_limit = Column(Float, nullable=True)
 
 class Message(Base):
     """
@@ -59,6 +77,143 @@ class Message(Base):
 
     conversation = relationship("Conversation", back_populates="messages")
 
+    # History reads filter on the conversation and page or order by ID, the last user message
+    # lookup also filters on the sender
+    __table_args__ = (
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+        Index("ix_messages_conversation_id_sender_name_id", "conversation_id", "sender_name", "id"),
+    )
+
+class CheckpointRecord(Base):
+    """
+    SQLAlchemy model for LangGraph checkpoints, written by SQLiteCheckpointSaver.
+
+    Attributes:
+        thread_id (str): LangGraph thread the checkpoint belongs to.
+        checkpoint_ns (str): Checkpoint namespace, empty for the root graph.
+        checkpoint_id (str): ID of the checkpoint. IDs sort in creation order.
+        parent_checkpoint_id (Optional[str]): ID of the previous checkpoint in the thread.
+        checkpoint_type (str): Serializer type tag of `checkpoint`.
+        checkpoint (bytes): The serialized checkpoint.
+        metadata_type (str): Serializer type tag of `checkpoint_metadata`.
+        checkpoint_metadata (bytes): The serialized checkpoint metadata.
+    """
+    __tablename__ = 'checkpoints'
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    parent_checkpoint_id = Column(String, nullable=True)
+    checkpoint_type = Column(String, nullable=False)
+    checkpoint = Column(LargeBinary, nullable=False)
+    metadata_type = Column(String, nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+
+class CheckpointWriteRecord(Base):
+    """
+    SQLAlchemy model for the pending writes of a LangGraph checkpoint.
+
+    Attributes:
+        thread_id (str): LangGraph thread the write belongs to.
+        checkpoint_ns (str): Checkpoint namespace, empty for the root graph.
+        checkpoint_id (str): ID of the checkpoint the write belongs to.
+        task_id (str): ID of the task that produced the write.
+        idx (int): Position of the write within the task.
+        channel (str): Channel written to.
+        value_type (str): Serializer type tag of `value`.
+        value (bytes): The serialized value.
+    """
+    __tablename__ = 'checkpoint_writes'
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    task_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    value_type = Column(String, nullable=False)
+    value = Column(LargeBinary, nullable=False)
+
+class CheckpointThreadRecord(Base):
+    """
+    SQLAlchemy model for bookkeeping on LangGraph threads, used to evict finished threads.
+
+    Attributes:
+        thread_id (str): LangGraph thread ID.
+        updated_at (float): Unix time of the last checkpoint written to the thread.
+        finished_at (Optional[float]): Unix time the thread's run finished, None while it is active
+            or waiting for human input.
+    """
+    __tablename__ = 'checkpoint_threads'
+    thread_id = Column(String, primary_key=True)
+    updated_at = Column(Float, nullable=False)
+    finished_at = Column(Float, nullable=True, index=True)
+
+class LLMResponseRecord(Base):
+    """
+    SQLAlchemy model for cached agent responses, written by ResponseCache.
+
+    Attributes:
+        key (str): Hash of the agent name, prompt template, model, temperature and inputs.
+        agent_name (str): Agent that produced the response.
+        value_type (str): Serializer type tag of `value`.
+        value (bytes): The serialized response.
+        created_at (float): Unix time the response was stored.
+    """
+    __tablename__ = 'llm_responses'
+    key = Column(String, primary_key=True)
+    agent_name = Column(String, nullable=False)
+    value_type = Column(String, nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    created_at = Column(Float, nullable=False, index=True)
+
+class RoutingDecisionRecord(Base):
+    """
+    SQLAlchemy model for routing decisions made by the LLM, used to train the fast-path
+    classifiers.
+
+    Attributes:
+        id (int): Primary key.
+        classifier (str): Agent the decision was made for, e.g. "analyser".
+        text (str): The text that was classified.
+        label (str): The decision.
+        created_at (float): Unix time the decision was made.
+    """
+    __tablename__ = 'routing_decisions'
+    id = Column(Integer, primary_key=True, index=True)
+    classifier = Column(String, nullable=False, index=True)
+    text = Column(Text, nullable=False)
+    label = Column(String, nullable=False)
+    created_at = Column(Float, nullable=False)
+
+class SearchResultRecord(Base):
+    """
+    SQLAlchemy model for cached web search results, written by SearchCache.
+
+    Attributes:
+        key (str): Hash of the normalized query and the search parameters.
+        query (str): The normalized query.
+        results (str): The search response as JSON.
+        created_at (float): Unix time the results were stored.
+    """
+    __tablename__ = 'search_results'
+    key = Column(String, primary_key=True)
+    query = Column(Text, nullable=False)
+    results = Column(Text, nullable=False)
+    created_at = Column(Float, nullable=False, index=True)
+
+class SchemaMigrationRecord(Base):
+    """
+    SQLAlchemy model for the migrations applied to the database, see MIGRATIONS.
+
+    Attributes:
+        version (int): Number of the migration.
+        name (str): Description of the migration.
+        applied_at (float): Unix time the migration was applied.
+    """
+    __tablename__ = 'schema_migrations'
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(Float, nullable=False)
+
 class ConversationModel(BaseModel):
     """
     Pydantic model for conversations.
@@ -73,6 +228,11 @@ class ConversationModel(BaseModel):
         analyser_decision (Optional[str]): Decision made by the analyser.
         plan (Optional[str]): Plan associated with the conversation.
         conversation_state (str): State of the conversation, defaults to "first_message".
+        construct_thread_id (Optional[str]): LangGraph thread ID for the conversation's construct runs.
+        meta_thread_id (Optional[str]): LangGraph thread ID for the conversation's meta runs.
+        meta_max_iterations (Optional[int]): Most meta_one/meta_two iterations per meta run.
+        meta_max_tokens (Optional[int]): Most tokens a meta run may spend.
+        meta_time_limit (Optional[float]): Seconds a meta run may take.
     """
     id: Optional[int] = None
     conversation_name: Optional[str] = None
@@ -83,6 +243,22 @@ class ConversationModel(BaseModel):
     analyser_decision: Optional[str] = None
     plan: Optional[str] = None
     conversation_state: str = Field(default="first_message")
+    construct_thread_id: Optional[str] = None
+    meta_thread_id: Optional[str] = None
+    meta_max_iterations: Optional[int] = None
+    meta_max_tokens: Optional[int] = None
+    meta_time_limit: Optional[float] = None
+
+class ConversationSummaryModel(BaseModel):
+    """
+    Pydantic model for a conversation in the conversation list.
+
+    Attributes:
+        id (int): ID of the conversation.
+        conversation_name (Optional[str]): Name of the conversation.
+    """
+    id: int
+    conversation_name: Optional[str] = None
 
 class MessageModel(BaseModel):
     """
@@ -101,6 +277,83 @@ class MessageModel(BaseModel):
     message: str
     type: str
 
+# Default page sizes of conversation history and the conversation list
+HISTORY_PAGE_SIZE = 50
+CONVERSATION_PAGE_SIZE = 50
+
+# Applied to every new SQLite connection. WAL lets history reads run while graph output is being
+# written, and with WAL synchronous=NORMAL only syncs at checkpoints while staying safe against
+# corruption. The page cache and memory map keep hot history pages in memory.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # KiB, i.e. 64 MB
+    "mmap_size": 268435456,  # 256 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,  # ms
+}
+
+def create_database_engine(db_url: str, **kwargs):
+    """
+    Create an async engine for the database, applying SQLITE_PRAGMAS to every connection of a
+    SQLite database.
+
+    Args:
+        db_url (str): URL for the database connection.
+        **kwargs: Passed on to create_async_engine.
+
+    Returns:
+        AsyncEngine: The engine.
+    """
+    engine = create_async_engine(db_url, **kwargs)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+    return engine
+
+def add_missing_tables_and_columns(conn):
+    """
+    Create the tables the database is missing and add the columns its tables are missing.
+    """
+    Base.metadata.create_all(conn)
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+                logger.info("Added column %s.%s", table.name, column.name)
+
+def add_missing_indexes(conn):
+    """
+    Create the indexes declared on the models that existing tables are missing, and refresh the
+    statistics the query planner uses to pick them.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    conn.execute(text("ANALYZE"))
+
+# Schema migrations, applied in order by Database.migrate and recorded in schema_migrations.
+# Migrations are additive: add new ones to the end and never change one that has shipped.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "create missing tables and columns", add_missing_tables_and_columns),
+    (2, "index messages by conversation", add_missing_indexes),
+]
+
+def construct_thread_id(conversation_id: int) -> str:
+    """Return the LangGraph thread ID used for a conversation's construct runs."""
+    return f"conversation-{conversation_id}-construct"
+
+def meta_thread_id(conversation_id: int) -> str:
+    """Return the LangGraph thread ID used for a conversation's meta runs."""
+    return f"conversation-{conversation_id}-meta"
+
 class Database:
     """
     Handles database operations for conversations and messages.
@@ -108,19 +361,26 @@ class Database:
     This class provides methods for initializing the database, adding and
     retrieving conversations and messages, and other database operations.
 
+    The hot reads (`get_conversation`, `get_conversations` and `get_conversation_messages`) run
+    Core selects and build models straight from the rows with `model_construct`, skipping ORM
+    objects and re-validation of data the database already typed.
+
     Attributes:
         engine: SQLAlchemy async engine.
         SessionLocal: SQLAlchemy sessionmaker for creating database sessions.
+        cache (ConversationCache): Read-through cache of conversations and history frames,
+            invalidated by every write to a conversation.
     """
-    def __init__(self, db_url: str = 'sqlite+aiosqlite:///conversations.db'):
+    def __init__(self, db_url: str = settings.database_url):
         """
         Initialize the Database class.
 
         Args:
             db_url (str): URL for the database connection.
         """
-        self.engine = create_async_engine(db_url)
+        self.engine = create_database_engine(db_url)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine, class_=AsyncSession)
+        self.cache = ConversationCache()
 
     @asynccontextmanager
     async def session(self):
@@ -143,12 +403,46 @@ class Database:
 
     async def init_db(self):
         """
-        Initialize the database by dropping and recreating all tables.
+        Initialize the database by dropping and recreating all tables. This deletes all data, use
+        `migrate` to bring an existing database up to date.
         """
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
             await conn.run_sync(Base.metadata.create_all)
-        print("Database initialized with all tables recreated.")
+        self.cache.clear()
+        logger.info("Database initialized with all tables recreated.")
+
+    async def migrate(self) -> List[int]:
+        """
+        Bring the database up to date with the models without losing data, by applying the
+        MIGRATIONS it hasn't had yet. Each migration runs in its own transaction.
+
+        Returns:
+            List[int]: The versions of the migrations that were applied.
+        """
+        async with self.engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: SchemaMigrationRecord.__table__.create(sync_conn, checkfirst=True))
+            applied = set((await conn.execute(select(SchemaMigrationRecord.version))).scalars())
+
+        newly_applied = []
+        for version, name, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            async with self.engine.begin() as conn:
+                await conn.run_sync(migration)
+                await conn.execute(SchemaMigrationRecord.__table__.insert().values(version=version, name=name, applied_at=time.time()))
+            logger.info("Applied migration %s: %s", version, name)
+            newly_applied.append(version)
+        return newly_applied
+
+    async def optimize(self):
+        """
+        Let SQLite refresh the statistics of tables whose queries would benefit. Meant to be run
+        before the application shuts down.
+        """
+        if self.engine.dialect.name == "sqlite":
+            async with self.engine.begin() as conn:
+                await conn.execute(text("PRAGMA optimize"))
 
     async def add_conversation(self, conversation: ConversationModel) -> int:
         """
@@ -161,9 +455,11 @@ class Database:
             int: The ID of the newly added conversation.
         """
         async with self.session() as session:
-            db_conversation = Conversation(**conversation.dict(exclude={'id'}))
+            db_conversation = Conversation(**conversation.model_dump(exclude={'id'}))
             session.add(db_conversation)
             await session.flush()
+            db_conversation.construct_thread_id = construct_thread_id(db_conversation.id)
+            db_conversation.meta_thread_id = meta_thread_id(db_conversation.id)
             return db_conversation.id
 
     async def update_conversation(self, conversation_id: int, **kwargs):
@@ -184,8 +480,8 @@ class Database:
                 .values(**kwargs)
             )
             result = await session.execute(stmt)
-            await session.commit()
-            return result.rowcount > 0
+        self.cache.invalidate(conversation_id)
+        return result.rowcount > 0
     
     async def add_message(self, message: MessageModel) -> int:
         """
@@ -198,10 +494,12 @@ class Database:
             int: The ID of the newly added message.
         """
         async with self.session() as session:
-            db_message = Message(**message.dict(exclude={'id'}))
+            db_message = Message(**message.model_dump(exclude={'id'}))
             session.add(db_message)
             await session.flush()
-            return db_message.id
+            message_id = db_message.id
+        self.cache.invalidate(message.conversation_id)
+        return message_id
 
     async def get_conversations(self) -> List[ConversationModel]:
         """
@@ -210,10 +508,45 @@ class Database:
         Returns:
             List[ConversationModel]: A list of all conversations.
         """
+        async with self.engine.connect() as conn:
+            result = await conn.execute(select(Conversation.__table__))
+            return [ConversationModel.model_construct(**row) for row in result.mappings()]
+
+    async def get_conversation_summaries(self, before_id: Optional[int] = None, limit: int = CONVERSATION_PAGE_SIZE) -> List[ConversationSummaryModel]:
+        """
+        Retrieve a page of the conversation list, most recent first. Only the listed columns are
+        read, not the prompts.
+
+        Args:
+            before_id (Optional[int]): Cursor, only conversations older than this ID are returned.
+                If None, the page starts at the most recent conversation.
+            limit (int): Most conversations to return.
+
+        Returns:
+            List[ConversationSummaryModel]: The conversations. The ID of the last one is the cursor of
+                the next page.
+        """
         async with self.session() as session:
-            result = await session.execute(select(Conversation))
-            conversations = result.scalars().all()
-            return [ConversationModel(**conversation.__dict__) for conversation in conversations]
+            query = select(Conversation.id, Conversation.conversation_name)
+            if before_id is not None:
+                query = query.where(Conversation.id < before_id)
+            result = await session.execute(query.order_by(Conversation.id.desc()).limit(limit))
+            return [ConversationSummaryModel(id=id, conversation_name=conversation_name) for id, conversation_name in result]
+
+    async def get_message(self, message_id: int) -> Optional[MessageModel]:
+        """
+        Retrieve a message by its ID.
+
+        Args:
+            message_id (int): The ID of the message.
+
+        Returns:
+            Optional[MessageModel]: The message, or None if not found.
+        """
+        async with self.engine.connect() as conn:
+            result = await conn.execute(select(Message.__table__).where(Message.id == message_id))
+            row = result.mappings().one_or_none()
+        return MessageModel.model_construct(**row) if row else None
 
     async def get_messages(self, conversation_id: int) -> List[MessageModel]:
         """
@@ -226,7 +559,7 @@ class Database:
             List[MessageModel]: A list of messages for the specified conversation.
         """
         async with self.session() as session:
-            result = await session.execute(select(Message).where(Message.conversation_id == conversation_id))
+            result = await session.execute(select(Message).where(Message.conversation_id == conversation_id).order_by(Message.id))
             messages = result.scalars().all()
             return [MessageModel(**message.__dict__) for message in messages]
 
@@ -234,11 +567,13 @@ class Database:
         """Delete all conversations from the database."""
         async with self.session() as session:
             await session.execute(delete(Conversation))
+        self.cache.clear()
 
     async def delete_all_messages(self):
         """Delete all messages from the database."""
         async with self.session() as session:
             await session.execute(delete(Message))
+        self.cache.clear()
 
     # TODO: Assess if this is necessary - not currently used
     async def initialize_database(self):
@@ -261,36 +596,57 @@ class Database:
             type="outer"
         )
         await self.add_message(first_message)
-        print(f"Initial conversation and message added to database")
-
-    async def get_conversation_messages(self, conversation_id: int, after_id: Optional[int] = None) -> tuple[List[MessageModel], Optional[str]]:
+        logger.info("Initial conversation and message added to database")
+
+    async def get_conversation_messages(
+        self,
+        conversation_id: int,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> tuple[List[MessageModel], Optional[str]]:
         """
-        Retrieve messages for a specific conversation, optionally after a given message ID.
+        Retrieve messages for a specific conversation, optionally after or before a given message ID.
+
+        Pages are read with keyset pagination on the (conversation_id, id) index, so a page costs
+        the same however long the conversation is.
 
         Args:
             conversation_id (int): The ID of the conversation.
             after_id (Optional[int]): The ID after which to retrieve messages. If None, retrieve all messages.
+            before_id (Optional[int]): The ID before which to retrieve messages.
+            limit (Optional[int]): Most messages to return. Without `after_id` these are the most
+                recent messages (before `before_id`), otherwise the first ones after `after_id`.
 
         Returns:
-            Tuple[List[MessageModel], Optional[str]]: A tuple containing a list of messages matching the criteria and the conversation state.
+            Tuple[List[MessageModel], Optional[str]]: A tuple containing a list of messages matching the criteria, in
+                chronological order, and the conversation state.
         """
-        async with self.session() as session:
-            query = select(Message).where(Message.conversation_id == conversation_id)
+        messages = Message.__table__
+        async with self.engine.connect() as conn:
+            query = select(messages).where(messages.c.conversation_id == conversation_id)
             
             if after_id is not None:
-                query = query.where(Message.id > after_id)
+                query = query.where(messages.c.id > after_id)
+            if before_id is not None:
+                query = query.where(messages.c.id < before_id)
             
-            query = query.order_by(Message.id)
-            
-            result = await session.execute(query)
-            messages = result.scalars().all()
+            if limit is not None and after_id is None:
+                # Read the newest page backwards and return it oldest first
+                result = await conn.execute(query.order_by(messages.c.id.desc()).limit(limit))
+                rows = result.mappings().all()[::-1]
+            else:
+                query = query.order_by(messages.c.id)
+                if limit is not None:
+                    query = query.limit(limit)
+                result = await conn.execute(query)
+                rows = result.mappings().all()
             
             # Fetch conversation state
             state_query = select(Conversation.conversation_state).where(Conversation.id == conversation_id)
-            state_result = await session.execute(state_query)
-            conversation_state = state_result.scalar_one_or_none()
+            conversation_state = (await conn.execute(state_query)).scalar_one_or_none()
             
-            return [MessageModel(**message.__dict__) for message in messages], conversation_state
+            return [MessageModel.model_construct(**row) for row in rows], conversation_state
 
     async def get_latest_conversation_id(self) -> Optional[int]:
         """
@@ -315,14 +671,47 @@ class Database:
             conversation_id (int): The ID of the conversation.
 
         Returns:
-            Optional[ConversationModel]: The conversation, or None if not found.
+            Optional[ConversationModel]: The conversation, or None if not found. Served from the
+                cache when it holds the conversation, so callers get a copy they may modify.
         """
+        cached = self.cache.get(conversation_id, "conversation")
+        if cached is not None:
+            return cached.model_copy()
+        generation = self.cache.generation(conversation_id)
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(Conversation.__table__).where(Conversation.id == conversation_id)
+            )
+            row = result.mappings().one_or_none()
+        if row is None:
+            return None
+        model = ConversationModel.model_construct(**row)
+        self.cache.set(conversation_id, "conversation", model, generation)
+        return model.model_copy()
+
+    async def get_conversation_threads(self, conversation_id: int) -> Tuple[str, str]:
+        """
+        Retrieve the LangGraph thread IDs of a conversation, assigning them if the conversation
+        predates per-conversation threads.
+
+        Args:
+            conversation_id (int): The ID of the conversation.
+
+        Returns:
+            Tuple[str, str]: The construct thread ID and the meta thread ID.
+        """
+        conversation = await self.get_conversation(conversation_id)
+        if conversation and conversation.construct_thread_id and conversation.meta_thread_id:
+            return conversation.construct_thread_id, conversation.meta_thread_id
+        threads = construct_thread_id(conversation_id), meta_thread_id(conversation_id)
         async with self.session() as session:
-            result = await session.execute(
-                select(Conversation).where(Conversation.id == conversation_id)
+            await session.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(construct_thread_id=threads[0], meta_thread_id=threads[1])
             )
-            conversation = result.scalar_one_or_none()
-            return ConversationModel(**conversation.__dict__) if conversation else None
+        self.cache.invalidate(conversation_id)
+        return threads
 
     async def get_last_user_message(self, conversation_id: int) -> Optional[MessageModel]:
         """
@@ -350,7 +739,43 @@ class Database:
         async with self.session() as session:
             await session.execute(delete(Conversation))
             await session.execute(delete(Message))
-        print("All records have been deleted from all tables.")
+        self.cache.clear()
+        logger.info("All records have been deleted from all tables.")
+
+# Record the duration of every Database method call in the database duration metric
+time_methods(Database, DB_DURATION)
+
+def create_database(backend: str = settings.database_backend):
+    """
+    Create the database of a backend.
+
+    Args:
+        backend (str): "sqlite" for `Database`, or "redis" for the `RedisDatabase` of
+            database_redis.py, which needs the optional redis package.
+
+    Returns:
+        Union[Database, RedisDatabase]: The database, connected to DATABASE_URL or REDIS_URL.
+    """
+    if backend == "sqlite":
+        return Database()
+    if backend == "redis":
+        from adam.database_redis import RedisDatabase
+        return RedisDatabase()
+    raise ValueError(f"Unknown DATABASE_BACKEND {backend!r}, expected 'sqlite' or 'redis'")
+
+def require_sqlite(database, component: str) -> Database:
+    """
+    Return `database` for a component that uses the SQLAlchemy sessions and models of the SQLite
+    `Database` directly.
+
+    Raises:
+        RuntimeError: If `database` is another backend, which the component can't run on yet.
+    """
+    if not isinstance(database, Database):
+        raise RuntimeError(
+            f"{component} needs DATABASE_BACKEND=sqlite, it doesn't support {type(database).__name__} yet"
+        )
+    return database
 
-# Create a global instance of the Database class
-db = Database()
+# Create the global database of the DATABASE_BACKEND setting
+db = create_database()
@@ -0,0 +1,412 @@
+"""
+Redis implementation of the conversation and message methods of `database.Database`.
+
+`RedisDatabase` has the same conversation and message methods as `database.Database` and returns
+the same models. DATABASE_BACKEND=redis makes `database.create_database` return it as the global
+`db`. These components use SQLAlchemy sessions and models directly, and raise a RuntimeError
+naming themselves at import when the backend isn't SQLite (see `database.require_sqlite`):
+
+- write_behind.py, which inserts Message rows and updates Conversation rows in bulk.
+- checkpointer.py, the graph checkpoints.
+- agents/response_cache.py, agents/search_cache.py and agents/fast_path.py, the cached responses,
+  search results and routing decisions.
+
+The server uses all of them, so it still needs the SQLite backend to start.
+
+Keys:
+
+    conversation_id, message_id              counters that assign IDs
+    conversations                            sorted set of conversation IDs, scored by ID
+    conversation:{id}                        hash of the conversation's fields
+    conversation:{id}:messages               sorted set of the conversation's message IDs, scored by ID
+    conversation:{id}:last_user_message      JSON of the conversation's latest User message
+    message:{id}                             JSON of the message
+
+Range reads go through the sorted sets, messages are fetched with one MGET and conversations
+with one pipeline, so reads take a fixed number of round trips however long the conversation is.
+The redis package is an optional dependency (`pip install adam[redis]`).
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from adam.conversation_cache import ConversationCache
+from adam.settings import settings
+from adam.database import (
+    ConversationModel,
+    ConversationSummaryModel,
+    MessageModel,
+    CONVERSATION_PAGE_SIZE,
+    construct_thread_id,
+    meta_thread_id,
+)
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = settings.redis_url
+
+class RedisDatabase:
+    """
+    Stores conversations and messages in Redis.
+
+    Attributes:
+        redis (redis.Redis): Async Redis client, decoding responses to str.
+        cache (ConversationCache): Read-through cache of conversations and history frames,
+            invalidated by every write to a conversation.
+    """
+    conversation_id_key = "conversation_id"
+    message_id_key = "message_id"
+    conversation_index_key = "conversations"
+
+    def __init__(self, redis_url: str = REDIS_URL, client: Optional[redis.Redis] = None):
+        """
+        Initialize the RedisDatabase class.
+
+        Args:
+            redis_url (str): URL for the Redis connection.
+            client (Optional[redis.Redis]): Client to use instead of connecting to `redis_url`,
+                it must decode responses.
+        """
+        self.redis = client if client is not None else redis.from_url(redis_url, decode_responses=True)
+        self.cache = ConversationCache()
+
+    @staticmethod
+    def conversation_key(conversation_id: int) -> str:
+        return f"conversation:{conversation_id}"
+
+    @staticmethod
+    def messages_key(conversation_id: int) -> str:
+        return f"conversation:{conversation_id}:messages"
+
+    @staticmethod
+    def last_user_message_key(conversation_id: int) -> str:
+        return f"conversation:{conversation_id}:last_user_message"
+
+    @staticmethod
+    def message_key(message_id: int) -> str:
+        return f"message:{message_id}"
+
+    @staticmethod
+    def _conversation(fields: Dict[str, str]) -> Optional[ConversationModel]:
+        return ConversationModel(**fields) if fields else None
+
+    @staticmethod
+    def _messages(payloads: List[Optional[str]]) -> List[MessageModel]:
+        return [MessageModel(**json.loads(payload)) for payload in payloads if payload is not None]
+
+    async def _get_messages(self, message_ids: List[str]) -> List[MessageModel]:
+        if not message_ids:
+            return []
+        return self._messages(await self.redis.mget([self.message_key(message_id) for message_id in message_ids]))
+
+    async def init_db(self):
+        """
+        Initialize the database by clearing all data.
+        """
+        await self.redis.flushdb()
+        self.cache.clear()
+        logger.info("Database initialized and all data cleared.")
+
+    async def migrate(self) -> List[int]:
+        """
+        Redis has no schema to bring up to date, kept for parity with `Database.migrate`.
+
+        Returns:
+            List[int]: Always empty.
+        """
+        return []
+
+    async def optimize(self):
+        """
+        Nothing to optimize, kept for parity with `Database.optimize`.
+        """
+
+    async def add_conversation(self, conversation: ConversationModel) -> int:
+        """
+        Add a new conversation to the database.
+
+        Args:
+            conversation (ConversationModel): The conversation to add.
+
+        Returns:
+            int: The ID of the newly added conversation.
+        """
+        conversation_id = await self.redis.incr(self.conversation_id_key)
+        fields = {
+            **conversation.model_dump(exclude_none=True),
+            "id": conversation_id,
+            "construct_thread_id": construct_thread_id(conversation_id),
+            "meta_thread_id": meta_thread_id(conversation_id),
+        }
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.conversation_key(conversation_id), mapping=fields)
+            pipe.zadd(self.conversation_index_key, {conversation_id: conversation_id})
+            await pipe.execute()
+        return conversation_id
+
+    async def update_conversation(self, conversation_id: int, **kwargs):
+        """
+        Update any combination of fields for a specific conversation. Fields set to None are removed.
+
+        Args:
+            conversation_id (int): The ID of the conversation to update.
+            **kwargs: Arbitrary keyword arguments representing the fields to update.
+
+        Returns:
+            bool: True if the update was successful, False otherwise.
+        """
+        key = self.conversation_key(conversation_id)
+        if not await self.redis.exists(key):
+            return False
+        values = {field: value for field, value in kwargs.items() if value is not None}
+        cleared = [field for field, value in kwargs.items() if value is None]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if values:
+                pipe.hset(key, mapping=values)
+            if cleared:
+                pipe.hdel(key, *cleared)
+            await pipe.execute()
+        self.cache.invalidate(conversation_id)
+        return True
+
+    async def add_message(self, message: MessageModel) -> int:
+        """
+        Add a new message to the database.
+
+        Args:
+            message (MessageModel): The message to add.
+
+        Returns:
+            int: The ID of the newly added message.
+        """
+        message_id = await self.redis.incr(self.message_id_key)
+        payload = json.dumps({**message.model_dump(), "id": message_id})
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self.message_key(message_id), payload)
+            pipe.zadd(self.messages_key(message.conversation_id), {message_id: message_id})
+            if message.sender_name == "User":
+                pipe.set(self.last_user_message_key(message.conversation_id), payload)
+            await pipe.execute()
+        self.cache.invalidate(message.conversation_id)
+        return message_id
+
+    async def get_conversations(self) -> List[ConversationModel]:
+        """
+        Retrieve all conversations from the database.
+
+        Returns:
+            List[ConversationModel]: A list of all conversations.
+        """
+        conversation_ids = await self.redis.zrange(self.conversation_index_key, 0, -1)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for conversation_id in conversation_ids:
+                pipe.hgetall(self.conversation_key(conversation_id))
+            results = await pipe.execute()
+        return [conversation for conversation in map(self._conversation, results) if conversation]
+
+    async def get_conversation_summaries(self, before_id: Optional[int] = None, limit: int = CONVERSATION_PAGE_SIZE) -> List[ConversationSummaryModel]:
+        """
+        Retrieve a page of the conversation list, most recent first.
+
+        Args:
+            before_id (Optional[int]): Cursor, only conversations older than this ID are returned.
+                If None, the page starts at the most recent conversation.
+            limit (int): Most conversations to return.
+
+        Returns:
+            List[ConversationSummaryModel]: The conversations. The ID of the last one is the cursor of
+                the next page.
+        """
+        maximum = f"({before_id}" if before_id is not None else "+inf"
+        conversation_ids = await self.redis.zrevrangebyscore(self.conversation_index_key, maximum, "-inf", start=0, num=limit)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for conversation_id in conversation_ids:
+                pipe.hget(self.conversation_key(conversation_id), "conversation_name")
+            names = await pipe.execute()
+        return [
+            ConversationSummaryModel(id=conversation_id, conversation_name=name)
+            for conversation_id, name in zip(conversation_ids, names)
+        ]
+
+    async def get_message(self, message_id: int) -> Optional[MessageModel]:
+        """
+        Retrieve a message by its ID.
+
+        Args:
+            message_id (int): The ID of the message.
+
+        Returns:
+            Optional[MessageModel]: The message, or None if not found.
+        """
+        messages = self._messages([await self.redis.get(self.message_key(message_id))])
+        return messages[0] if messages else None
+
+    async def get_messages(self, conversation_id: int) -> List[MessageModel]:
+        """
+        Retrieve all messages for a specific conversation.
+
+        Args:
+            conversation_id (int): The ID of the conversation.
+
+        Returns:
+            List[MessageModel]: A list of messages for the specified conversation.
+        """
+        return await self._get_messages(await self.redis.zrange(self.messages_key(conversation_id), 0, -1))
+
+    async def delete_all_conversations(self):
+        """Delete all conversations from the database."""
+        conversation_ids = await self.redis.zrange(self.conversation_index_key, 0, -1)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for conversation_id in conversation_ids:
+                pipe.delete(self.conversation_key(conversation_id))
+            pipe.delete(self.conversation_index_key)
+            await pipe.execute()
+        self.cache.clear()
+
+    async def delete_all_messages(self):
+        """Delete all messages from the database."""
+        conversation_ids = await self.redis.zrange(self.conversation_index_key, 0, -1)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for conversation_id in conversation_ids:
+                pipe.zrange(self.messages_key(conversation_id), 0, -1)
+            message_ids = await pipe.execute()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for conversation_id, ids in zip(conversation_ids, message_ids):
+                if ids:
+                    pipe.delete(*[self.message_key(message_id) for message_id in ids])
+                pipe.delete(self.messages_key(conversation_id), self.last_user_message_key(conversation_id))
+            await pipe.execute()
+        self.cache.clear()
+
+    # TODO: Assess if this is necessary - not currently used
+    async def initialize_database(self):
+        """
+        Initialize the database with a default conversation and message.
+        """
+        await self.init_db()
+        first_conversation = ConversationModel(
+            subject="Initial Conversation",
+            rewritten_prompt="Welcome to the conversation",
+            meta_prompt_one="This is meta prompt one",
+            meta_prompt_two="This is meta prompt two"
+        )
+        conv_id = await self.add_conversation(first_conversation)
+        first_message = MessageModel(
+            conversation_id=conv_id,
+            sender_name="System",
+            message="Conversation initialized and online.",
+            type="outer"
+        )
+        await self.add_message(first_message)
+        logger.info("Initial conversation and message added to database")
+
+    async def get_conversation_messages(
+        self,
+        conversation_id: int,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> tuple[List[MessageModel], Optional[str]]:
+        """
+        Retrieve messages for a specific conversation, optionally after or before a given message ID.
+
+        Args:
+            conversation_id (int): The ID of the conversation.
+            after_id (Optional[int]): The ID after which to retrieve messages. If None, retrieve all messages.
+            before_id (Optional[int]): The ID before which to retrieve messages.
+            limit (Optional[int]): Most messages to return. Without `after_id` these are the most
+                recent messages (before `before_id`), otherwise the first ones after `after_id`.
+
+        Returns:
+            Tuple[List[MessageModel], Optional[str]]: A tuple containing a list of messages matching the criteria, in
+                chronological order, and the conversation state.
+        """
+        key = self.messages_key(conversation_id)
+        minimum = f"({after_id}" if after_id is not None else "-inf"
+        maximum = f"({before_id}" if before_id is not None else "+inf"
+        if limit is not None and after_id is None:
+            message_ids = (await self.redis.zrevrangebyscore(key, maximum, minimum, start=0, num=limit))[::-1]
+        elif limit is not None:
+            message_ids = await self.redis.zrangebyscore(key, minimum, maximum, start=0, num=limit)
+        else:
+            message_ids = await self.redis.zrangebyscore(key, minimum, maximum)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if message_ids:
+                pipe.mget([self.message_key(message_id) for message_id in message_ids])
+            pipe.hget(self.conversation_key(conversation_id), "conversation_state")
+            results = await pipe.execute()
+        messages = self._messages(results[0]) if message_ids else []
+        return messages, results[-1]
+
+    async def get_latest_conversation_id(self) -> Optional[int]:
+        """
+        Retrieve the ID of the most recently created conversation.
+
+        Returns:
+            Optional[int]: The ID of the most recent conversation, or None if no conversations exist.
+        """
+        conversation_ids = await self.redis.zrevrange(self.conversation_index_key, 0, 0)
+        return int(conversation_ids[0]) if conversation_ids else None
+
+    async def get_conversation(self, conversation_id: int) -> Optional[ConversationModel]:
+        """
+        Retrieve a conversation by its ID.
+
+        Args:
+            conversation_id (int): The ID of the conversation.
+
+        Returns:
+            Optional[ConversationModel]: The conversation, or None if not found. Served from the
+                cache when it holds the conversation, so callers get a copy they may modify.
+        """
+        cached = self.cache.get(conversation_id, "conversation")
+        if cached is not None:
+            return cached.model_copy()
+        generation = self.cache.generation(conversation_id)
+        conversation = self._conversation(await self.redis.hgetall(self.conversation_key(conversation_id)))
+        if conversation is None:
+            return None
+        self.cache.set(conversation_id, "conversation", conversation, generation)
+        return conversation.model_copy()
+
+    async def get_conversation_threads(self, conversation_id: int) -> Tuple[str, str]:
+        """
+        Retrieve the LangGraph thread IDs of a conversation, assigning them if they are missing.
+
+        Args:
+            conversation_id (int): The ID of the conversation.
+
+        Returns:
+            Tuple[str, str]: The construct thread ID and the meta thread ID.
+        """
+        key = self.conversation_key(conversation_id)
+        threads = await self.redis.hmget(key, "construct_thread_id", "meta_thread_id")
+        if threads[0] and threads[1]:
+            return threads[0], threads[1]
+        threads = construct_thread_id(conversation_id), meta_thread_id(conversation_id)
+        if await self.redis.exists(key):
+            await self.redis.hset(key, mapping={"construct_thread_id": threads[0], "meta_thread_id": threads[1]})
+            self.cache.invalidate(conversation_id)
+        return threads
+
+    async def get_last_user_message(self, conversation_id: int) -> Optional[MessageModel]:
+        """
+        Retrieve the last user message for a specific conversation.
+
+        Args:
+            conversation_id (int): The ID of the conversation.
+
+        Returns:
+            Optional[MessageModel]: The last user message, or None if no user messages exist.
+        """
+        messages = self._messages([await self.redis.get(self.last_user_message_key(conversation_id))])
+        return messages[0] if messages else None
+
+    async def delete_all_records(self):
+        """Delete all conversations and messages from the database."""
+        await self.delete_all_messages()
+        await self.delete_all_conversations()
+        logger.info("All records have been deleted from all tables.")
@@ -0,0 +1,10 @@
+from adam.meta_budget import budget_exhausted, is_complete
+
+def meta_two_edge(state):
+
+    # meta_two replying COMPLETE ends the run, as does a spent budget: the supervisor could only
+    # decide to stop, so don't pay for the call
+    if is_complete(state["meta_messages"][-1].content) or budget_exhausted(state):
+        return "Stop"
+
+    return "Continue"
@@ -1,5 +1,11 @@
+from adam.meta_budget import budget_exhausted
+
 def supervisor_edge(state):
     
     meta_supervisor_decision = state["meta_supervisor_decision"]
 
+    # Don't start another iteration once the run's budget is spent
+    if meta_supervisor_decision == "Continue" and budget_exhausted(state):
+        return "Stop"
+
     return meta_supervisor_decision        
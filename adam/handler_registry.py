@@ -0,0 +1,133 @@
+"""
+Registry of the websocket message handlers, keyed on message type.
+
+The receive loop used to handle each message to completion before reading the next, and awaited
+whole construct and meta runs inline, so a socket running a meta graph could not serve anything
+else for minutes. `HandlerRegistry.dispatch` instead runs each handler one of two ways:
+
+- ordered handlers (writes, and the quick start of a graph run) are awaited in the receive loop,
+  so the writes of one socket are applied in the order the client sent them.
+- concurrent handlers (read-only requests) run as tasks, so they are served while earlier
+  requests are still in progress.
+
+Long graph runs are handed to `spawn` by their ordered handler and run as tasks too. Every task is
+tracked by the handler it belongs to, and a handler that raises reports the error to its client
+with an `error` frame instead of ending the receive loop. Handlers, and the tasks they start, log
+with the `conversation_id` of their message.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from adam.codec import ErrorFrame
+from adam.connection_manager import manager
+from adam.runtime_profile import log_context
+
+logger = logging.getLogger(__name__)
+
+HandlerFunction = Callable[[WebSocket, Dict[str, Any], str], Awaitable[None]]
+
+class Handler:
+    """
+    A handler of one message type.
+
+    Attributes:
+        message_type (str): Type of the messages it handles.
+        func (HandlerFunction): Coroutine function called with the websocket, the decoded message
+            and the raw message.
+        concurrent (bool): Whether it runs as a task rather than in the receive loop.
+        tasks (Set[asyncio.Task]): Its tasks still in flight.
+        stats (Dict[str, int]): Counters of `handled` messages, `spawned` tasks and `failed` ones.
+    """
+    def __init__(self, message_type: str, func: HandlerFunction, concurrent: bool):
+        self.message_type = message_type
+        self.func = func
+        self.concurrent = concurrent
+        self.tasks: Set[asyncio.Task] = set()
+        self.stats = {"handled": 0, "spawned": 0, "failed": 0}
+
+    async def run(self, websocket: WebSocket, coroutine: Awaitable[None]):
+        """
+        Await a coroutine of this handler, reporting an error to the client if it raises.
+        """
+        try:
+            await coroutine
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.exception("[WebSocket] %s failed: %r", self.message_type, e)
+            await manager.send_personal_message(ErrorFrame(
+                type="error",
+                request_type=self.message_type,
+                message=str(e) or type(e).__name__
+            ), websocket)
+
+    def spawn(self, websocket: WebSocket, coroutine: Awaitable[None]) -> asyncio.Task:
+        """
+        Run a coroutine of this handler as a tracked task.
+        """
+        task = asyncio.create_task(self.run(websocket, coroutine))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        self.stats["spawned"] += 1
+        return task
+
+class HandlerRegistry:
+    """
+    Dispatches websocket messages to the handler registered for their type.
+
+    Attributes:
+        handlers (Dict[str, Handler]): Handlers keyed by message type.
+    """
+    def __init__(self):
+        self.handlers: Dict[str, Handler] = {}
+
+    def register(self, message_type: str, concurrent: bool = False):
+        """
+        Decorator registering a handler for a message type.
+
+        Args:
+            message_type (str): The `type` of the messages it handles.
+            concurrent (bool): Run it as a task, for read-only requests. Ordered handlers are
+                awaited in the receive loop.
+        """
+        def decorator(func: HandlerFunction) -> HandlerFunction:
+            self.handlers[message_type] = Handler(message_type, func, concurrent)
+            return func
+        return decorator
+
+    def __getitem__(self, message_type: str) -> Handler:
+        return self.handlers[message_type]
+
+    async def dispatch(self, websocket: WebSocket, json_message: Dict[str, Any], data: str) -> Optional[asyncio.Task]:
+        """
+        Handle a message with the handler registered for its type.
+
+        Returns:
+            Optional[asyncio.Task]: The task of a concurrent handler, None otherwise.
+        """
+        handler = self.handlers.get(json_message.get("type"))
+        if handler is None:
+            logger.warning("[WebSocket] Unhandled message type: %s", json_message.get("type"))
+            return None
+        with log_context(json_message.get("conversation_id")):
+            logger.debug("[WebSocket] Handling %s", handler.message_type)
+            handler.stats["handled"] += 1
+            if handler.concurrent:
+                return handler.spawn(websocket, handler.func(websocket, json_message, data))
+            await handler.run(websocket, handler.func(websocket, json_message, data))
+        return None
+
+    def in_flight(self) -> Dict[str, int]:
+        """
+        Return the number of tasks in flight per message type.
+        """
+        return {message_type: len(handler.tasks) for message_type, handler in self.handlers.items() if handler.tasks}
+
+    async def drain(self):
+        """
+        Wait for every task in flight, including tasks they spawn while this waits.
+        """
+        while tasks := [task for handler in self.handlers.values() for task in handler.tasks]:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -2,28 +2,30 @@ import sys
 import os
 import asyncio
 import logging
-import subprocess
-import requests
-from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-# Add the project root to the Python path
+# Add the project root to the Python path, so `python adam/main.py` can import the adam package
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-load_dotenv(override=True)
+from adam.runtime_profile import configure_logging, select_profile
 
-from adam.server import db, router, manager, handle_user_input
-import tracemalloc
+# `--profile` is only read when this file is run as a script, the app uvicorn imports uses ADAM_PROFILE
+profile = select_profile(sys.argv[1:] if __name__ == "__main__" else [])
+configure_logging(profile)
+logger = logging.getLogger(__name__)
 
-tracemalloc.start()
+if profile.tracemalloc:
+    import tracemalloc
+    tracemalloc.start()
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-# Suppress aiosqlite debug logs
-logging.getLogger("aiosqlite").setLevel(logging.WARNING)
-logging.getLogger("langchain").setLevel(logging.WARNING)
+from adam.server import db, router, manager, handle_user_input
+from adam.agents.registry import agent_registry
+from adam.agents import providers
+from adam.write_behind import write_behind
+from adam.metrics import CONTENT_TYPE, metrics
+from adam.settings import settings
 
 app = FastAPI()
 
@@ -40,9 +42,24 @@ app.include_router(router, prefix="/server") # may need to add a prefix i.e. "/t
 @app.on_event("startup")
 async def startup_event():
     # This function will run when the FastAPI application starts
-    loop = asyncio.get_running_loop()
-    loop.set_debug(True)
-    print("FastAPI application is starting up...")
+    if profile.loop_debug:
+        asyncio.get_running_loop().set_debug(True)
+    logger.info("FastAPI application is starting up with the %s profile", profile.name)
+
+    # Apply the schema migrations the database hasn't had yet
+    await db.migrate()
+
+    # Build every agent chain once so requests reuse them. This runs in the background, the
+    # provider packages alone take seconds to import.
+    if settings.warm_agents:
+        app.state.warm_agents = asyncio.create_task(agent_registry.warm())
+
+    # Drop cached agent responses that have outlived their TTL, unless the cache is disabled
+    if agent_registry.response_cache is not None:
+        await agent_registry.response_cache.aevict()
+
+    # Train the routing fast paths on the decisions the LLM made so far
+    await agent_registry.train_fast_paths()
     
     # You can add any other startup tasks here
     # For example:
@@ -50,10 +67,34 @@ async def startup_event():
     # task2 = asyncio.create_task(another_async_function())
     # await asyncio.gather(task1, task2)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    warm_agents = getattr(app.state, "warm_agents", None)
+    if warm_agents is not None and not warm_agents.done():
+        warm_agents.cancel()
+
+    # Commit the graph output and routing decisions that are still queued
+    await write_behind.aclose()
+    await agent_registry.drain_fast_paths()
+    await db.optimize()
+
+    # Close the pooled provider HTTP clients
+    await providers.aclose()
+
+    # Report how often the routing decisions skipped the LLM
+    for report in agent_registry.fast_path_report().values():
+        logger.info("[FastPath] %s", report)
+
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    # Prometheus scrapes this, see metrics.py for what is collected
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
 if __name__ == '__main__':
     import uvicorn
-    uvicorn.run("adam.main:app", host="0.0.0.0", port=8080, reload=True)
+    # The reloader needs an import string, and its worker reads the profile from ADAM_PROFILE again
+    uvicorn.run("adam.main:app" if profile.reload else app, host="0.0.0.0", port=8080, reload=profile.reload, log_config=None)
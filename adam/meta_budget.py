@@ -0,0 +1,78 @@
+"""
+Budgets for the meta team's loop.
+
+Every meta run is bounded by a maximum number of meta_one/meta_two iterations, a maximum number of
+tokens and a deadline. The limits are set per conversation (see the `meta_max_*` columns of
+Conversation) and default to the META_MAX_ITERATIONS, META_MAX_TOKENS and META_TIME_LIMIT
+environment variables. The edges out of meta_node_two and meta_node_supervisor end the run once
+a budget is spent, or as soon as meta_two replies with its COMPLETE sentinel.
+
+Tokens are estimated at four characters per token over everything sent to and returned by each
+call. The Cohere chains end in output parsers that drop the provider's usage data, and the estimate
+is close enough to bound a runaway loop.
+"""
+import re
+import time
+from typing import Iterable, Optional
+
+from langchain_core.messages import BaseMessage
+
+from adam.settings import settings
+
+DEFAULT_MAX_ITERATIONS = settings.meta_max_iterations
+DEFAULT_MAX_TOKENS = settings.meta_max_tokens
+DEFAULT_TIME_LIMIT = settings.meta_time_limit
+
+CHARACTERS_PER_TOKEN = 4
+
+# meta_two's prompt asks it to return only "COMPLETE" when the work is of good quality
+COMPLETE_PATTERN = re.compile(r"^\W*complete\W*$", re.IGNORECASE)
+
+
+def meta_budget(max_iterations: Optional[int] = None, max_tokens: Optional[int] = None, time_limit: Optional[float] = None) -> dict:
+    """
+    Return the budget fields of the initial Meta_State for a run starting now.
+
+    Args:
+        max_iterations (Optional[int]): Most iterations, defaults to DEFAULT_MAX_ITERATIONS.
+        max_tokens (Optional[int]): Most tokens, defaults to DEFAULT_MAX_TOKENS.
+        time_limit (Optional[float]): Seconds the run may take, defaults to DEFAULT_TIME_LIMIT.
+
+    Returns:
+        dict: The budget and the counters of the run.
+    """
+    return {
+        "max_iterations": max_iterations or DEFAULT_MAX_ITERATIONS,
+        "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+        "deadline": time.time() + (time_limit or DEFAULT_TIME_LIMIT),
+        "iterations": 0,
+        "tokens_used": 0,
+    }
+
+
+def estimate_tokens(messages: Iterable[BaseMessage], *texts: str) -> int:
+    """
+    Estimate the tokens of a call from the messages it was sent and any other text in or out.
+    """
+    characters = sum(len(str(message.content)) for message in messages) + sum(len(text) for text in texts)
+    return characters // CHARACTERS_PER_TOKEN
+
+
+def budget_exhausted(meta_state) -> Optional[str]:
+    """
+    Return why the run may not start another iteration, or None if the budget allows it.
+    """
+    if meta_state.get("iterations", 0) >= meta_state.get("max_iterations", DEFAULT_MAX_ITERATIONS):
+        return "iterations"
+    if meta_state.get("tokens_used", 0) >= meta_state.get("max_tokens", DEFAULT_MAX_TOKENS):
+        return "tokens"
+    if meta_state.get("deadline") is not None and time.time() >= meta_state["deadline"]:
+        return "deadline"
+    return None
+
+
+def is_complete(response: str) -> bool:
+    """
+    Return whether meta_two replied with the COMPLETE sentinel.
+    """
+    return bool(COMPLETE_PATTERN.match(response))
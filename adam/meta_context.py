@@ -0,0 +1,94 @@
+"""
+Rolling compaction of the meta team's context.
+
+`meta_messages` keeps every turn of a meta run: the prompt, the search results, every draft and
+critique and the supervisor's placeholders. Sending all of it to meta_one, meta_two and the
+supervisor makes each iteration slower and more expensive than the last, so the meta nodes send a
+compacted copy instead. The state itself is left untouched.
+
+The compacted context always keeps the original prompt, the latest meta_one draft and the latest
+meta_two critique verbatim, and drops the supervisor's placeholders. Older turns are kept verbatim
+while they fit in the token budget (META_CONTEXT_TOKENS), newest first, then cut down to their
+opening sentences, and dropped once even that doesn't fit.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from adam.meta_budget import estimate_tokens, CHARACTERS_PER_TOKEN
+from adam.settings import settings
+
+DEFAULT_CONTEXT_TOKENS = settings.meta_context_tokens
+
+# Longest summary of an older turn
+SUMMARY_TOKENS = 60
+
+# Turns that only mark progress and carry nothing the agents need
+PLACEHOLDER_SENDERS = ("meta_supervisor",)
+
+
+def summarize_turn(message: BaseMessage, max_tokens: int = SUMMARY_TOKENS) -> BaseMessage:
+    """
+    Cut a turn down to its opening sentences.
+    """
+    max_characters = max_tokens * CHARACTERS_PER_TOKEN
+    summary = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", str(message.content).strip()):
+        if summary and len(summary) + len(sentence) + 1 > max_characters:
+            break
+        summary = f"{summary} {sentence}".strip()
+    summary = summary[:max_characters]
+    return HumanMessage(content=f"[Earlier {message.name}, shortened] {summary}", name=message.name)
+
+
+def compact_meta_messages(meta_messages: Sequence[BaseMessage], max_tokens: int = DEFAULT_CONTEXT_TOKENS) -> List[BaseMessage]:
+    """
+    Return the context to send to a meta agent.
+
+    Args:
+        meta_messages (Sequence[BaseMessage]): The full meta conversation.
+        max_tokens (int): Token budget of the context. The prompt and the latest draft and
+            critique are always kept, even if they alone exceed it.
+
+    Returns:
+        List[BaseMessage]: The compacted context, in conversation order.
+    """
+    turns = [(index, message) for index, message in enumerate(meta_messages) if message.name not in PLACEHOLDER_SENDERS]
+    keep = {turns[0][0]} if turns else set()
+    for sender in ("meta_one", "meta_two"):
+        latest = [index for index, message in turns if message.name == sender]
+        if latest:
+            keep.add(latest[-1])
+
+    compacted = {index: meta_messages[index] for index in keep}
+    remaining = max_tokens - estimate_tokens(compacted.values())
+    for index, message in reversed(turns):
+        if index in keep:
+            continue
+        for candidate in (message, summarize_turn(message)):
+            tokens = estimate_tokens([candidate])
+            if tokens <= remaining:
+                compacted[index] = candidate
+                remaining -= tokens
+                break
+
+    return [compacted[index] for index in sorted(compacted)]
+
+
+def compact_context(meta_state, max_tokens: Optional[int] = None) -> Tuple[List[BaseMessage], int]:
+    """
+    Compact a meta state's messages and record the tokens saved in `context_tokens_saved`.
+
+    Args:
+        meta_state (Meta_State): State of the meta run.
+        max_tokens (Optional[int]): Token budget of the context, defaults to DEFAULT_CONTEXT_TOKENS.
+
+    Returns:
+        Tuple[List[BaseMessage], int]: The compacted context and the tokens it saved.
+    """
+    meta_messages = meta_state["meta_messages"]
+    context = compact_meta_messages(meta_messages, max_tokens or DEFAULT_CONTEXT_TOKENS)
+    saved = estimate_tokens(meta_messages) - estimate_tokens(context)
+    meta_state["context_tokens_saved"] = meta_state.get("context_tokens_saved", 0) + saved
+    return context, saved
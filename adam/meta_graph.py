@@ -1,44 +1,56 @@
 """
 Meta Graph
 """
-import sys
-import os
-from dotenv import load_dotenv
+from functools import lru_cache
 from langgraph.checkpoint.memory import MemorySaver
 
-# Load environment variables from .env file
-load_dotenv(".env")
-
-# Retrieve the project directory path from environment variables
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-
-# Insert the project directory into the system path for module resolution
-sys.path.insert(1, PROJECT_DIRECTORY)
-
 from langchain_core.messages import HumanMessage
 from langgraph.graph import END, StateGraph
-from states import Meta_State
-from nodes.meta_node_one import meta_node_one
-from nodes.meta_node_two import meta_node_two
-from nodes.meta_node_supervisor import meta_node_supervisor
-from nodes.meta_node_search import meta_node_search
-from edges.supervisor_edge import supervisor_edge
-
-def build_metaflow(plan):
+from adam.states import Meta_State
+from adam.nodes.meta_node_one import meta_node_one
+from adam.nodes.meta_node_two import meta_node_two
+from adam.nodes.meta_node_supervisor import meta_node_supervisor
+from adam.nodes.meta_node_search import meta_node_search
+from adam.edges.supervisor_edge import supervisor_edge
+from adam.edges.meta_two_edge import meta_two_edge
+from adam.metrics import timed_node
+
+@lru_cache(maxsize=None)
+def compile_metaflow():
+    """
+    Build and compile the meta graph. Every plan runs the same topology, starting with a web
+    search, so the result is cached and the graph is only compiled once per process. The compiled
+    graph has no checkpointer, see build_metaflow.
+
+    The meta_one -> meta_two -> supervisor loop runs until the supervisor decides to stop, meta_two
+    replies COMPLETE or the run's budget is spent (see meta_budget.py).
+    """
     metaflow = StateGraph(Meta_State)
 
-    metaflow.add_node("meta_node_one", meta_node_one)
-    metaflow.add_node("meta_node_two", meta_node_two)
-    metaflow.add_node("meta_node_supervisor", meta_node_supervisor)
-    metaflow.add_node("meta_node_search", meta_node_search)
+    metaflow.add_node("meta_node_one", timed_node("meta", "meta_node_one", meta_node_one))
+    metaflow.add_node("meta_node_two", timed_node("meta", "meta_node_two", meta_node_two))
+    metaflow.add_node("meta_node_supervisor", timed_node("meta", "meta_node_supervisor", meta_node_supervisor))
+    metaflow.add_node("meta_node_search", timed_node("meta", "meta_node_search", meta_node_search))
 
     metaflow.add_edge("meta_node_search", "meta_node_one")
     metaflow.add_edge("meta_node_one", "meta_node_two")
-    metaflow.add_edge("meta_node_two", "meta_node_supervisor")
     metaflow.set_entry_point("meta_node_search")
     
+    metaflow.add_conditional_edges("meta_node_two", meta_two_edge, {"Continue": "meta_node_supervisor", "Stop": END})
     metaflow.add_conditional_edges("meta_node_supervisor", supervisor_edge, {"Continue": "meta_node_one", "Stop": END})
 
-    meta_memory = MemorySaver()
-    
-    return metaflow.compile(checkpointer=meta_memory, interrupt_after=["meta_node_supervisor"])
\ No newline at end of file
+    return metaflow.compile()
+
+def build_metaflow(checkpointer=None):
+    """
+    Return the meta graph bound to a checkpointer.
+
+    Args:
+        checkpointer (Optional[BaseCheckpointSaver]): Checkpointer for the run. Defaults to a new
+            MemorySaver so every run starts from an empty state.
+
+    Returns:
+        CompiledStateGraph: A shallow copy of the cached compiled graph with the checkpointer attached.
+    """
+    compiled = compile_metaflow()
+    return compiled.copy({"checkpointer": checkpointer or MemorySaver(), "auto_validate": False})
@@ -0,0 +1,217 @@
+"""
+Process metrics, served in the Prometheus text format at /metrics (see main.py).
+
+Nothing showed where the time of a run went. The hot paths now record into histograms:
+
+- adam_node_duration_seconds: each graph node call, by graph and node (`timed_node`).
+- adam_llm_latency_seconds and adam_llm_tokens: each chat model call and its input and output
+  tokens, by agent (see agents/llm_metrics.py).
+- adam_db_duration_seconds: each Database method call, by method (`time_methods`).
+- adam_websocket_send_seconds: each frame a connection's writer sends.
+
+Gauges whose values already live elsewhere, such as the depth of the outbound queues and the
+conversations with a graph run in progress, are `CallbackMetric`s that read them when scraped.
+
+Recording an observation is a dict lookup, a bisect and two additions on the event loop thread, so
+collection is cheap enough to leave on in production. The exposition format is small enough that
+this module writes it itself rather than depending on prometheus_client.
+"""
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+# Upper bounds of the latency buckets in seconds, from a fast query to a slow meta iteration
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labelnames: Sequence[str], labels: Sequence[str], **extra: str) -> str:
+    pairs = [*zip(labelnames, labels), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Histogram:
+    """
+    A Prometheus histogram, with one series per combination of label values.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (Tuple[str, ...]): Names of its labels.
+        buckets (Tuple[float, ...]): Upper bounds of its buckets, ascending.
+    """
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per series: the count of each bucket (not cumulative, the last one is +Inf), sum, count
+        self.series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str):
+        """
+        Record a value in the series of `labels`, given in the order of `labelnames`.
+        """
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """
+        Context manager recording the seconds its block took, also when it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in list(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, le=format_value(bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    A gauge or counter whose value is read from elsewhere when the metrics are scraped.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text.
+        collect (Callable): Returns the value, or a dict of values keyed by label values for a
+            metric with labels.
+        labelnames (Tuple[str, ...]): Names of its labels.
+        metric_type (str): "gauge" or "counter".
+    """
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Union[float, Dict[Tuple[str, ...], float]]],
+        labelnames: Sequence[str] = (),
+        metric_type: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.labelnames = tuple(labelnames)
+        self.metric_type = metric_type
+
+    def render(self) -> List[str]:
+        values = self.collect()
+        if not self.labelnames:
+            values = {(): values}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}" for labels, value in values.items())
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics served at /metrics.
+
+    Attributes:
+        metrics (Dict[str, Union[Histogram, CallbackMetric]]): Metrics keyed by name.
+    """
+    def __init__(self):
+        self.metrics: Dict[str, Union[Histogram, CallbackMetric]] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """
+        Register a histogram and return it.
+        """
+        return self.metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, collect: Callable, labelnames: Sequence[str] = (), metric_type: str = "gauge") -> CallbackMetric:
+        """
+        Register a gauge or counter read by `collect` at scrape time, replacing any of the same name.
+        """
+        self.metrics[name] = CallbackMetric(name, documentation, collect, labelnames, metric_type)
+        return self.metrics[name]
+
+    def render(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        return "".join(line + "\n" for metric in list(self.metrics.values()) for line in metric.render())
+
+
+# Create a global instance of the MetricsRegistry class
+metrics = MetricsRegistry()
+
+NODE_DURATION = metrics.histogram("adam_node_duration_seconds", "Duration of graph node calls.", ("graph", "node"))
+LLM_LATENCY = metrics.histogram("adam_llm_latency_seconds", "Duration of chat model calls.", ("agent",))
+LLM_TOKENS = metrics.histogram("adam_llm_tokens", "Tokens sent to and returned by chat model calls.", ("agent", "direction"), TOKEN_BUCKETS)
+DB_DURATION = metrics.histogram("adam_db_duration_seconds", "Duration of Database method calls.", ("method",))
+WEBSOCKET_SEND = metrics.histogram("adam_websocket_send_seconds", "Duration of websocket frame sends.")
+
+
+def timed_node(graph: str, node: str, func: Callable) -> Callable:
+    """
+    Wrap an async graph node so its calls are recorded in adam_node_duration_seconds.
+
+    Args:
+        graph (str): Name of the graph, e.g. "constructor" or "meta".
+        node (str): Name of the node in the graph.
+        func (Callable): The node's coroutine function.
+
+    Returns:
+        Callable: The wrapped node, with the signature of `func`.
+    """
+    @functools.wraps(func)
+    async def node_wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            NODE_DURATION.observe(time.perf_counter() - started, graph, node)
+    return node_wrapper
+
+
+def time_methods(cls: type, histogram: Histogram = DB_DURATION) -> type:
+    """
+    Wrap the public coroutine methods of a class so their calls are recorded in `histogram`,
+    labelled with the method name.
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+
+        def bind(name, method):
+            @functools.wraps(method)
+            async def method_wrapper(*args, **kwargs):
+                # Timed inline rather than with Histogram.time, whose generator costs a few µs per call
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, name)
+            return method_wrapper
+
+        setattr(cls, name, bind(name, method))
+    return cls
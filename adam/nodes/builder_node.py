@@ -1,49 +1,66 @@
 """
 Builder Node
 """
-import sys
-import os
-from dotenv import load_dotenv
+import logging
+import asyncio
 from langchain_core.messages import HumanMessage
 
-# Load environment variables from .env file
-load_dotenv(".env")
+from adam.agents.agent_builder import META_AGENT_PROMPTS
+from adam.agents.registry import agent_registry
+from adam.states import Constructor_State
 
-# Retrieve the project directory path from environment variables
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
+logger = logging.getLogger(__name__)
 
-# Insert the project directory into the system path for module resolution
-sys.path.insert(1, PROJECT_DIRECTORY)
+def check_meta_prompt_fields(agent_types, state_schema=Constructor_State):
+    """
+    Raise a RuntimeError unless the state declares a meta_prompt_<type> field for every agent type.
+    LangGraph drops the keys a node returns that its state doesn't declare, so builder_node would
+    silently lose the prompts of any meta agent added to META_AGENT_PROMPTS without its field.
+    """
+    undeclared = [f"meta_prompt_{agent_type}" for agent_type in agent_types if f"meta_prompt_{agent_type}" not in state_schema.__annotations__]
+    if undeclared:
+        raise RuntimeError(
+            f"{state_schema.__name__} does not declare {', '.join(undeclared)}: "
+            "add a field for every meta agent in META_AGENT_PROMPTS"
+        )
 
-from agents.agent_builder import agent_builder
-from agents.planner import planner
+check_meta_prompt_fields(META_AGENT_PROMPTS)
 
-async def builder_node(state):
+async def build_meta_prompt(state, agent_type):
     """
+    Generate the system prompt for a single meta agent.
     """
-    print("###Builder Node###\n")
+    builder_chain = await agent_registry.get("builder", agent_type)
+    meta_prompt = await builder_chain.ainvoke({"subject": [state["subject"]]})
+    logger.debug("meta prompt %s: %s", agent_type, meta_prompt)
+    return meta_prompt
 
-    subject = state["subject"]
-    rewritten_prompt = state["rewritten_prompt"]
+async def plan_meta_flow(state):
+    """
+    Decide which meta sub-flow to use for the rewritten prompt.
+    """
+    planner_chain = await agent_registry.get("planner")
+    plan = await planner_chain.ainvoke({"rewritten_prompt": [state["rewritten_prompt"]]})
+    logger.debug("plan: %s", plan)
+    return plan
 
-    builder_chain_one = await agent_builder(state, "one")
-    builder_chain_two = await agent_builder(state, "two")
-    planner_chain = await planner(state)
+async def builder_node(state):
+    """
+    Build the meta team: one system prompt per meta agent plus the plan. The LLM calls are
+    independent of each other, so they are fanned out concurrently and gathered back into the state.
+    """
+    logger.debug("Builder node")
 
-    meta_prompt_one = builder_chain_one.invoke({"subject": [subject]})
-    print(f"meta prompt one: {meta_prompt_one}\n")
+    agent_types = list(META_AGENT_PROMPTS)
 
-    meta_prompt_two = builder_chain_two.invoke({"subject": [subject]})
-    print(f"meta prompt two: {meta_prompt_two}\n")
-    
-    plan = planner_chain.invoke({"rewritten_prompt": [rewritten_prompt]})
-    print(f"plan: {plan}\n")
-    
-    complexity = plan.complexity
+    *meta_prompts, plan = await asyncio.gather(
+        *(build_meta_prompt(state, agent_type) for agent_type in agent_types),
+        plan_meta_flow(state),
+    )
 
-    state["meta_prompt_one"] = meta_prompt_one
-    state["meta_prompt_two"] = meta_prompt_two
-    state["plan"] = complexity
+    for agent_type, meta_prompt in zip(agent_types, meta_prompts):
+        state[f"meta_prompt_{agent_type}"] = meta_prompt
+    state["plan"] = plan.complexity
     builder_message = HumanMessage(content="Building Meta-Agents...", name="Builder")
     state["messages"].append(builder_message)
 
@@ -2,22 +2,12 @@
 re-engineer the initial prompt from the human. This is first node in the graph (also known as the
 "Graph Entry Point").
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-
-# Retrieve the project directory path from environment variables
-#PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-
-# Insert the project directory into the system path for module resolution
-#sys.path.insert(1, PROJECT_DIRECTORY)
+import logging
 
 from langchain_core.messages import HumanMessage
-from adam.agents.engineer import engineer
+from adam.agents.registry import agent_registry
+
+logger = logging.getLogger(__name__)
 
 async def engineer_node(state):
     """
@@ -32,13 +22,13 @@ async def engineer_node(state):
               and the identifier of the last node processed.
     """
 
-    print("###Engineer Node###\n")
+    logger.debug("Engineer node")
 
     # Extract the current prompt from the state
     prompt = state["messages"]
     
-    # Initialize the engineer agent with the current state
-    engineer_chain = await engineer(state)
+    # Fetch the engineer agent from the registry
+    engineer_chain = await agent_registry.get("engineer")
     
     engineer_output = await engineer_chain.ainvoke({"messages": prompt})
 
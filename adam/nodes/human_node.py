@@ -6,8 +6,9 @@ similar purpose to active listening and makes sure that the AI agent understood
 intent.
 """
 import asyncio
-from icecream import ic
+import logging
+
+logger = logging.getLogger(__name__)
 
 async def human_node(state: dict) -> dict:
-    print(f"[human_node] Called with state: {state}")
-    ic(state)
\ No newline at end of file
+    logger.debug("[human_node] Called with state: %s", state)
\ No newline at end of file
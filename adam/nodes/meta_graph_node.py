@@ -1,26 +1,18 @@
 """
 Meta Graph Node
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv(".env")
-
-# Retrieve the project directory path from environment variables
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-
-# Insert the project directory into the system path for module resolution
-sys.path.insert(1, PROJECT_DIRECTORY)
+import logging
 
 from langchain_core.messages import HumanMessage
-from meta_graph import build_metaflow
+from adam.meta_graph import build_metaflow
+from adam.meta_budget import meta_budget
+
+logger = logging.getLogger(__name__)
 
 async def meta_graph_node(state):
     """
     """
-    print("###Meta Graph Node###\n")
+    logger.debug("Meta graph node")
 
     plan = state["plan"]
     start_meta_messages = state["rewritten_prompt"]
@@ -31,18 +23,19 @@ async def meta_graph_node(state):
         "meta_messages": [HumanMessage(content=start_meta_messages, name="human")], 
         "plan": plan, 
         "meta_prompt_one": meta_prompt_one, 
-        "meta_prompt_two": meta_prompt_two
+        "meta_prompt_two": meta_prompt_two,
+        **meta_budget(),
         }
 
-    metagraph = build_metaflow(plan)
+    metagraph = build_metaflow()
 
     async for output in metagraph.astream(inputs, stream_mode="updates"):
         for node, meta_state in output.items():
-            # Note how the print statements here appear after any print statements within the node and agent
+            # Note how the log records here appear after any log records within the node and agent
             # functions. I think this is because the output is being streamed to the console in real-time.
-            print(f"<NODE: {node}>\n")
+            logger.debug("<NODE: %s>", node)
             if 'meta_messages' in meta_state:
-                print(f"{meta_state['meta_messages'][-1].name}: \"{meta_state['meta_messages'][-1].content}\"\n")
+                logger.debug("%s: %r", meta_state['meta_messages'][-1].name, meta_state['meta_messages'][-1].content)
                 await manager.send_personal_message(json.dumps({
                     "conversation_id": json_message["conversation_id"],
                     "message": meta_state['meta_messages'][-1].content,
@@ -58,6 +51,6 @@ async def meta_graph_node(state):
                 )
                 new_msg = await db.add_message(node_message)                
             else:
-                print("No meta messages found in state.\n")
+                logger.debug("No meta messages found in state.")
 
     return 
@@ -1,38 +1,34 @@
 """
 Meta Node One
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv(".env")
-
-# Retrieve the project directory path from environment variables
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-
-# Insert the project directory into the system path for module resolution
-sys.path.insert(1, PROJECT_DIRECTORY)
+import logging
 
 from langchain_core.messages import HumanMessage
-from agents.meta_one import meta_one
+from adam.agents.registry import agent_registry
+from adam.meta_budget import estimate_tokens
+from adam.meta_context import compact_context
+
+logger = logging.getLogger(__name__)
 
 async def meta_node_one(meta_state):
     """
     """
-    print("###Meta Node One###\n")
+    logger.debug("Meta node one")
 
-    meta_messages = meta_state["meta_messages"]
+    meta_messages, saved_tokens = compact_context(meta_state)
+    logger.debug("meta one: context compacted by ~%s tokens", saved_tokens)
     meta_prompt_one = meta_state["meta_prompt_one"]
-    meta_one_chain = await meta_one()
+    meta_one_chain = await agent_registry.get("meta_one")
 
-    meta_one_response = meta_one_chain.invoke({"meta_prompt_one": meta_prompt_one, "messages": meta_messages})
+    meta_one_response = await meta_one_chain.ainvoke({"meta_prompt_one": meta_prompt_one, "messages": meta_messages})
 
     # Wrap the rewritten prompt in a HumanMessage object for standardized handling
     meta_one_message = HumanMessage(content=meta_one_response, name="meta_one")
     
-    print(f"meta one: {meta_one_response}\n")
+    logger.debug("meta one: %s", meta_one_response)
 
     # We return both the rewritten_prompt and meta_one's response in meta_messages.
     meta_state["meta_messages"].append(meta_one_message)
+    meta_state["iterations"] = meta_state.get("iterations", 0) + 1
+    meta_state["tokens_used"] = meta_state.get("tokens_used", 0) + estimate_tokens(meta_messages, meta_prompt_one, meta_one_response)
     return meta_state
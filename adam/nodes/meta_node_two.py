@@ -1,38 +1,33 @@
 """
 Meta Node Two
 """
-import sys
-import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv(".env")
-
-# Retrieve the project directory path from environment variables
-PROJECT_DIRECTORY = os.getenv("PROJECT_DIRECTORY")
-
-# Insert the project directory into the system path for module resolution
-sys.path.insert(1, PROJECT_DIRECTORY)
+import logging
 
 from langchain_core.messages import HumanMessage
-from agents.meta_two import meta_two
+from adam.agents.registry import agent_registry
+from adam.meta_budget import estimate_tokens
+from adam.meta_context import compact_context
+
+logger = logging.getLogger(__name__)
 
 async def meta_node_two(meta_state):
     """
     """
-    print("###Meta Node Two###\n")
+    logger.debug("Meta node two")
 
-    meta_messages = meta_state["meta_messages"]
+    meta_messages, saved_tokens = compact_context(meta_state)
+    logger.debug("meta two: context compacted by ~%s tokens", saved_tokens)
     meta_prompt_two = meta_state["meta_prompt_two"]
-    meta_two_chain = await meta_two()
+    meta_two_chain = await agent_registry.get("meta_two")
 
-    meta_two_response = meta_two_chain.invoke({"meta_prompt_two": meta_prompt_two, "messages": meta_messages})
+    meta_two_response = await meta_two_chain.ainvoke({"meta_prompt_two": meta_prompt_two, "messages": meta_messages})
 
     # Wrap the rewritten prompt in a HumanMessage object for standardized handling
     meta_two_message = HumanMessage(content=meta_two_response, name="meta_two")
     
-    print(f"meta two: {meta_two_response}\n")
+    logger.debug("meta two: %s", meta_two_response)
 
     meta_state["meta_messages"].append(meta_two_message)
+    meta_state["tokens_used"] = meta_state.get("tokens_used", 0) + estimate_tokens(meta_messages, meta_prompt_two, meta_two_response)
     return meta_state
     
\ No newline at end of file
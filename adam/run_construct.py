@@ -1,10 +1,18 @@
+import logging
+
 from fastapi import WebSocket
 from langchain_core.messages import HumanMessage
 from adam.constructor_graph import constructflow
 from adam.database import db, MessageModel
 from adam.connection_manager import manager
+from adam.stream_results import StreamManager
+from adam.write_behind import write_behind
+from adam.codec import NewMessageFrame, ConversationUpdatedFrame, FieldDelta
 
 import json
+
+logger = logging.getLogger(__name__)
+
 async def run_construct(inputs: dict, websocket: WebSocket, data: str, thread: dict):
     """
     Processes the conversation graph asynchronously.
@@ -12,40 +20,36 @@ async def run_construct(inputs: dict, websocket: WebSocket, data: str, thread: d
     from adam.server import main_graph
     json_message = json.loads(data)
     user_input = json_message.get("content")
-    print(f"[process_graph] Started for {websocket} with message: {json_message}")
+    logger.debug("[process_graph] Started for %s with message: %s", websocket, json_message)
     if user_input:
-        print(f"[process_graph] user_input: {user_input}\n")
-        print(f"[process_graph] thread: {thread}\n")
-        print(f"[process_graph] inputs: {inputs}\n")
-        async for output in main_graph.astream(inputs, thread, stream_mode="updates"):
+        logger.debug("[process_graph] thread: %s, inputs: %s", thread, inputs)
+        stream = StreamManager(websocket, json_message["conversation_id"])
+        # The client is sent the conversation's fields once, then only the ones that change
+        delta = FieldDelta()
+        async for output in stream.stream_updates(main_graph, inputs, thread):
             for node, state in output.items():
-                print(f"[process_graph] <NODE: {node}>\n")
-                print(f"[process_graph] STATE IN FOR LOOP: {state}")
-                #print(f"rewritten_prompt: {state['rewritten_prompt']}")
-                if node == "human_node":
-                    print(f"[process_graph] human_node called (graph loop)")
-                    print(f"[process_graph] human_node_content: {json_message['content']}")
-
+                logger.debug("[process_graph] <NODE: %s>", node)
                 if 'messages' in state:
-                    print(f"[process_graph] {state['messages'][-1].name}: \"{state['messages'][-1].content}\"\n")
-                    await manager.send_personal_message(json.dumps({
-                        "conversation_id": json_message["conversation_id"],
-                        "message": state['messages'][-1].content,
-                        "sender_name": state['messages'][-1].name,
-                        "type": "new_message",  # client-side type
-                        "conversation_state": "user_input"
-                    }), websocket)
+                    logger.debug("[process_graph] %s: %r", state['messages'][-1].name, state['messages'][-1].content)
+                    await manager.send_personal_message(NewMessageFrame(
+                        conversation_id=json_message["conversation_id"],
+                        message=state['messages'][-1].content,
+                        sender_name=state['messages'][-1].name,
+                        message_id=stream.message_id(node),
+                        type="new_message",  # client-side type
+                        conversation_state="user_input"
+                    ), websocket)
                     node_message = MessageModel(
                         conversation_id=json_message["conversation_id"],
                         message=state['messages'][-1].content,
                         sender_name=state['messages'][-1].name,
                         type="outer"
                     )
-                    new_msg = await db.add_message(node_message)
+                    write_behind.add_message(node_message)
                 else:
-                    print("[process_graph] No messages found in state.\n")
-                update_conv = await db.update_conversation(
-                    json_message["conversation_id"], 
+                    logger.debug("[process_graph] No messages found in state.")
+                write_behind.update_conversation(
+                    json_message["conversation_id"],
                     conversation_state="user_input",
                     rewritten_prompt=state["rewritten_prompt"] if "rewritten_prompt" in state else None,
                     analyser_decision=state["analyser_decision"] if "analyser_decision" in state else None,
@@ -54,7 +58,7 @@ async def run_construct(inputs: dict, websocket: WebSocket, data: str, thread: d
                     meta_prompt_one=state["meta_prompt_one"] if "meta_prompt_one" in state else None,
                     meta_prompt_two=state["meta_prompt_two"] if "meta_prompt_two" in state else None
                 )
-                updated_fields = {
+                updated_fields = delta({
                     "conversationState": "user_input", 
                     "rewritten_prompt": state["rewritten_prompt"] if "rewritten_prompt" in state else None,
                     "analyser_decision": state["analyser_decision"] if "analyser_decision" in state else None,
@@ -62,12 +66,14 @@ async def run_construct(inputs: dict, websocket: WebSocket, data: str, thread: d
                     "plan": state["plan"] if "plan" in state else None,
                     "meta_prompt_one": state["meta_prompt_one"] if "meta_prompt_one" in state else None,
                     "meta_prompt_two": state["meta_prompt_two"] if "meta_prompt_two" in state else None
-                }
-                if update_conv:
-                    await manager.send_personal_message(json.dumps({
-                        "type": "conversation_updated",
-                        "conversation_id": json_message["conversation_id"],
-                        "updated_fields": updated_fields
-                    }), websocket)
+                })
+                if updated_fields:
+                    await manager.send_personal_message(ConversationUpdatedFrame(
+                        type="conversation_updated",
+                        conversation_id=json_message["conversation_id"],
+                        updated_fields=updated_fields
+                    ), websocket)
+        # The meta run and the next request read what this run wrote
+        await write_behind.flush()
     else:
-        print("[process_graph] No user input found.\n")
\ No newline at end of file
+        logger.warning("[process_graph] No user input found.")
\ No newline at end of file
@@ -1,23 +1,29 @@
+import logging
+
 from fastapi import WebSocket
 from langchain_core.messages import HumanMessage
 from adam.meta_graph import build_metaflow
 from adam.database import db, MessageModel, ConversationModel
 from adam.connection_manager import manager
-from icecream import ic
+from adam.checkpointer import checkpointer
+from adam.stream_results import StreamManager
+from adam.meta_budget import meta_budget, budget_exhausted
+from adam.write_behind import write_behind
+from adam.codec import NewMessageFrame
 
-import json
+logger = logging.getLogger(__name__)
 
 async def run_meta_graph(conversation_id: int, websocket: WebSocket, data: str, thread: dict):
     """
     Processes the meta graph asynchronously.
     """
-    print("RUN META GRAPH")
+    logger.debug("Running the meta graph")
     # from adam.run_construct import updated_fields
     
     conversation = await db.get_conversation(conversation_id)
     
     if conversation is None:
-        print(f"Conversation with id {conversation_id} not found")
+        logger.warning("Conversation with id %s not found", conversation_id)
         return
 
     plan = conversation.plan
@@ -26,36 +32,51 @@ async def run_meta_graph(conversation_id: int, websocket: WebSocket, data: str,
     meta_prompt_two = conversation.meta_prompt_two
     subject = conversation.subject
 
-    meta_graph = build_metaflow(plan)
+    # Every meta run starts from the rewritten prompt, so clear any earlier run on this thread
+    thread_id = thread["configurable"]["thread_id"]
+    await checkpointer.adelete_thread(thread_id)
+    meta_graph = build_metaflow(checkpointer)
 
     inputs = {
         "meta_messages": [HumanMessage(content=start_meta_messages, name="human")], 
         "plan": plan, 
         "meta_prompt_one": meta_prompt_one, 
         "meta_prompt_two": meta_prompt_two,
-        "subject": subject
+        "subject": subject,
+        **meta_budget(conversation.meta_max_iterations, conversation.meta_max_tokens, conversation.meta_time_limit),
     }
 
-    async for output in meta_graph.astream(inputs, thread, stream_mode="updates"):
+    stream = StreamManager(websocket, conversation_id)
+    async for output in stream.stream_updates(meta_graph, inputs, thread):
         for node, meta_state in output.items():
-            print(f"<META NODE: {node}>\n")
+            logger.debug("<META NODE: %s>", node)
             if 'meta_messages' in meta_state:
-                print(f"{meta_state['meta_messages'][-1].name}: \"{meta_state['meta_messages'][-1].content}\"\n")
-                await manager.send_personal_message(json.dumps({
-                    "conversation_id": conversation_id,
-                    "message": meta_state['meta_messages'][-1].content,
-                    "sender_name": meta_state['meta_messages'][-1].name,
-                    "type": "new_message",  # client-side type
-                    "conversation_state": "user_input"
-                }), websocket)
+                logger.debug("%s: %r", meta_state['meta_messages'][-1].name, meta_state['meta_messages'][-1].content)
+                await manager.send_personal_message(NewMessageFrame(
+                    conversation_id=conversation_id,
+                    message=meta_state['meta_messages'][-1].content,
+                    sender_name=meta_state['meta_messages'][-1].name,
+                    message_id=stream.message_id(node),
+                    type="new_message",  # client-side type
+                    conversation_state="user_input"
+                ), websocket)
                 node_message = MessageModel(
                     conversation_id=conversation_id,
                     message=meta_state['meta_messages'][-1].content,
                     sender_name=meta_state['meta_messages'][-1].name,
                     type="inner"
                 )
-                new_msg = await db.add_message(node_message)                
+                write_behind.add_message(node_message)
             else:
-                print("META: No meta messages found in state.\n")
+                logger.debug("META: No meta messages found in state.")
+
+    final_state = (await meta_graph.aget_state(thread)).values
+    logger.info(
+        "META: finished after %s iterations, ~%s tokens (~%s saved by compaction), budget exhausted: %s",
+        final_state.get('iterations'), final_state.get('tokens_used'), final_state.get('context_tokens_saved'),
+        budget_exhausted(final_state)
+    )
 
+    await write_behind.flush()
+    await checkpointer.afinish_thread(thread_id)
     return
@@ -0,0 +1,135 @@
+"""
+Runtime profiles and logging.
+
+The server used to start with every debug aid switched on: `tracemalloc` tracing every allocation,
+asyncio debug mode on the event loop, DEBUG logging on the root logger, uvicorn's reloader, and
+full graph state printed on every step. A profile decides which of these run:
+
+- "development" (the default): DEBUG logs as text, tracemalloc, asyncio debug mode and reload.
+- "production": INFO logs as one JSON object per line, and none of the debug aids.
+
+The profile is chosen with `python adam/main.py --profile production`, or with ADAM_PROFILE when
+the app is served some other way. LOG_LEVEL overrides the profile's log level.
+
+Log records carry the `conversation_id` of the request they were logged for. `log_context` sets it
+around the handling of a message, and tasks started inside it, graph runs included, inherit it.
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from adam.settings import settings
+
+# Loggers of dependencies that are too chatty below WARNING
+QUIET_LOGGERS = ("aiosqlite", "langchain", "httpx", "httpcore", "openai", "groq")
+
+# The conversation the code running in the current context is working on
+current_conversation_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("conversation_id", default=None)
+
+class Profile:
+    """
+    Settings of a runtime profile.
+
+    Attributes:
+        name (str): Name of the profile.
+        log_level (str): Level of the root logger.
+        structured_logs (bool): Log JSON lines rather than text.
+        tracemalloc (bool): Trace memory allocations.
+        loop_debug (bool): Run the event loop in asyncio debug mode.
+        reload (bool): Restart the server when the code changes.
+    """
+    def __init__(self, name: str, log_level: str, structured_logs: bool, tracemalloc: bool, loop_debug: bool, reload: bool):
+        self.name = name
+        self.log_level = log_level
+        self.structured_logs = structured_logs
+        self.tracemalloc = tracemalloc
+        self.loop_debug = loop_debug
+        self.reload = reload
+
+PROFILES: Dict[str, Profile] = {
+    "development": Profile("development", "DEBUG", structured_logs=False, tracemalloc=True, loop_debug=True, reload=True),
+    "production": Profile("production", "INFO", structured_logs=True, tracemalloc=False, loop_debug=False, reload=False),
+}
+
+def get_profile(name: str) -> Profile:
+    """
+    Return the profile called `name`.
+
+    Raises:
+        ValueError: If there is no such profile.
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile {name!r}, expected one of {tuple(PROFILES)}")
+    return PROFILES[name]
+
+def select_profile(argv: List[str]) -> Profile:
+    """
+    Return the profile named by a `--profile` command line argument, or by ADAM_PROFILE.
+
+    The choice is written back to ADAM_PROFILE, so the app module uvicorn imports (and the
+    processes its reloader starts) run with the same profile.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", choices=tuple(PROFILES), default=settings.profile)
+    args, _ = parser.parse_known_args(argv)
+    os.environ["ADAM_PROFILE"] = args.profile
+    return get_profile(args.profile)
+
+class ConversationFilter(logging.Filter):
+    """
+    Adds the `conversation_id` of the current context to log records.
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.conversation_id = current_conversation_id.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as one JSON object per line.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "conversation_id", None) is not None:
+            entry["conversation_id"] = record.conversation_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [conversation=%(conversation_id)s] %(message)s"
+
+def configure_logging(profile: Profile, stream=None):
+    """
+    Replace the root logger's handlers with one that logs in the profile's format and level.
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(ConversationFilter())
+    handler.setFormatter(JsonFormatter() if profile.structured_logs else logging.Formatter(TEXT_FORMAT))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level or profile.log_level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+@contextmanager
+def log_context(conversation: Optional[int]) -> Iterator[None]:
+    """
+    Tag the records logged inside the block, and by the tasks it starts, with a conversation ID.
+    """
+    token = current_conversation_id.set(conversation)
+    try:
+        yield
+    finally:
+        current_conversation_id.reset(token)
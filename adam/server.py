@@ -1,37 +1,100 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, APIRouter
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import asyncio
 import json
+import logging
+import weakref
 
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import HumanMessage
-from adam.database import db, ConversationModel, MessageModel
+from adam.database import db, ConversationModel, MessageModel, HISTORY_PAGE_SIZE, CONVERSATION_PAGE_SIZE
+from adam.checkpointer import checkpointer
 from adam.constructor_graph import constructflow
 from adam.run_construct import run_construct
 from adam.run_meta_graph import run_meta_graph
 from adam.connection_manager import manager  # Import from the new module
+from adam.handler_registry import HandlerRegistry
+from adam.metrics import metrics
+from adam.codec import (
+    Payload,
+    JSON,
+    encode,
+    ConversationHistoryFrame,
+    ConversationsFrame,
+    ConversationUpdatedFrame,
+    ErrorFrame,
+    LatestConversationFrame,
+    MessageFrame,
+    NewConversationFrame,
+    PostedMessageFrame,
+)
 from adam.nodes.human_node import human_node  # Keep if required elsewhere
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
-construct_thread = {"configurable": {"thread_id": "1"}}
-meta_thread = {"configurable": {"thread_id": "2"}}
-construct_memory = MemorySaver()
-main_graph = constructflow.compile(checkpointer=construct_memory, interrupt_before=["human_node", "meta_graph_node"])
+main_graph = constructflow.compile(checkpointer=checkpointer, interrupt_before=["human_node", "meta_graph_node"])
+
+async def conversation_threads(conversation_id: int) -> Tuple[dict, dict]:
+    """
+    Returns the LangGraph configs for a conversation's construct and meta runs. Every conversation
+    has its own threads, so concurrent conversations never share checkpointed state.
+    """
+    construct_thread_id, meta_thread_id = await db.get_conversation_threads(conversation_id)
+    return (
+        {"configurable": {"thread_id": construct_thread_id}},
+        {"configurable": {"thread_id": meta_thread_id}},
+    )
+
+# Largest page a client can ask for
+MAX_PAGE_SIZE = 200
+
+def page_limit(json_message: dict, default: int) -> int:
+    """
+    Returns the page size a client asked for with `limit`, clamped to 1..MAX_PAGE_SIZE.
+    """
+    try:
+        limit = int(json_message.get("limit") or default)
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+async def conversation_history_frame(conversation_id: int, before_id: Optional[int], limit: int, codec: str = JSON) -> Payload:
+    """
+    Returns the conversation_history frame of a page of a conversation's history, encoded with
+    `codec`. Frames are cached until the conversation is written to, so unchanged history is
+    neither re-queried nor re-encoded.
+    """
+    key = ("history", codec, before_id, limit)
+    frame = db.cache.get(conversation_id, key)
+    if frame is None:
+        generation = db.cache.generation(conversation_id)
+        history, conversation_state = await db.get_conversation_messages(conversation_id, before_id=before_id, limit=limit)
+        frame = ConversationHistoryFrame(
+            type="conversation_history",
+            data=[msg.model_dump() for msg in history],
+            conversation_id=conversation_id,
+            conversationState=conversation_state,
+            before_id=before_id,
+            next_before_id=history[0].id if len(history) == limit else None
+        )
+        frame = encode(frame, codec)
+        db.cache.set(conversation_id, key, frame, generation)
+    return frame
 
 async def handle_user_input(websocket: WebSocket):
     """
     Handles user input for a specific WebSocket connection.
     """
-    print(f"[handle_user_input] Started for {websocket}")
+    logger.debug("[handle_user_input] Started for %s", websocket)
     input_queue = manager.input_queues.get(websocket)
     if not input_queue:
-        print(f"[handle_user_input] Input queue not found for {websocket}")
+        logger.warning("[handle_user_input] Input queue not found for %s", websocket)
         return
 
     while True:
         input_data = await input_queue.get()
-        print(f"[handle_user_input] Received input for {websocket}: {input_data}")
+        logger.debug("[handle_user_input] Received input for %s: %s", websocket, input_data)
         # Instead of directly calling human_node, delegate processing
         # For example, enqueue the state for another handler or trigger an event
         # Here, we'll use asyncio.create_task to handle processing asynchronously
@@ -42,209 +105,231 @@ async def process_human_node(state: Dict[str, any]):
     """
     Processes the human_node asynchronously.
     """
-    print(f"[process_human_node] Started with state: {state}")
+    logger.debug("[process_human_node] Started with state: %s", state)
     updated_state = await human_node(state)
     # Further processing with updated_state as needed
     # For example, trigger the next node in the graph
     # This depends on the overall workflow architecture
-    print(f"[process_human_node] Updated state from human_node: {updated_state}")
+    logger.debug("[process_human_node] Updated state from human_node: %s", updated_state)
     # Placeholder for next steps
 
+# Create a global instance of the HandlerRegistry class
+handlers = HandlerRegistry()
+
+# Held by a conversation's graph runs, so runs started by consecutive messages don't interleave
+conversation_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Conversations whose lock is held are running a graph
+metrics.callback(
+    "adam_active_conversations",
+    "Conversations with a graph run in progress.",
+    lambda: sum(lock.locked() for lock in list(conversation_locks.values())),
+)
+
+def conversation_lock(conversation_id: int) -> asyncio.Lock:
+    """
+    Returns the lock of a conversation's graph runs.
+    """
+    lock = conversation_locks.get(conversation_id)
+    if lock is None:
+        lock = conversation_locks[conversation_id] = asyncio.Lock()
+    return lock
+
+async def add_user_message(json_message: dict) -> int:
+    """
+    Stores the message a user sent and returns its ID.
+    """
+    db_message = MessageModel(
+        conversation_id=json_message["conversation_id"],
+        message=json_message["content"],
+        sender_name=json_message["sender_name"],
+        type="outer"
+    )
+    return await db.add_message(db_message)
+
+async def run_first_message(websocket: WebSocket, json_message: dict, data: str):
+    """
+    Runs the construct graph on the first message of a conversation.
+    """
+    async with conversation_lock(json_message["conversation_id"]):
+        construct_thread, _ = await conversation_threads(json_message["conversation_id"])
+        inputs = {
+            "messages": [HumanMessage(content=json_message.get("content"), name="human")]
+        }
+        await run_construct(inputs, websocket, data, construct_thread)
+        logger.debug("Interrupted before the human node")
+
+async def run_user_input(websocket: WebSocket, json_message: dict, data: str):
+    """
+    Resumes the construct graph with the user's reply, then runs the meta graph once the reply
+    was accepted.
+    """
+    async with conversation_lock(json_message["conversation_id"]):
+        construct_thread, meta_thread = await conversation_threads(json_message["conversation_id"])
+        human_msg = HumanMessage(content=json_message["content"], name="human")
+        await main_graph.aupdate_state(construct_thread, {"messages": [human_msg]}, as_node="human_node")
+
+        logger.debug("Running construct task")
+        await run_construct(None, websocket, data, construct_thread)
+        # After a "Try Again" reply the graph stops before human_node again. The thread is waiting
+        # for the user, so there is nothing for the meta graph yet and it must not be evicted.
+        if "human_node" in (await main_graph.aget_state(construct_thread)).next:
+            logger.debug("Interrupted before the human node")
+            return
+
+        logger.debug("Running meta task")
+        await run_meta_graph(json_message["conversation_id"], websocket, data, meta_thread)
+        # The conversation's runs are done, let its checkpoints be evicted
+        await checkpointer.afinish_thread(construct_thread["configurable"]["thread_id"])
+
+@handlers.register("first_message")
+async def handle_first_message(websocket: WebSocket, json_message: dict, data: str):
+    await add_user_message(json_message)
+    handlers["first_message"].spawn(websocket, run_first_message(websocket, json_message, data))
+
+@handlers.register("user_input")
+async def handle_user_input_message(websocket: WebSocket, json_message: dict, data: str):
+    await add_user_message(json_message)
+    handlers["user_input"].spawn(websocket, run_user_input(websocket, json_message, data))
+
+@handlers.register("get_latest_conversation", concurrent=True)
+async def handle_get_latest_conversation(websocket: WebSocket, json_message: dict, data: str):
+    latest_conversation_id = await db.get_latest_conversation_id()
+    conversation = await db.get_conversation(latest_conversation_id) if latest_conversation_id else None
+    if conversation:
+        await manager.send_personal_message(LatestConversationFrame(
+            type="latest_conversation",
+            data={
+                "conversationId": conversation.id,
+                "conversationName": conversation.conversation_name,
+                "conversationState": conversation.conversation_state,
+                "subject": conversation.subject,
+                "rewrittenPrompt": conversation.rewritten_prompt,
+                "metaPromptOne": conversation.meta_prompt_one,
+                "metaPromptTwo": conversation.meta_prompt_two
+            }
+        ), websocket)
+    else:
+        await manager.send_personal_message(LatestConversationFrame(
+            type="latest_conversation",
+            data=None
+        ), websocket)
+
+@handlers.register("create_conversation")
+async def handle_create_conversation(websocket: WebSocket, json_message: dict, data: str):
+    # Collect all required fields. Here, we're using default values.
+    # Ideally, these should come from the `json_message`.
+    conversation = ConversationModel(
+        conversation_name=json_message.get("name"),
+        subject=json_message.get("subject", "Default Subject"),
+        rewritten_prompt=json_message.get("rewritten_prompt", "Default Rewritten Prompt"),
+        meta_prompt_one=json_message.get("meta_prompt_one", "Default Meta Prompt One"),
+        meta_prompt_two=json_message.get("meta_prompt_two", "Default Meta Prompt Two"),
+        analyser_decision=json_message.get("analyser_decision", "Pending"),
+        plan=json_message.get("plan", "Default Plan"),
+        meta_max_iterations=json_message.get("meta_max_iterations"),
+        meta_max_tokens=json_message.get("meta_max_tokens"),
+        meta_time_limit=json_message.get("meta_time_limit"),
+    )
+    
+    new_conversation_id = await db.add_conversation(conversation)
+    await manager.send_personal_message(NewConversationFrame(
+        type="new_conversation",
+        data={"conversationId": new_conversation_id, "conversationName": conversation.conversation_name}
+    ), websocket)
+
+@handlers.register("update_conversation")
+async def handle_update_conversation(websocket: WebSocket, json_message: dict, data: str):
+    conversation_id = json_message["conversation_id"]
+    updated_fields = json_message["updated_fields"]
+    success = await db.update_conversation(conversation_id, **updated_fields)
+    
+    if success:
+        # Send only the updated fields back to the client
+        await manager.send_personal_message(ConversationUpdatedFrame(
+            type="conversation_updated",
+            conversation_id=conversation_id,
+            updated_fields=updated_fields
+        ), websocket)
+    else:
+        await manager.send_personal_message(ErrorFrame(
+            type="error",
+            message="Failed to update conversation."
+        ), websocket)
+
+@handlers.register("get_conversations", concurrent=True)
+async def handle_get_conversations(websocket: WebSocket, json_message: dict, data: str):
+    before_id = json_message.get("before_id")
+    limit = page_limit(json_message, CONVERSATION_PAGE_SIZE)
+    conversations = await db.get_conversation_summaries(before_id=before_id, limit=limit)
+    await manager.send_personal_message(ConversationsFrame(
+        type="conversations",
+        data=[{"conversationId": conv.id, "conversationName": conv.conversation_name} for conv in conversations],
+        before_id=before_id,
+        next_before_id=conversations[-1].id if len(conversations) == limit else None
+    ), websocket)
+
+@handlers.register("get_conversation_history", concurrent=True)
+async def handle_get_conversation_history(websocket: WebSocket, json_message: dict, data: str):
+    frame = await conversation_history_frame(
+        json_message["conversation_id"], json_message.get("before_id"), page_limit(json_message, HISTORY_PAGE_SIZE),
+        manager.codec(websocket)
+    )
+    await manager.send_personal_message(frame, websocket)
+
+@handlers.register("get_message", concurrent=True)
+async def handle_get_message(websocket: WebSocket, json_message: dict, data: str):
+    msg = await db.get_message(json_message["message_id"])
+    if msg:
+        await manager.send_personal_message(MessageFrame(
+            type="message",
+            data=msg.model_dump()
+        ), websocket)
+
+@handlers.register("post_message")
+async def handle_post_message(websocket: WebSocket, json_message: dict, data: str):
+    message_id = await add_user_message(json_message)
+    msg = await db.get_message(message_id)
+    await manager.send_personal_message(PostedMessageFrame(
+        type="new_message",
+        data=msg.model_dump()
+    ), websocket)
+
+@handlers.register("get_latest_conversation_history", concurrent=True)
+async def handle_get_latest_conversation_history(websocket: WebSocket, json_message: dict, data: str):
+    latest_conversation_id = await db.get_latest_conversation_id()
+    if latest_conversation_id:
+        frame = await conversation_history_frame(
+            latest_conversation_id, None, page_limit(json_message, HISTORY_PAGE_SIZE), manager.codec(websocket)
+        )
+        await manager.send_personal_message(frame, websocket)
+    else:
+        await manager.send_personal_message(ConversationHistoryFrame(
+            type="conversation_history",
+            data=[],
+            conversation_id=None,
+            conversationState=None,
+            before_id=None,
+            next_before_id=None
+        ), websocket)
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
-    print("[WebSocket] Client connected")
+    logger.info("[WebSocket] Client connected")
     try:
         # Start handling user input for this websocket connection
         # asyncio.create_task(handle_user_input(websocket))
 
         while True:
             data = await websocket.receive_text()
-            print(f"[WebSocket] Received data from {websocket}: {data}")
+            logger.debug("[WebSocket] Received data from %s: %s", websocket, data)
             json_message = json.loads(data)
-
-            # Handle different message types with detailed logs
-            if json_message["type"] == "first_message":
-                print("[WebSocket] Handling first_message")
-                db_message = MessageModel(
-                    conversation_id=json_message["conversation_id"],
-                    message=json_message["content"],
-                    sender_name=json_message["sender_name"],
-                    type="outer"
-                )
-                new_msg = await db.add_message(db_message)
-                user_input = json_message.get("content")
-                inputs = {
-                    "messages": [HumanMessage(content=user_input, name="human")]
-                }
-                asyncio.create_task(run_construct(inputs, websocket, data, construct_thread))
-                print("--Interupt before Human Node--")
-                #print(main_graph.get_state(thread))
-
-            elif json_message["type"] == "user_input":
-                print(f"[WebSocket] Handling user_input: {json_message['content']}")
-                db_message = MessageModel(
-                    conversation_id=json_message["conversation_id"],
-                    message=json_message["content"],
-                    sender_name=json_message["sender_name"],
-                    type="outer"
-                )
-                new_msg = await db.add_message(db_message)
-                human_msg = HumanMessage(content=json_message["content"], name="human")
-                print("--State before update--")
-                print(main_graph.get_state(construct_thread))
-                main_graph.update_state(construct_thread, {"messages": [human_msg]}, as_node="human_node")
-                print("--State after update--")
-                print(main_graph.get_state(construct_thread))
-                
-                # Create tasks
-                construct_task = asyncio.create_task(run_construct(None, websocket, data, construct_thread))
-                
-                # Wait for the first task to complete
-                print("Waiting for construct task to complete")
-                done, pending = await asyncio.wait([construct_task], return_when=asyncio.FIRST_COMPLETED)
-                
-                print("Running meta task")
-                # Run the second task
-                meta_task = asyncio.create_task(run_meta_graph(json_message["conversation_id"], websocket, data, meta_thread)) 
-                await meta_task
-
-            elif json_message["type"] == "get_latest_conversation":
-                print("[WebSocket] Handling get_latest_conversation")
-                latest_conversation_id = await db.get_latest_conversation_id()
-                if latest_conversation_id:
-                    async with db.session() as session:
-                        conversation = await db.get_conversation(latest_conversation_id)
-                        print(f"conversation: {conversation}")
-                        if conversation:
-                            await manager.send_personal_message(json.dumps({
-                                "type": "latest_conversation",
-                                "data": {
-                                    "conversationId": conversation.id,
-                                    "conversationName": conversation.conversation_name,
-                                    "conversationState": conversation.conversation_state,
-                                    "subject": conversation.subject,
-                                    "rewrittenPrompt": conversation.rewritten_prompt,
-                                    "metaPromptOne": conversation.meta_prompt_one,
-                                    "metaPromptTwo": conversation.meta_prompt_two
-                                }
-                            }), websocket)
-                        else:
-                            await manager.send_personal_message(json.dumps({
-                                "type": "latest_conversation",
-                                "data": None
-                            }), websocket)
-                else:
-                    await manager.send_personal_message(json.dumps({
-                        "type": "latest_conversation",
-                        "data": None
-                    }), websocket)
-
-            elif json_message["type"] == "create_conversation":
-                print("[WebSocket] Handling create_conversation")
-                
-                # Collect all required fields. Here, we're using default values.
-                # Ideally, these should come from the `json_message`.
-                conversation = ConversationModel(
-                    conversation_name=json_message.get("name"),
-                    subject=json_message.get("subject", "Default Subject"),
-                    rewritten_prompt=json_message.get("rewritten_prompt", "Default Rewritten Prompt"),
-                    meta_prompt_one=json_message.get("meta_prompt_one", "Default Meta Prompt One"),
-                    meta_prompt_two=json_message.get("meta_prompt_two", "Default Meta Prompt Two"),
-                    analyser_decision=json_message.get("analyser_decision", "Pending"),
-                    plan=json_message.get("plan", "Default Plan"),
-                )
-                
-                new_conv = await db.add_conversation(conversation)
-                await manager.send_personal_message(json.dumps({
-                    "type": "new_conversation",
-                    "data": {"conversationId": new_conv.id, "conversationName": new_conv.conversation_name}
-                }), websocket)
-
-            elif json_message["type"] == "update_conversation":
-                print("[WebSocket] Handling update_conversation")
-                # Update conversation in the database
-                conversation_id = json_message["conversation_id"]
-                updated_fields = json_message["updated_fields"]
-                success = await db.update_conversation(conversation_id, **updated_fields)
-                
-                if success:
-                    # Send only the updated fields back to the client
-                    await manager.send_personal_message(json.dumps({
-                        "type": "conversation_updated",
-                        "conversation_id": conversation_id,
-                        "updated_fields": updated_fields
-                    }), websocket)
-                else:
-                    await manager.send_personal_message(json.dumps({
-                        "type": "error",
-                        "message": "Failed to update conversation."
-                    }), websocket)
-
-            elif json_message["type"] == "get_conversations":
-                print("[WebSocket] Handling get_conversations")
-                conversations = await db.get_conversations()
-                await manager.send_personal_message(json.dumps({
-                    "type": "conversations",
-                    "data": [{"conversationId": conv.id, "conversationName": conv.conversation_name} for conv in conversations]
-                }), websocket)
-
-            elif json_message["type"] == "get_conversation_history":
-                print("[WebSocket] Handling get_conversation_history")
-                history, conversation_state = await db.get_conversation_messages(json_message["conversation_id"])
-                await manager.send_personal_message(json.dumps({
-                    "type": "conversation_history",
-                    "data": [msg.dict() for msg in history],
-                    "conversationState": conversation_state
-                }), websocket)
-
-            elif json_message["type"] == "get_message":
-                print("[WebSocket] Handling get_message")
-                msg = await db.get_message(json_message["message_id"])
-                if msg:
-                    await manager.send_personal_message(json.dumps({
-                        "type": "message",
-                        "data": msg.dict()
-                    }), websocket)
-
-            elif json_message["type"] == "post_message":
-                print("[WebSocket] Handling post_message")
-                db_message = MessageModel(
-                    conversation_id=json_message["conversation_id"],
-                    message=json_message["content"],
-                    sender_name=json_message["sender_name"],
-                    type="outer"
-                ) 
-                new_msg = await db.add_message(db_message)
-                await manager.send_personal_message(json.dumps({
-                    "type": "new_message",
-                    "data": new_msg.dict()
-                }), websocket)
-
-            elif json_message["type"] == "get_latest_conversation_history":
-                print("[WebSocket] Handling get_latest_conversation_history")
-                latest_conversation_id, conversation_state = await db.get_latest_conversation_id()
-                if latest_conversation_id:
-                    history, _ = await db.get_conversation_messages(latest_conversation_id)
-                    await manager.send_personal_message(json.dumps({
-                        "type": "conversation_history",
-                        "data": [msg.dict() for msg in history],
-                        "conversation_id": latest_conversation_id,
-                        "conversationState": conversation_state
-                    }), websocket)
-                else:
-                    await manager.send_personal_message(json.dumps({
-                        "type": "conversation_history",
-                        "data": [],
-                        "conversation_state": None
-                    }), websocket)
-
-            else:
-                print(f"[WebSocket] Unhandled message type: {json_message['type']}")
+            await handlers.dispatch(websocket, json_message, data)
 
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
-        print("[WebSocket] Client disconnected")
+        logger.info("[WebSocket] Client disconnected")
 
 
 
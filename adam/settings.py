@@ -0,0 +1,79 @@
+"""
+Settings of the application, read from the environment once.
+
+Modules used to call `load_dotenv` and read their own variables with `os.getenv` at import, and the
+graph modules also put PROJECT_DIRECTORY on `sys.path` so they could import their siblings as
+top-level modules. The .env file is now loaded here, the first time anything imports this module,
+and every setting is an attribute of the global `settings` object. Variables already set in the
+process environment take precedence over the .env file.
+
+See .env.example for the variables and their defaults.
+"""
+import os
+from typing import Mapping, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+class Settings:
+    """
+    Settings read from environment variables.
+
+    Attributes:
+        profile (str): Runtime profile, see runtime_profile.py (ADAM_PROFILE).
+        log_level (Optional[str]): Overrides the profile's log level (LOG_LEVEL).
+        database_backend (str): "sqlite", or "redis" for the RedisDatabase of database_redis.py
+            (DATABASE_BACKEND).
+        database_url (str): SQLAlchemy URL of the database (DATABASE_URL).
+        redis_url (str): URL of the Redis server of the RedisDatabase (REDIS_URL).
+        cohere_api_key (Optional[str]): Cohere API key (COHERE_API_KEY).
+        warm_agents (bool): Build the agent chains in the background at startup rather than on
+            first use (WARM_AGENTS).
+        fast_path_enabled (bool): Try the routing fast paths before the LLM (FAST_PATH_ENABLED).
+        fast_path_threshold (float): Confidence a fast path needs to skip the LLM (FAST_PATH_THRESHOLD).
+        meta_max_iterations (int): Default iteration budget of a meta run (META_MAX_ITERATIONS).
+        meta_max_tokens (int): Default token budget of a meta run (META_MAX_TOKENS).
+        meta_time_limit (float): Default time budget of a meta run in seconds (META_TIME_LIMIT).
+        meta_context_tokens (int): Token budget of a meta agent's context (META_CONTEXT_TOKENS).
+        conversation_cache_bytes (int): Size of the conversation cache (CONVERSATION_CACHE_BYTES).
+        send_queue_size (int): Most frames queued per websocket (SEND_QUEUE_SIZE).
+        slow_consumer_policy (str): What to do with clients that fall behind (SLOW_CONSUMER_POLICY).
+        llm_provider (str): "cohere", or "fake" for the offline model of fake_llm.py (LLM_PROVIDER).
+        fake_llm_latency_ms (float): Median time to the first token of the fake model (FAKE_LLM_LATENCY_MS).
+        fake_llm_latency_sigma (float): Spread of the fake model's latency (FAKE_LLM_LATENCY_SIGMA).
+        fake_llm_tokens_per_second (float): Streaming rate of the fake model (FAKE_LLM_TOKENS_PER_SECOND).
+        fake_llm_response_tokens (int): Words in a reply of the fake model (FAKE_LLM_RESPONSE_TOKENS).
+        fake_llm_seed (int): Seed of the fake model's replies and latencies (FAKE_LLM_SEED).
+        fake_llm_choices (str): Structured values the fake model picks (FAKE_LLM_CHOICES).
+    """
+    def __init__(self, environ: Mapping[str, str] = os.environ):
+        self.profile: str = environ.get("ADAM_PROFILE", "development")
+        self.log_level: Optional[str] = environ.get("LOG_LEVEL") or None
+        self.database_backend: str = environ.get("DATABASE_BACKEND", "sqlite")
+        self.database_url: str = environ.get("DATABASE_URL", "sqlite+aiosqlite:///conversations.db")
+        self.redis_url: str = environ.get("REDIS_URL", "redis://localhost")
+        self.cohere_api_key: Optional[str] = environ.get("COHERE_API_KEY")
+        self.warm_agents: bool = _bool(environ.get("WARM_AGENTS", "true"))
+        self.fast_path_enabled: bool = _bool(environ.get("FAST_PATH_ENABLED", "true"))
+        self.fast_path_threshold: float = float(environ.get("FAST_PATH_THRESHOLD", "0.9"))
+        self.meta_max_iterations: int = int(environ.get("META_MAX_ITERATIONS", "3"))
+        self.meta_max_tokens: int = int(environ.get("META_MAX_TOKENS", "50000"))
+        self.meta_time_limit: float = float(environ.get("META_TIME_LIMIT", "300"))
+        self.meta_context_tokens: int = int(environ.get("META_CONTEXT_TOKENS", "4000"))
+        self.conversation_cache_bytes: int = int(environ.get("CONVERSATION_CACHE_BYTES", str(64 * 1024 * 1024)))
+        self.send_queue_size: int = int(environ.get("SEND_QUEUE_SIZE", "1024"))
+        self.slow_consumer_policy: str = environ.get("SLOW_CONSUMER_POLICY", "coalesce")
+        self.llm_provider: str = environ.get("LLM_PROVIDER", "cohere")
+        self.fake_llm_latency_ms: float = float(environ.get("FAKE_LLM_LATENCY_MS", "500"))
+        self.fake_llm_latency_sigma: float = float(environ.get("FAKE_LLM_LATENCY_SIGMA", "0.3"))
+        self.fake_llm_tokens_per_second: float = float(environ.get("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+        self.fake_llm_response_tokens: int = int(environ.get("FAKE_LLM_RESPONSE_TOKENS", "120"))
+        self.fake_llm_seed: int = int(environ.get("FAKE_LLM_SEED", "0"))
+        self.fake_llm_choices: str = environ.get("FAKE_LLM_CHOICES", "")
+
+# Create a global instance of the Settings class
+settings = Settings()
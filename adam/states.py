@@ -43,4 +43,10 @@ class Meta_State(TypedDict):
     meta_prompt_one: str # System prompt for meta_one
     meta_prompt_two: str # System prompt for meta_two
     meta_supervisor_decision: str # Decision of the meta_supervisor agent
-    subject: str # Subject of the conversation
\ No newline at end of file
+    subject: str # Subject of the conversation
+    max_iterations: int # Most meta_one/meta_two iterations in the run
+    max_tokens: int # Most tokens the run may spend
+    deadline: float # Unix time the run has to stop by
+    iterations: int # Iterations started so far
+    tokens_used: int # Estimated tokens spent so far
+    context_tokens_saved: int # Estimated tokens compaction kept out of the meta agents' prompts
\ No newline at end of file
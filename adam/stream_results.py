@@ -1,113 +1,118 @@
 import logging
-from contextlib import asynccontextmanager
-import asyncio
+from typing import Dict, Iterable, Optional
+from fastapi import WebSocket
+
+from adam.codec import TokenFrame
+from adam.connection_manager import manager
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Nodes whose LLM output becomes a chat message, so it is worth streaming token by token.
+# Structured-output agents (analyser, planner, supervisor) and the search agent's internal
+# reasoning are left out.
+STREAMING_NODES = ("engineer_node", "meta_node_one", "meta_node_two")
+
 class StreamLLM:
     """
     A class to handle streaming of LLM (Language Learning Model) results.
-    
-    This class provides methods to initialize streaming and stream results
-    from an LLM chain.
+
+    This class runs a graph with LangGraph's `astream_events` and turns the raw events into
+    token chunks from the LLMs of the streaming nodes and the graph's node updates.
     """
-    
-    async def init_streaming(self):
+    def __init__(self, streaming_nodes: Iterable[str] = STREAMING_NODES):
         """
-        Initialize the streaming process.
-        
-        This method is currently a placeholder and can be expanded to include
-        any necessary setup for streaming.
+        Initialize the StreamLLM.
+
+        Args:
+            streaming_nodes (Iterable[str]): Names of the nodes whose LLM tokens are streamed.
         """
-        print("init_streaming")
-    
-    async def stream_results(self, chain, input_data):
+        self.streaming_nodes = set(streaming_nodes)
+
+    async def stream_results(self, graph, inputs, config):
         """
-        Stream results from the LLM chain.
-        
-        This method takes a chain and input data, processes it through the chain,
-        and yields partial results as they become available.
-        
+        Stream results from a graph run.
+
+        Yields a ("token", node, message_id, content) tuple for every non-empty chunk produced by
+        the LLM of a streaming node, and an ("updates", output) tuple for every node update, i.e.
+        what `graph.astream(stream_mode="updates")` would yield.
+
         Args:
-            chain: The LLM chain to process the input data.
-            input_data: The input data to be processed by the chain.
-        
+            graph: The compiled graph to run.
+            inputs: The inputs for the run, or None to resume an interrupted run.
+            config: The run config, including the thread.
+
         Yields:
-            Partial results from the LLM chain.
-        
+            Token chunks and node updates, in the order they were produced.
+
         Raises:
             Exception: If an error occurs during streaming.
         """
-        logger.debug(f"StreamLLMResults.stream_results called with chain: {chain}, input_data: {input_data}")
+        logger.debug("StreamLLMResults.stream_results called with graph: %s, inputs: %s", graph, inputs)
         try:
-            async for partial_result in chain.astream(input_data):
-                logger.debug(f"Yielding partial result: {partial_result}")
-                yield partial_result
+            async for event in graph.astream_events(inputs, config, version="v2", stream_mode="updates"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    node = event["metadata"].get("langgraph_node")
+                    content = event["data"]["chunk"].content
+                    if node in self.streaming_nodes and content and isinstance(content, str):
+                        yield "token", node, event["run_id"], content
+                elif kind == "on_chain_stream" and not event["parent_ids"]:
+                    yield "updates", event["data"]["chunk"]
         except Exception as e:
-            logger.error(f"Error in StreamLLMResults.stream_results: {str(e)}")
+            logger.error("Error in StreamLLMResults.stream_results: %s", e)
             raise
 
 class StreamManager:
     """
-    A class to manage the streaming process.
-    
-    This class coordinates the streaming of LLM results, handling the queue
-    of partial results and the active streaming task.
+    A class to manage the streaming process for one websocket connection.
+
+    This class forwards token chunks to the client as `token` frames while a graph runs, and
+    remembers which message each node streamed so the node's final `new_message` frame can
+    reference it.
     """
-    def __init__(self):
+    def __init__(self, websocket: WebSocket, conversation_id: int, stream_llm: Optional[StreamLLM] = None):
         """
         Initialize the StreamManager.
-        
-        Sets up the StreamLLM instance, an asyncio Queue for partial results,
-        and a placeholder for the active streaming task.
-        """
-        self.stream_llm = StreamLLM()
-        self.queue = asyncio.Queue()
-        self.active_task = None
 
-    async def generate_stream(self, chain, input_data):
-        """
-        Generate a stream of results from the LLM chain.
-        
-        This method initializes streaming, processes the input through the chain,
-        and puts partial results into the queue.
-        
         Args:
-            chain: The LLM chain to process the input data.
-            input_data: The input data to be processed by the chain.
+            websocket (WebSocket): The connection the tokens are sent to.
+            conversation_id (int): The conversation the run belongs to.
+            stream_llm (Optional[StreamLLM]): The StreamLLM used to run the graph.
         """
-        await self.stream_llm.init_streaming()
-        async for partial_result in self.stream_llm.stream_results(chain, input_data):
-            await self.queue.put(partial_result)
-        await self.queue.put(None)  # Signal the end of the stream
+        self.websocket = websocket
+        self.conversation_id = conversation_id
+        self.stream_llm = stream_llm or StreamLLM()
+        self.message_ids: Dict[str, str] = {}
 
-    async def get_stream(self):
+    async def stream_updates(self, graph, inputs, config):
         """
-        Retrieve the stream of partial results.
-        
-        This method yields partial results from the queue until the end of the stream is signaled.
-        
+        Run the graph, sending token frames to the client as they arrive.
+
+        Args:
+            graph: The compiled graph to run.
+            inputs: The inputs for the run, or None to resume an interrupted run.
+            config: The run config, including the thread.
+
         Yields:
-            Partial results from the LLM chain.
+            The node updates of the run, as `graph.astream(stream_mode="updates")` would.
         """
-        while True:
-            partial_result = await self.queue.get()
-            if partial_result is None:
-                break
-            yield partial_result
+        async for result in self.stream_llm.stream_results(graph, inputs, config):
+            if result[0] == "token":
+                _, node, message_id, content = result
+                self.message_ids[node] = message_id
+                await manager.send_personal_message(TokenFrame(
+                    type="token",
+                    conversation_id=self.conversation_id,
+                    node=node,
+                    message_id=message_id,
+                    content=content,
+                ), self.websocket)
+            else:
+                yield result[1]
 
-    def start_streaming(self, chain, input_data):
+    def message_id(self, node: str) -> Optional[str]:
         """
-        Start the streaming process.
-        
-        This method cancels any existing streaming task and creates a new one
-        to generate the stream of results.
-        
-        Args:
-            chain: The LLM chain to process the input data.
-            input_data: The input data to be processed by the chain.
+        Return the ID of the message the node streamed last, if it streamed one. Clients replace
+        the streamed tokens with the final message carrying the same ID.
         """
-        if self.active_task:
-            self.active_task.cancel()
-        self.active_task = asyncio.create_task(self.generate_stream(chain, input_data))
+        return self.message_ids.pop(node, None)
@@ -0,0 +1,137 @@
+"""
+Write-behind persistence for the output of graph runs.
+
+Every streamed node update used to insert its message and update its conversation in separate
+transactions before the next update was read. `WriteBehindQueue` takes those writes off the
+critical path instead: messages and conversation field updates are queued in memory, field
+updates to the same conversation are merged, and a background writer commits everything queued in
+one transaction a moment later. Runs call `flush` when they finish, so the next run reads what
+they wrote, and the queue is flushed on application shutdown.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, update
+
+from adam.database import db, Database, Conversation, Message, MessageModel, require_sqlite
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """
+    Queues message inserts and conversation updates and commits them in batches.
+
+    Attributes:
+        database (Database): Database the writes are committed to.
+        flush_interval (float): Seconds the writer waits after the first queued write, so the
+            writes that follow it are committed in the same transaction.
+        max_batch (int): Most messages inserted per transaction.
+        messages (List[MessageModel]): Queued message inserts, in order.
+        conversation_updates (Dict[int, dict]): Queued field updates, merged per conversation.
+        stats (Dict[str, int]): Counters of committed `batches`, `messages` and
+            `conversation_updates`, and of `merged_updates` that never needed their own write.
+    """
+    def __init__(self, database: Database, flush_interval: float = 0.05, max_batch: int = 500):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.messages: List[MessageModel] = []
+        self.conversation_updates: Dict[int, dict] = {}
+        self.stats = {"batches": 0, "messages": 0, "conversation_updates": 0, "merged_updates": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def _bind(self):
+        # The lock, event and writer task belong to the running event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._writer = None
+
+    def _schedule(self):
+        self._bind()
+        if self._writer is None or self._writer.done():
+            self._writer = self._loop.create_task(self._run())
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # The writes stay queued and are retried on the next flush
+                logger.exception("[WriteBehindQueue] Flush failed: %s", e)
+
+    def add_message(self, message: MessageModel):
+        """
+        Queue a message insert.
+
+        Args:
+            message (MessageModel): The message to add.
+        """
+        self.messages.append(message)
+        self._schedule()
+
+    def update_conversation(self, conversation_id: int, **kwargs):
+        """
+        Queue an update of any combination of fields of a conversation. Fields queued for the
+        same conversation before the next flush are merged, later values win.
+
+        Args:
+            conversation_id (int): The ID of the conversation to update.
+            **kwargs: The fields to update.
+        """
+        if conversation_id in self.conversation_updates:
+            self.stats["merged_updates"] += 1
+        self.conversation_updates.setdefault(conversation_id, {}).update(kwargs)
+        self._schedule()
+
+    async def flush(self):
+        """
+        Commit every queued write. Returns once they are on disk.
+
+        Raises:
+            Exception: If a transaction fails. Its writes are queued again.
+        """
+        self._bind()
+        async with self._lock:
+            while self.messages or self.conversation_updates:
+                messages, self.messages = self.messages[:self.max_batch], self.messages[self.max_batch:]
+                updates, self.conversation_updates = self.conversation_updates, {}
+                try:
+                    async with self.database.session() as session:
+                        if messages:
+                            await session.execute(insert(Message), [message.model_dump(exclude={'id'}) for message in messages])
+                        for conversation_id, fields in updates.items():
+                            await session.execute(update(Conversation).where(Conversation.id == conversation_id).values(**fields))
+                except Exception:
+                    self.messages[:0] = messages
+                    for conversation_id, fields in updates.items():
+                        self.conversation_updates[conversation_id] = {**fields, **self.conversation_updates.get(conversation_id, {})}
+                    raise
+                # Reads cached before the commit are stale now
+                for conversation_id in {message.conversation_id for message in messages} | set(updates):
+                    self.database.cache.invalidate(conversation_id)
+                self.stats["batches"] += 1
+                self.stats["messages"] += len(messages)
+                self.stats["conversation_updates"] += len(updates)
+
+    async def aclose(self):
+        """
+        Flush the queue and stop the writer. Called on application shutdown.
+        """
+        await self.flush()
+        if self._writer is not None and self._loop is asyncio.get_running_loop():
+            self._writer.cancel()
+        self._writer = None
+
+# Create a global instance of the WriteBehindQueue class
+write_behind = WriteBehindQueue(require_sqlite(db, "write_behind"))
@@ -0,0 +1,99 @@
+"""
+Benchmark of a worker's cold start: import time of the app and time to its first request.
+
+"import" runs `python -X importtime -c "import adam.main"` and reports the cumulative import time
+of adam.main and the slowest modules it imports, failing (exit status 1) when adam.main takes
+longer than the budget. "first request" starts a fresh interpreter that imports the app, runs its
+startup through Starlette's TestClient and times the first HTTP request and the first websocket
+reply, measured from the moment the interpreter was launched.
+
+Both run with the production profile against an empty database in a temporary directory.
+
+Usage:
+    python benchmarks/cold_start.py [import_budget_ms] [runs]
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+FIRST_REQUEST = """
+import time, json
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+import adam.main
+imported = time.perf_counter()
+with TestClient(adam.main.app) as client:
+    client.get("/")
+    first_request = time.perf_counter()
+    with client.websocket_connect("/server/ws") as websocket:
+        websocket.send_text(json.dumps({"type": "get_conversations"}))
+        websocket.receive_text()
+    first_reply = time.perf_counter()
+print(json.dumps({"import": imported - started, "first_request": first_request - started, "first_reply": first_reply - started}))
+"""
+
+
+def environment(directory):
+    env = dict(os.environ)
+    # Agents can't be built without keys, but nothing here calls a provider
+    env.setdefault("COHERE_API_KEY", "benchmark")
+    env.setdefault("TAVILY_API_KEY", "benchmark")
+    env.update({
+        "ADAM_PROFILE": "production",
+        "LOG_LEVEL": "WARNING",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(directory, 'conversations.db')}",
+        "PYTHONPATH": ROOT_DIRECTORY,
+    })
+    return env
+
+
+def import_times(env):
+    """Return the cumulative import time in ms of every module adam.main imports, by module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import adam.main"],
+        env=env, cwd=env["BENCHMARK_DIRECTORY"], capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| *(\S+)", line)
+        if match:
+            times.setdefault(match.group(2), int(match.group(1)) / 1000)
+    return times
+
+
+def first_request(env):
+    launched = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST], env=env, cwd=env["BENCHMARK_DIRECTORY"], capture_output=True, text=True, check=True,
+    )
+    # The wall time also covers interpreter start-up, before the script's clock starts, and shutdown
+    total = time.perf_counter() - launched
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return {name: value * 1000 for name, value in timings.items()}, total * 1000
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as directory:
+        env = environment(directory)
+        env["BENCHMARK_DIRECTORY"] = directory
+        imports = [import_times(env) for _ in range(runs)]
+        main_ms = min(times["adam.main"] for times in imports)
+        slowest = sorted(imports[-1].items(), key=lambda item: item[1], reverse=True)
+        requests = [first_request(env) for _ in range(runs)]
+
+    print(f"import adam.main: {main_ms:,.0f} ms (best of {runs}, budget {budget:,.0f} ms)")
+    print("slowest packages:")
+    for module, ms in [(module, ms) for module, ms in slowest if "." not in module and module != "adam"][:8]:
+        print(f"  {module:30} {ms:8,.0f} ms")
+    best = min(requests, key=lambda request: request[1])
+    print(f"first request:  {best[0]['first_request']:8,.0f} ms after the script started ({best[1]:,.0f} ms process wall time)")
+    print(f"first ws reply: {best[0]['first_reply']:8,.0f} ms after the script started")
+    sys.exit(0 if main_ms <= budget else 1)
@@ -0,0 +1,92 @@
+"""
+End-to-end benchmark of the constructor and meta graphs against the offline fake LLM provider.
+
+Each conversation runs the constructor graph up to the human review, approves the rewritten prompt,
+runs it on to the meta graph's breakpoint and then runs the meta graph from the constructor's
+output, the way run_construct.py and run_meta_graph.py do, with in-memory checkpointers. The agents
+are built with LLM_PROVIDER=fake (see adam/agents/fake_llm.py), with the meta supervisor asked to
+continue so every run uses its whole iteration budget. The FAKE_LLM_* variables set the latency and
+streaming rate, the defaults are close to command-r-plus.
+
+Reports the time of a single conversation, then the wall time and throughput of `concurrency`
+conversations run at once.
+
+Usage:
+    python benchmarks/end_to_end.py [concurrency] [meta_iterations]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIRECTORY)
+
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ.setdefault("FAKE_LLM_CHOICES", "MetaSupervisorResponse.next_action=Continue")
+os.environ.setdefault("FAST_PATH_ENABLED", "false")
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from adam.agents.registry import agent_registry
+from adam.constructor_graph import constructflow
+from adam.meta_budget import meta_budget
+from adam.meta_graph import build_metaflow
+from adam.settings import settings
+
+
+async def conversation(graph, thread_id: str, meta_iterations: int) -> float:
+    """Run one conversation through both graphs and return its duration in seconds."""
+    started = time.perf_counter()
+    thread = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content=f"Explain how B-trees work ({thread_id})", name="human")]}
+    async for _ in graph.astream(inputs, thread, stream_mode="updates"):
+        pass
+    await graph.aupdate_state(thread, {"messages": [HumanMessage(content="Looks good", name="human")]}, as_node="human_node")
+    async for _ in graph.astream(None, thread, stream_mode="updates"):
+        pass
+    state = (await graph.aget_state(thread)).values
+
+    meta_graph = build_metaflow(MemorySaver())
+    inputs = {
+        "meta_messages": [HumanMessage(content=state["rewritten_prompt"], name="human")],
+        "plan": state["plan"],
+        "meta_prompt_one": state["meta_prompt_one"],
+        "meta_prompt_two": state["meta_prompt_two"],
+        "subject": state["subject"],
+        **meta_budget(max_iterations=meta_iterations),
+    }
+    async for _ in meta_graph.astream(inputs, thread, stream_mode="messages"):
+        pass
+    return time.perf_counter() - started
+
+
+async def main(concurrency: int, meta_iterations: int):
+    # Identical prompts would be answered from the response cache after the first conversation
+    agent_registry.response_cache = None
+    await agent_registry.build_all()
+    graph = constructflow.compile(checkpointer=MemorySaver(), interrupt_before=["human_node", "meta_graph_node"])
+
+    single = await conversation(graph, "single", meta_iterations)
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(conversation(graph, f"conversation-{number}", meta_iterations) for number in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    print(
+        f"fake LLM: {settings.fake_llm_latency_ms:.0f} ms to first token (sigma {settings.fake_llm_latency_sigma}), "
+        f"{settings.fake_llm_tokens_per_second:.0f} tokens/s, {settings.fake_llm_response_tokens} tokens per reply"
+    )
+    print(f"one conversation ({meta_iterations} meta iterations): {single:8.2f} s")
+    print(
+        f"{concurrency} concurrent conversations: {wall:8.2f} s wall, "
+        f"median {statistics.median(durations):.2f} s, slowest {max(durations):.2f} s, "
+        f"{concurrency / wall * 60:.1f} conversations/minute"
+    )
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    meta_iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    asyncio.run(main(concurrency, meta_iterations))
@@ -0,0 +1,77 @@
+"""
+Benchmark of the websocket frames sent for one conversation: encode time and bytes on the wire.
+
+A simulated construct run streams its messages as token frames, sends each finished message as a
+new_message frame and sends a conversation_updated frame after every node. "before" encodes the
+frames the way the server used to: `json.dumps`, with every conversation field in every
+conversation_updated frame. "orjson" and "msgpack" encode them with codec.py, with only the
+changed fields in conversation_updated frames (`FieldDelta`).
+
+Usage:
+    python benchmarks/frame_codec.py [nodes] [tokens_per_message] [repeats]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIRECTORY)
+
+from adam.codec import JSON, MSGPACK, FieldDelta, encode
+
+NODES = ["analyser", "rewriter", "subject", "planner", "meta_prompt_one", "meta_prompt_two"]
+
+
+def conversation(nodes, tokens_per_message, delta=None):
+    """Return the frames of one simulated run of `nodes` nodes."""
+    frames = []
+    fields = {
+        "conversationState": "user_input", "rewritten_prompt": None, "analyser_decision": None,
+        "subject": None, "plan": None, "meta_prompt_one": None, "meta_prompt_two": None,
+    }
+    for number in range(nodes):
+        node = NODES[number % len(NODES)]
+        message_id = f"{node}-{number}"
+        for index in range(tokens_per_message):
+            frames.append({"type": "token", "conversation_id": 1, "node": node, "message_id": message_id, "content": f"word{index} "})
+        message = "".join(f"word{index} " for index in range(tokens_per_message))
+        frames.append({
+            "type": "new_message", "conversation_id": 1, "message": message, "sender_name": node,
+            "message_id": message_id, "conversation_state": "user_input",
+        })
+        field = list(fields)[1 + number % (len(fields) - 1)]
+        fields[field] = message
+        updated_fields = delta(fields) if delta is not None else dict(fields)
+        if updated_fields:
+            frames.append({"type": "conversation_updated", "conversation_id": 1, "updated_fields": updated_fields})
+    return frames
+
+
+def measure(frames, encoder, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        payloads = [encoder(frame) for frame in frames]
+    elapsed = (time.perf_counter() - start) / repeats
+    size = sum(len(payload.encode() if isinstance(payload, str) else payload) for payload in payloads)
+    return elapsed, size
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    tokens_per_message = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    full = conversation(nodes, tokens_per_message)
+    deltas = conversation(nodes, tokens_per_message, FieldDelta())
+    results = {
+        "before (json, full)": measure(full, json.dumps, repeats),
+        "orjson, delta": measure(deltas, lambda frame: encode(frame, JSON), repeats),
+        "msgpack, delta": measure(deltas, lambda frame: encode(frame, MSGPACK), repeats),
+    }
+    before_time, before_size = results["before (json, full)"]
+    print(f"frames per conversation: {len(full)} ({nodes} nodes, {tokens_per_message} tokens per message)")
+    for name, (elapsed, size) in results.items():
+        print(
+            f"{name:20} encode: {elapsed * 1000:8.2f} ms ({before_time / elapsed:4.1f}x)  "
+            f"wire: {size:10,} bytes ({size / before_size:.0%})"
+        )
@@ -0,0 +1,91 @@
+"""
+Benchmark for the hot Database reads on a 100k-message conversation.
+
+"before" reads the way Database used to: an ORM select through a session, then
+`MessageModel(**message.__dict__)` for every row. "after" is the current Database, which runs a
+Core select and builds the models with `model_construct`. Both read the same database.
+
+Usage:
+    python benchmarks/orm_free_reads.py [messages] [repeats]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIRECTORY)
+
+from sqlalchemy.future import select
+from adam.database import Database, Conversation, ConversationModel, Message, MessageModel
+
+
+def fill(path, messages):
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO conversations (id, conversation_name, conversation_state) VALUES (?, ?, 'user_input')",
+        ((number, f"conversation {number}") for number in range(1, 101)),
+    )
+    connection.executemany(
+        "INSERT INTO messages (conversation_id, sender_name, message, type) VALUES (1, ?, ?, 'outer')",
+        (("User" if number % 4 == 0 else "engineer", f"message {number} " * 20) for number in range(messages)),
+    )
+    connection.commit()
+    connection.close()
+
+
+async def orm_conversation_messages(database, conversation_id):
+    async with database.session() as session:
+        result = await session.execute(select(Message).where(Message.conversation_id == conversation_id).order_by(Message.id))
+        messages = result.scalars().all()
+        state = (await session.execute(select(Conversation.conversation_state).where(Conversation.id == conversation_id))).scalar_one_or_none()
+        return [MessageModel(**message.__dict__) for message in messages], state
+
+
+async def orm_conversations(database):
+    async with database.session() as session:
+        result = await session.execute(select(Conversation))
+        return [ConversationModel(**conversation.__dict__) for conversation in result.scalars().all()]
+
+
+async def timed(read, repeats):
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        rows += len(await read())
+    return rows / (time.perf_counter() - start)
+
+
+async def run(path, messages, repeats):
+    database = Database(f"sqlite+aiosqlite:///{path}")
+    await database.migrate()
+    fill(path, messages)
+    await database.get_conversation_messages(1)
+
+    async def core_history():
+        return (await database.get_conversation_messages(1))[0]
+
+    async def orm_history():
+        return (await orm_conversation_messages(database, 1))[0]
+
+    results = {
+        "get_conversation_messages": (await timed(orm_history, repeats), await timed(core_history, repeats)),
+        "get_conversations": (
+            await timed(lambda: orm_conversations(database), repeats * 100),
+            await timed(database.get_conversations, repeats * 100),
+        ),
+    }
+    await database.engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as directory:
+        results = asyncio.run(run(os.path.join(directory, "conversations.db"), messages, repeats))
+    print(f"messages in the conversation: {messages}")
+    for name, (before, after) in results.items():
+        print(f"{name:27} before: {before:12,.0f} rows/s  after: {after:12,.0f} rows/s  ({after / before:.1f}x)")
@@ -0,0 +1,97 @@
+"""
+Benchmark for history reads on a large messages table.
+
+"before" is the old setup: a default engine with no pragmas and no index on the conversation.
+"after" uses create_database_engine (WAL and tuned pragmas) and a database brought up to date by
+Database.migrate, which adds the composite message indexes.
+
+Both databases hold the same messages spread over many conversations. The benchmark times
+get_conversation_messages and get_last_user_message for random conversations.
+
+Usage:
+    python benchmarks/sqlite_history.py [messages] [conversations]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIRECTORY)
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from adam.database import Base, Database
+
+LOOKUPS = 200
+
+
+def fill(path, messages, conversations):
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO conversations (id, conversation_name, conversation_state) VALUES (?, ?, 'user_input')",
+        ((number, f"conversation {number}") for number in range(1, conversations + 1)),
+    )
+    connection.executemany(
+        "INSERT INTO messages (conversation_id, sender_name, message, type) VALUES (?, ?, ?, 'outer')",
+        (
+            (random.randint(1, conversations), "User" if number % 4 == 0 else "engineer", f"message {number} " * 20)
+            for number in range(messages)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+async def create(database, migrated):
+    if migrated:
+        await database.migrate()
+    else:
+        async with database.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for index in ("ix_messages_conversation_id_id", "ix_messages_conversation_id_sender_name_id"):
+                await conn.exec_driver_sql(f"DROP INDEX {index}")
+
+
+async def timed_reads(database, conversations):
+    conversation_ids = [random.randint(1, conversations) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for conversation_id in conversation_ids:
+        await database.get_conversation_messages(conversation_id)
+    history = (time.perf_counter() - start) / LOOKUPS
+    start = time.perf_counter()
+    for conversation_id in conversation_ids:
+        await database.get_last_user_message(conversation_id)
+    last_user = (time.perf_counter() - start) / LOOKUPS
+    await database.engine.dispose()
+    return history, last_user
+
+
+async def run(path, migrated, messages, conversations):
+    database = Database(f"sqlite+aiosqlite:///{path}")
+    if not migrated:
+        database.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        database.SessionLocal.configure(bind=database.engine)
+    await create(database, migrated)
+    fill(path, messages, conversations)
+    if migrated:
+        async with database.engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE")
+    return await timed_reads(database, conversations)
+
+
+if __name__ == "__main__":
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    conversations = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with tempfile.TemporaryDirectory() as directory:
+        random.seed(0)
+        before = asyncio.run(run(os.path.join(directory, "before.db"), False, messages, conversations))
+        random.seed(0)
+        after = asyncio.run(run(os.path.join(directory, "after.db"), True, messages, conversations))
+    print(f"messages / conversations:        {messages} / {conversations}")
+    print(f"get_conversation_messages before: {before[0] * 1e3:10.2f} ms")
+    print(f"get_conversation_messages after:  {after[0] * 1e3:10.2f} ms  ({before[0] / after[0]:.1f}x)")
+    print(f"get_last_user_message before:     {before[1] * 1e3:10.2f} ms")
+    print(f"get_last_user_message after:      {after[1] * 1e3:10.2f} ms  ({before[1] / after[1]:.1f}x)")
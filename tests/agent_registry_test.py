@@ -0,0 +1,48 @@
+import asyncio
+
+from adam.agents import providers
+from adam.agents.agent_builder import META_AGENT_PROMPTS
+from adam.agents.registry import AgentRegistry, AGENT_FACTORIES
+
+
+def test_registry_builds_each_chain_once():
+    calls = []
+
+    async def factory(*args):
+        calls.append(args)
+        return object()
+
+    registry = AgentRegistry({"engineer": factory, "builder": factory})
+
+    async def main():
+        first = await registry.get("engineer")
+        second = await registry.get("engineer")
+        one = await registry.get("builder", "one")
+        two = await registry.get("builder", "two")
+        return first, second, one, two
+
+    first, second, one, two = asyncio.run(main())
+
+    assert first is second
+    assert one is not two
+    assert calls == [(), ("one",), ("two",)]
+
+
+def test_build_all_is_offline_and_shares_provider_clients(monkeypatch):
+    monkeypatch.setenv("COHERE_API_KEY", "test-key")
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(providers, "_cohere_clients", None)
+    monkeypatch.setattr(providers, "_cohere_http_clients", None)
+    registry = AgentRegistry(AGENT_FACTORIES)
+
+    asyncio.run(registry.build_all())
+
+    assert len(registry.chains) == len(AGENT_FACTORIES) - 1 + len(META_AGENT_PROMPTS)
+    sync_client, async_client = providers.cohere_clients()
+    engineer_llm = registry.chains[("engineer",)].chain.steps[1]
+    meta_one_llm = registry.chains[("meta_one",)].steps[1]
+    assert engineer_llm.async_client is async_client is meta_one_llm.async_client
+    assert engineer_llm.client is sync_client
+    http_clients = providers._cohere_http_clients
+    asyncio.run(providers.aclose())
+    assert all(http_client.is_closed for http_client in http_clients)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from langchain_core.messages import HumanMessage
+from sqlalchemy import func, select
+
+from adam.checkpointer import SQLiteCheckpointSaver, checkpointer
+from adam.constructor_graph import constructflow
+from adam.database import CheckpointRecord, CheckpointThreadRecord, ConversationModel
+from adam.server import conversation_threads, main_graph, run_first_message, run_user_input
+
+from tests.conftest import STRUCTURED_VALUES
+from tests.conversation_isolation_test import FakeWebSocket
+
+INTERRUPTS = ["human_node", "meta_graph_node"]
+
+
+def thread(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def start_conversation(graph, thread_id: str):
+    inputs = {"messages": [HumanMessage(content="Explain trees", name="human")]}
+    async for _ in graph.astream(inputs, thread(thread_id), stream_mode="updates"):
+        pass
+
+
+async def count(db, column, *where):
+    async with db.session() as session:
+        return (await session.execute(select(func.count(column)).where(*where))).scalar_one()
+
+
+def test_interrupted_thread_survives_restart(probe, db):
+    async def main():
+        graph = constructflow.compile(checkpointer=SQLiteCheckpointSaver(db), interrupt_before=INTERRUPTS)
+        await start_conversation(graph, "conversation-1-construct")
+
+        # A new saver and graph, as after a deploy, picks the thread up where it stopped
+        graph = constructflow.compile(checkpointer=SQLiteCheckpointSaver(db), interrupt_before=INTERRUPTS)
+        interrupted = await graph.aget_state(thread("conversation-1-construct"))
+        await graph.aupdate_state(thread("conversation-1-construct"), {"messages": [HumanMessage(content="Yes", name="human")]}, as_node="human_node")
+        async for _ in graph.astream(None, thread("conversation-1-construct"), stream_mode="updates"):
+            pass
+        return interrupted, await graph.aget_state(thread("conversation-1-construct"))
+
+    interrupted, resumed = asyncio.run(main())
+
+    assert interrupted.next == ("human_node",)
+    assert interrupted.values["rewritten_prompt"] == "fake response to: Explain trees"
+    assert resumed.next == ("meta_graph_node",)
+    assert resumed.values["plan"] == "simple"
+
+
+def test_checkpoints_per_thread_are_capped(probe, db):
+    saver = SQLiteCheckpointSaver(db, max_checkpoints_per_thread=3)
+
+    async def main():
+        graph = constructflow.compile(checkpointer=saver, interrupt_before=INTERRUPTS)
+        await start_conversation(graph, "capped")
+        await graph.aupdate_state(thread("capped"), {"messages": [HumanMessage(content="Yes", name="human")]}, as_node="human_node")
+        async for _ in graph.astream(None, thread("capped"), stream_mode="updates"):
+            pass
+        history = [checkpoint async for checkpoint in graph.aget_state_history(thread("capped"))]
+        stored = await count(db, CheckpointRecord.checkpoint_id, CheckpointRecord.thread_id == "capped")
+        return history, stored, await graph.aget_state(thread("capped"))
+
+    history, stored, state = asyncio.run(main())
+
+    assert stored == 3
+    assert len(history) == 3
+    assert state.values["plan"] == "simple"
+
+
+def test_only_finished_threads_are_evicted(probe, db):
+    saver = SQLiteCheckpointSaver(db, finished_thread_ttl=3600, max_finished_threads=1)
+
+    async def main():
+        graph = constructflow.compile(checkpointer=saver, interrupt_before=INTERRUPTS)
+        for thread_id in ("waiting", "finished-old", "finished-new"):
+            await start_conversation(graph, thread_id)
+        await saver.afinish_thread("finished-old")
+        await saver.afinish_thread("finished-new")
+        threads = {thread_id for thread_id in ("waiting", "finished-old", "finished-new") if await saver.aget_tuple(thread(thread_id))}
+
+        saver.finished_thread_ttl = 0
+        evicted = await saver.aevict()
+        remaining = await count(db, CheckpointThreadRecord.thread_id)
+        return threads, evicted, remaining, await saver.aget_tuple(thread("waiting"))
+
+    threads, evicted, remaining, waiting = asyncio.run(main())
+
+    assert threads == {"waiting", "finished-new"}
+    assert evicted == 1
+    assert remaining == 1
+    assert waiting is not None
+
+
+def test_try_again_reply_leaves_the_thread_waiting(probe, db, monkeypatch):
+    monkeypatch.setitem(STRUCTURED_VALUES, "AnalyserResponse", {"next_action": "Try Again"})
+    monkeypatch.setattr(checkpointer, "finished_thread_ttl", 0)
+    websocket = FakeWebSocket()
+
+    async def main():
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="trees"))
+        construct_thread, _ = await conversation_threads(conversation_id)
+        for content, run in (("Explain trees", run_first_message), ("Make it shorter", run_user_input)):
+            message = {"conversation_id": conversation_id, "content": content}
+            await run(websocket, message, json.dumps(message))
+        await checkpointer.aevict()
+        return await main_graph.aget_state(construct_thread)
+
+    state = asyncio.run(main())
+
+    assert state.next == ("human_node",)
+    assert state.values["analyser_decision"] == "Try Again"
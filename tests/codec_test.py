@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from adam.codec import JSON, MSGPACK, FieldDelta, decode, encode, negotiate
+from adam.connection_manager import ConnectionManager
+
+from tests.connection_manager_test import StalledWebSocket, token
+
+msgpack = pytest.importorskip("msgpack")
+
+
+class MsgpackWebSocket(StalledWebSocket):
+    """A client that asks for msgpack frames."""
+    scope = {"subprotocols": ["adam.msgpack", "adam.json"]}
+
+    def __init__(self):
+        super().__init__()
+        self.subprotocol = None
+        self.resume.set()
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_bytes(self, message: bytes):
+        self.sent.append(decode(message))
+
+
+def test_negotiate_picks_the_first_supported_subprotocol():
+    assert negotiate(["adam.msgpack", "adam.json"]) == (MSGPACK, "adam.msgpack")
+    assert negotiate(["graphql-ws", "adam.json"]) == (JSON, "adam.json")
+    assert negotiate([]) == (JSON, None)
+
+
+def test_frames_round_trip_in_both_codecs():
+    frame = token("a", "héllo")
+
+    assert isinstance(encode(frame), str) and decode(encode(frame)) == frame
+    assert isinstance(encode(frame, MSGPACK), bytes) and decode(encode(frame, MSGPACK)) == frame
+    assert len(encode(frame, MSGPACK)) < len(encode(frame).encode())
+
+
+def test_field_delta_returns_only_changed_fields():
+    delta = FieldDelta()
+
+    assert delta({"conversationState": "user_input", "subject": None}) == {"conversationState": "user_input", "subject": None}
+    assert delta({"conversationState": "user_input", "subject": None}) == {}
+    assert delta({"conversationState": "user_input", "subject": "Trees"}) == {"subject": "Trees"}
+
+
+def test_msgpack_connections_are_sent_binary_frames():
+    async def main():
+        manager = ConnectionManager()
+        websocket = MsgpackWebSocket()
+        await manager.connect(websocket)
+        await manager.send_personal_message(token("a", "first"), websocket)
+        await manager.drain(websocket)
+        return websocket, manager.codec(websocket)
+
+    websocket, codec = asyncio.run(main())
+
+    assert (websocket.subprotocol, codec) == ("adam.msgpack", MSGPACK)
+    assert websocket.sent == [token("a", "first")]
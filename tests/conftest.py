@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sys
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+import pytest
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT_DIRECTORY)
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from adam.agents.registry import agent_registry
+from adam.conversation_cache import ConversationCache
+from adam.database import db as global_db, create_database_engine
+
+DELAY = 0.05
+
+STRUCTURED_VALUES = {
+    "AnalyserResponse": {"next_action": "Proceed"},
+    "PromptComplexity": {"complexity": "simple"},
+    "MetaSupervisorResponse": {"next_action": "Stop"},
+}
+
+
+class Probe:
+    """Counts how many fake LLM calls are in flight at the same time."""
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.overlapping_calls = 0
+
+    def enter(self):
+        self.calls += 1
+        if self.in_flight:
+            self.overlapping_calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def exit(self):
+        self.in_flight -= 1
+
+
+class DelayedFakeLLM(BaseChatModel):
+    """Chat model that sleeps for `delay` seconds and echoes the last message it was sent."""
+    probe: Any
+    delay: float = DELAY
+
+    @property
+    def _llm_type(self) -> str:
+        return "delayed-fake"
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        content = f"fake response to: {messages[-1].content}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        self.probe.enter()
+        time.sleep(self.delay)
+        self.probe.exit()
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        self.probe.enter()
+        await asyncio.sleep(self.delay)
+        self.probe.exit()
+        return self._result(messages)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        self.probe.enter()
+        await asyncio.sleep(self.delay)
+        self.probe.exit()
+        content = self._result(messages).generations[0].message.content
+        for index, word in enumerate(content.split(" ")):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=f" {word}" if index else word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        return self | RunnableLambda(lambda _: schema(**STRUCTURED_VALUES[schema.__name__]))
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    """
+    Route every registry agent through a DelayedFakeLLM and return the probe watching it. Response
+    caching and the routing fast paths are disabled so every node call reaches the fake.
+    """
+    probe = Probe()
+    llm = DelayedFakeLLM(probe=probe)
+    for factory in agent_registry.factories.values():
+        monkeypatch.setattr(sys.modules[factory.__module__], "chat_model", lambda **kwargs: llm)
+
+    async def fake_search():
+        return RunnableLambda(lambda inputs: inputs["input"]) | llm | RunnableLambda(lambda message: {"output": message.content})
+
+    monkeypatch.setitem(agent_registry.factories, "meta_search", fake_search)
+    monkeypatch.setattr(agent_registry, "response_cache", None)
+    monkeypatch.setattr(agent_registry, "fast_paths", {})
+    agent_registry.clear()
+    yield probe
+    agent_registry.clear()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Point the global Database at an empty SQLite file for the duration of a test.
+    """
+    engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path / 'conversations.db'}", poolclass=NullPool)
+    monkeypatch.setattr(global_db, "engine", engine)
+    monkeypatch.setattr(global_db, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession))
+    monkeypatch.setattr(global_db, "cache", ConversationCache())
+    asyncio.run(global_db.migrate())
+    return global_db
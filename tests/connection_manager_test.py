@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+from starlette.websockets import WebSocketState
+
+from adam.connection_manager import ConnectionManager, SLOW_CONSUMER_CLOSE_CODE
+
+
+class StalledWebSocket:
+    """A client that doesn't read its frames until `resume` is set."""
+    application_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.resume = asyncio.Event()
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        await self.resume.wait()
+        self.sent.append(json.loads(message))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def token(message_id, content):
+    return {"type": "token", "conversation_id": 1, "node": "engineer", "message_id": message_id, "content": content}
+
+
+def update(**fields):
+    return {"type": "conversation_updated", "conversation_id": 1, "updated_fields": fields}
+
+
+async def connected(policy, max_queue_size=4):
+    manager = ConnectionManager(max_queue_size=max_queue_size, policy=policy)
+    websocket = StalledWebSocket()
+    await manager.connect(websocket)
+    return manager, websocket
+
+
+def test_stalled_client_does_not_block_senders_and_updates_coalesce():
+    async def main():
+        manager, websocket = await connected("drop", max_queue_size=8)
+        await manager.send_personal_message(token("a", "first"), websocket)
+        await asyncio.sleep(0)
+        await manager.send_personal_message(update(subject="Trees"), websocket)
+        await manager.send_personal_message(update(subject="Forests", plan="simple"), websocket)
+        await manager.send_personal_message({"type": "new_message", "conversation_id": 1, "message": "done"}, websocket)
+        stats = manager.queue_stats()
+        websocket.resume.set()
+        await manager.drain(websocket)
+        return websocket.sent, stats, manager.queue_stats()
+
+    sent, stalled, drained = asyncio.run(main())
+
+    assert [frame["type"] for frame in sent] == ["token", "conversation_updated", "new_message"]
+    assert sent[1]["updated_fields"] == {"subject": "Forests", "plan": "simple"}
+    assert (stalled["queue_depth"], stalled["coalesced"]) == (2, 1)
+    assert (drained["queue_depth"], drained["sent"], drained["dropped"]) == (0, 3, 0)
+
+
+def test_drop_policy_drops_frames_beyond_the_queue():
+    async def main():
+        manager, websocket = await connected("drop")
+        for index in range(8):
+            await manager.send_personal_message(token("a", str(index)), websocket)
+            await asyncio.sleep(0)
+        websocket.resume.set()
+        await manager.drain(websocket)
+        return websocket.sent, manager.queue_stats()
+
+    sent, stats = asyncio.run(main())
+
+    assert "".join(frame["content"] for frame in sent) == "01234"
+    assert (stats["dropped"], stats["max_queue_depth"]) == (3, 0)
+
+
+def test_coalesce_policy_merges_queued_tokens_instead_of_dropping():
+    async def main():
+        manager, websocket = await connected("coalesce")
+        for index in range(12):
+            await manager.send_personal_message(token("a" if index < 6 else "b", str(index)), websocket)
+            await asyncio.sleep(0)
+        websocket.resume.set()
+        await manager.drain(websocket)
+        return websocket.sent, manager.queue_stats()
+
+    sent, stats = asyncio.run(main())
+
+    assert "".join(frame["content"] for frame in sent if frame["message_id"] == "a") == "012345"
+    assert "".join(frame["content"] for frame in sent if frame["message_id"] == "b") == "67891011"
+    assert stats["dropped"] == 0 and stats["coalesced"] > 0
+
+
+def test_disconnect_policy_closes_slow_consumers():
+    async def main():
+        manager, websocket = await connected("disconnect")
+        for index in range(6):
+            await manager.send_personal_message(token("a", str(index)), websocket)
+            await asyncio.sleep(0)
+        return websocket, manager
+
+    websocket, manager = asyncio.run(main())
+
+    assert websocket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert websocket not in manager.active_connections
+    assert manager.queue_stats()["slow_disconnects"] == 1
+
+
+def test_frame_that_cannot_be_encoded_is_dropped_and_the_writer_keeps_sending():
+    async def main():
+        manager, websocket = await connected("drop", max_queue_size=8)
+        websocket.resume.set()
+        await manager.send_personal_message(token("a", object()), websocket)
+        await manager.send_personal_message(token("b", "after"), websocket)
+        await asyncio.wait_for(manager.drain(websocket), timeout=1)
+        return websocket.sent, manager.queue_stats()
+
+    sent, stats = asyncio.run(main())
+
+    assert [frame["content"] for frame in sent] == ["after"]
+    assert (stats["sent"], stats["dropped"], stats["queue_depth"]) == (1, 1, 0)
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from sqlalchemy import event
+
+from adam.conversation_cache import ConversationCache, ENTRY_OVERHEAD
+from adam.database import ConversationModel, MessageModel
+from adam.server import conversation_history_frame
+from adam.write_behind import WriteBehindQueue
+
+
+def count_selects(database):
+    selects = []
+    listener = lambda conn, cursor, statement, *args: selects.append(statement) if statement.startswith("SELECT") else None
+    event.listen(database.engine.sync_engine, "before_cursor_execute", listener)
+    return selects
+
+
+def test_cache_is_bounded_and_evicts_least_recently_used():
+    cache = ConversationCache(max_bytes=3 * (ENTRY_OVERHEAD + 10))
+    for conversation_id in (1, 2, 3):
+        cache.set(conversation_id, "frame", "x" * 10, cache.generation(conversation_id))
+    cache.get(1, "frame")
+    cache.set(4, "frame", "x" * 10, cache.generation(4))
+    cache.set(5, "frame", "x" * 10_000, cache.generation(5))
+
+    assert [cache.get(conversation_id, "frame") is not None for conversation_id in (1, 2, 3, 4, 5)] == [True, False, True, True, False]
+    assert cache.size == 3 * (ENTRY_OVERHEAD + 10)
+    assert cache.stats["evictions"] == 1
+
+
+def test_reads_from_before_an_invalidation_are_not_cached():
+    cache = ConversationCache()
+    generation = cache.generation(1)
+    cache.invalidate(1)
+    cache.set(1, "frame", "stale", generation)
+    cleared = cache.generation(2)
+    cache.clear()
+    cache.set(2, "frame", "stale", cleared)
+
+    assert cache.get(1, "frame") is None and cache.get(2, "frame") is None
+
+
+def test_evicting_a_conversation_drops_its_generation():
+    cache = ConversationCache(max_bytes=ENTRY_OVERHEAD + 10)
+    stale = cache.generation(1)
+    cache.invalidate(1)
+    cache.set(1, "frame", "x" * 10, cache.generation(1))
+    cache.set(2, "frame", "x" * 10, cache.generation(2))
+    cache.set(1, "frame", "stale", stale)
+
+    assert cache.generations == {}
+    assert cache.get(1, "frame") is None and cache.get(2, "frame") is not None
+
+
+def test_conversations_are_read_through_and_invalidated_by_writes(db):
+    async def main():
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="trees"))
+        selects = count_selects(db)
+        first = await db.get_conversation(conversation_id)
+        first.subject = "modified by the caller"
+        second = await db.get_conversation(conversation_id)
+        threads = await db.get_conversation_threads(conversation_id)
+        cached_reads = len(selects)
+        await db.update_conversation(conversation_id, subject="Trees")
+        updated = await db.get_conversation(conversation_id)
+        return second, threads, cached_reads, updated, len(selects)
+
+    second, threads, cached_reads, updated, reads = asyncio.run(main())
+
+    assert second.subject is None
+    assert threads == (second.construct_thread_id, second.meta_thread_id)
+    assert cached_reads == 1
+    assert (updated.subject, reads) == ("Trees", 2)
+
+
+def test_history_frames_are_cached_until_the_conversation_changes(db):
+    async def main():
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="trees"))
+        await db.add_message(MessageModel(conversation_id=conversation_id, sender_name="User", message="one", type="outer"))
+        selects = count_selects(db)
+        first = await conversation_history_frame(conversation_id, None, 50)
+        again = await conversation_history_frame(conversation_id, None, 50)
+        cached_reads = len(selects)
+
+        await db.add_message(MessageModel(conversation_id=conversation_id, sender_name="User", message="two", type="outer"))
+        after_add = await conversation_history_frame(conversation_id, None, 50)
+
+        queue = WriteBehindQueue(db, flush_interval=60)
+        queue.add_message(MessageModel(conversation_id=conversation_id, sender_name="engineer", message="three", type="outer"))
+        queue.update_conversation(conversation_id, conversation_state="meta_input")
+        await queue.flush()
+        await queue.aclose()
+        after_flush = await conversation_history_frame(conversation_id, None, 50)
+        return first, again, cached_reads, after_add, after_flush
+
+    first, again, cached_reads, after_add, after_flush = asyncio.run(main())
+
+    assert again is first
+    assert cached_reads == 2
+    assert [message["message"] for message in json.loads(after_add)["data"]] == ["one", "two"]
+    after_flush = json.loads(after_flush)
+    assert [message["message"] for message in after_flush["data"]] == ["one", "two", "three"]
+    assert after_flush["conversationState"] == "meta_input"
@@ -0,0 +1,72 @@
+"""
+N conversations driven at once through the server's construct and meta runs must not see each
+other's messages, checkpoints or websocket frames.
+"""
+import asyncio
+import json
+
+from langchain_core.messages import HumanMessage
+from starlette.websockets import WebSocketState
+
+from adam.database import ConversationModel
+from adam.run_construct import run_construct
+from adam.run_meta_graph import run_meta_graph
+from adam.server import main_graph, conversation_threads
+
+CONVERSATIONS = 5
+
+
+class FakeWebSocket:
+    """Collects the frames the server sends to a client."""
+    application_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, message: str):
+        self.sent.append(json.loads(message))
+
+
+async def drive_conversation(db, index: int):
+    websocket = FakeWebSocket()
+    conversation_id = await db.add_conversation(ConversationModel(conversation_name=f"conversation {index}"))
+    construct_thread, meta_thread = await conversation_threads(conversation_id)
+
+    first_message = json.dumps({"conversation_id": conversation_id, "content": f"topic {index}"})
+    inputs = {"messages": [HumanMessage(content=f"topic {index}", name="human")]}
+    await run_construct(inputs, websocket, first_message, construct_thread)
+
+    user_input = json.dumps({"conversation_id": conversation_id, "content": f"yes to topic {index}"})
+    human_msg = HumanMessage(content=f"yes to topic {index}", name="human")
+    await main_graph.aupdate_state(construct_thread, {"messages": [human_msg]}, as_node="human_node")
+    await run_construct(None, websocket, user_input, construct_thread)
+    await run_meta_graph(conversation_id, websocket, user_input, meta_thread)
+
+    construct_state = (await main_graph.aget_state(construct_thread)).values
+    return conversation_id, construct_thread, meta_thread, websocket, construct_state
+
+
+def test_simultaneous_conversations_are_isolated(probe, db):
+    async def main():
+        return await asyncio.gather(*(drive_conversation(db, index) for index in range(CONVERSATIONS)))
+
+    results = asyncio.run(main())
+
+    thread_ids = {thread["configurable"]["thread_id"] for _, construct, meta, _, _ in results for thread in (construct, meta)}
+    assert len(thread_ids) == 2 * CONVERSATIONS
+    assert probe.max_in_flight >= CONVERSATIONS
+
+    for index, (conversation_id, _, _, websocket, construct_state) in enumerate(results):
+        others = [f"topic {other}" for other in range(CONVERSATIONS) if other != index]
+
+        assert construct_state["plan"] == "simple"
+        assert f"topic {index}" in construct_state["rewritten_prompt"]
+        assert all(frame["conversation_id"] == conversation_id for frame in websocket.sent)
+        assert any(frame["sender_name"] == "meta_one" for frame in websocket.sent if frame["type"] == "new_message")
+
+        texts = [message.content for message in construct_state["messages"]]
+        texts += [frame.get("message") or json.dumps(frame.get("updated_fields")) for frame in websocket.sent]
+        stored = asyncio.run(db.get_messages(conversation_id))
+        texts += [message.message for message in stored]
+        assert stored
+        assert not [text for text in texts for other in others if other in text]
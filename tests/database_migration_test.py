@@ -0,0 +1,51 @@
+import asyncio
+import sqlite3
+
+from adam.database import Database, MIGRATIONS
+
+
+def legacy_database(path):
+    """Create a database with the schema and data of the original release."""
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE conversations (
+            id INTEGER PRIMARY KEY, conversation_name VARCHAR, subject VARCHAR, rewritten_prompt TEXT,
+            meta_prompt_one TEXT, meta_prompt_two TEXT, analyser_decision VARCHAR, plan TEXT, conversation_state VARCHAR
+        );
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY, conversation_id INTEGER NOT NULL REFERENCES conversations (id),
+            sender_name VARCHAR NOT NULL, message TEXT NOT NULL, type VARCHAR NOT NULL
+        );
+        INSERT INTO conversations (id, conversation_name, subject, conversation_state) VALUES (1, 'kept', 'Trees', 'user_input');
+        INSERT INTO messages (conversation_id, sender_name, message, type) VALUES (1, 'User', 'Explain trees', 'outer');
+    """)
+    connection.commit()
+    connection.close()
+
+
+def test_migrate_upgrades_legacy_database_without_losing_data(tmp_path):
+    path = tmp_path / "conversations.db"
+    legacy_database(path)
+    database = Database(f"sqlite+aiosqlite:///{path}")
+
+    async def main():
+        applied = await database.migrate()
+        reapplied = await database.migrate()
+        conversation = await database.get_conversation(1)
+        last_user_message = await database.get_last_user_message(1)
+        await database.engine.dispose()
+        return applied, reapplied, conversation, last_user_message
+
+    applied, reapplied, conversation, last_user_message = asyncio.run(main())
+
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert reapplied == []
+    assert (conversation.subject, conversation.meta_thread_id) == ("Trees", None)
+    assert last_user_message.message == "Explain trees"
+
+    connection = sqlite3.connect(path)
+    indexes = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'messages'")}
+    plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM messages WHERE conversation_id = 1 ORDER BY id").fetchall()
+    assert {"ix_messages_conversation_id_id", "ix_messages_conversation_id_sender_name_id"} <= indexes
+    assert "ix_messages_conversation_id_id" in plan[0][-1]
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
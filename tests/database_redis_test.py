@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis.asyncio.client import Pipeline
+
+from adam.database import ConversationModel, Database, MessageModel, create_database, require_sqlite
+from adam.database_redis import RedisDatabase
+
+
+@pytest.fixture
+def database():
+    return RedisDatabase(client=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture
+def round_trips(database, monkeypatch):
+    """
+    Count the requests sent to Redis: single commands and whole pipelines.
+    """
+    count = [0]
+    execute_command = database.redis.execute_command
+    pipeline_execute = Pipeline.execute
+
+    async def counted_command(*args, **kwargs):
+        count[0] += 1
+        return await execute_command(*args, **kwargs)
+
+    async def counted_pipeline(self, *args, **kwargs):
+        count[0] += 1
+        return await pipeline_execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(database.redis, "execute_command", counted_command)
+    monkeypatch.setattr(Pipeline, "execute", counted_pipeline)
+    return count
+
+
+async def fill(database, messages=100):
+    conversation_id = await database.add_conversation(ConversationModel(conversation_name="trees", conversation_state="user_input"))
+    other_id = await database.add_conversation(ConversationModel(conversation_name="graphs"))
+    for index in range(messages):
+        sender = "User" if index % 10 == 3 else "engineer"
+        await database.add_message(MessageModel(conversation_id=conversation_id, sender_name=sender, message=f"m{index}", type="outer"))
+        await database.add_message(MessageModel(conversation_id=other_id, sender_name="User", message=f"o{index}", type="outer"))
+    return conversation_id, other_id
+
+
+def test_reads_take_a_fixed_number_of_round_trips(database, round_trips):
+    async def main():
+        conversation_id, _ = await fill(database)
+        round_trips[0] = 0
+        history, state = await database.get_conversation_messages(conversation_id)
+        history_trips, round_trips[0] = round_trips[0], 0
+        last_user = await database.get_last_user_message(conversation_id)
+        last_user_trips = round_trips[0]
+        return history, state, history_trips, last_user, last_user_trips
+
+    history, state, history_trips, last_user, last_user_trips = asyncio.run(main())
+
+    assert [message.message for message in history] == [f"m{index}" for index in range(100)]
+    assert state == "user_input"
+    assert history_trips == 2
+    assert (last_user.message, last_user.sender_name, last_user_trips) == ("m93", "User", 1)
+
+
+def test_pages_match_the_sqlite_backend(database):
+    async def main():
+        conversation_id, _ = await fill(database, messages=7)
+        pages, before_id = [], None
+        while True:
+            page, _ = await database.get_conversation_messages(conversation_id, before_id=before_id, limit=3)
+            pages.append([message.message for message in page])
+            if len(page) < 3:
+                break
+            before_id = page[0].id
+        everything = await database.get_messages(conversation_id)
+        after, _ = await database.get_conversation_messages(conversation_id, after_id=everything[2].id, limit=2)
+        summaries = await database.get_conversation_summaries(limit=1)
+        older = await database.get_conversation_summaries(before_id=summaries[-1].id)
+        return pages, after, summaries + older
+
+    pages, after, summaries = asyncio.run(main())
+
+    assert pages == [["m4", "m5", "m6"], ["m1", "m2", "m3"], ["m0"]]
+    assert [message.message for message in after] == ["m3", "m4"]
+    assert [summary.conversation_name for summary in summaries] == ["graphs", "trees"]
+
+
+def test_conversations_round_trip_through_hashes(database):
+    async def main():
+        conversation_id = await database.add_conversation(ConversationModel(conversation_name="trees", meta_time_limit=1.5))
+        updated = await database.update_conversation(conversation_id, subject="Trees", meta_max_iterations=4, conversation_name=None)
+        missing = await database.update_conversation(conversation_id + 1, subject="Nothing")
+        conversation = await database.get_conversation(conversation_id)
+        threads = await database.get_conversation_threads(conversation_id)
+        latest = await database.get_latest_conversation_id()
+        await database.delete_all_records()
+        return updated, missing, conversation, threads, latest, await database.get_conversations(), await database.get_messages(conversation_id)
+
+    updated, missing, conversation, threads, latest, remaining, messages = asyncio.run(main())
+
+    assert (updated, missing) == (True, False)
+    assert (conversation.id, conversation.conversation_name, conversation.subject) == (1, None, "Trees")
+    assert (conversation.meta_max_iterations, conversation.meta_time_limit) == (4, 1.5)
+    assert threads == (conversation.construct_thread_id, conversation.meta_thread_id) == ("conversation-1-construct", "conversation-1-meta")
+    assert latest == 1
+    assert remaining == messages == []
+
+
+def test_the_backend_setting_selects_the_database():
+    assert isinstance(create_database("sqlite"), Database)
+    assert isinstance(create_database("redis"), RedisDatabase)
+    with pytest.raises(ValueError, match="postgres"):
+        create_database("postgres")
+
+
+def test_sqlite_only_components_reject_the_redis_backend(database):
+    with pytest.raises(RuntimeError, match="write_behind needs DATABASE_BACKEND=sqlite"):
+        require_sqlite(database, "write_behind")
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from adam.agents.analyser import AnalyserResponse
+from adam.agents.fake_llm import FakeChatModel, parse_choices
+from adam.agents.meta_supervisor import MetaSupervisorResponse
+from adam.agents.planner import PromptComplexity
+from adam.agents.registry import agent_registry
+from adam.constructor_graph import constructflow
+from adam.meta_budget import meta_budget
+from adam.meta_graph import build_metaflow
+from adam.settings import settings
+
+from tests.graph_concurrency_test import run_constructor_conversation
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """
+    Select the fake provider with no latency, and build the agents with it.
+    """
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "fake_llm_latency_ms", 0)
+    monkeypatch.setattr(settings, "fake_llm_tokens_per_second", 0)
+    monkeypatch.setattr(settings, "fake_llm_response_tokens", 20)
+    monkeypatch.setattr(settings, "fake_llm_choices", "MetaSupervisorResponse.next_action=Continue")
+    monkeypatch.setattr(agent_registry, "response_cache", None)
+    monkeypatch.setattr(agent_registry, "fast_paths", {})
+    agent_registry.clear()
+    yield
+    agent_registry.clear()
+
+
+def test_structured_output_is_valid_and_configurable():
+    llm = FakeChatModel(latency=0, choices=parse_choices("PromptComplexity.complexity = complex,"))
+
+    assert llm.with_structured_output(AnalyserResponse, preamble="ignored").invoke("Looks good") == AnalyserResponse(next_action="Proceed")
+    assert llm.with_structured_output(MetaSupervisorResponse).invoke("") == MetaSupervisorResponse(next_action="Stop")
+    assert llm.with_structured_output(PromptComplexity).invoke("") == PromptComplexity(complexity="complex")
+
+
+def test_replies_are_deterministic_and_streamed_at_the_configured_rate():
+    llm = FakeChatModel(latency=0.02, tokens_per_second=500, response_tokens=10)
+
+    async def main():
+        started = time.perf_counter()
+        chunks = [chunk.content async for chunk in llm.astream("Explain trees")]
+        return chunks, time.perf_counter() - started
+
+    chunks, elapsed = asyncio.run(main())
+
+    assert len(chunks) == 10
+    assert "".join(chunks) == llm.invoke("Explain trees").content != llm.invoke("Explain graphs").content
+    assert 0.02 + 9 / 500 <= elapsed < 0.5
+
+
+def test_latencies_follow_the_configured_distribution():
+    llm = FakeChatModel(latency=0.5, latency_sigma=0.3, seed=1)
+    delays = sorted(llm.first_token_delay() for _ in range(1001))
+
+    assert 0.45 < delays[500] < 0.55
+    assert delays[0] < 0.3 and delays[-1] > 1.0
+    assert FakeChatModel(latency=0.5).first_token_delay() == 0.5
+
+
+def test_constructor_and_meta_pipeline_runs_offline(fake_provider):
+    graph = constructflow.compile(checkpointer=MemorySaver(), interrupt_before=["human_node", "meta_graph_node"])
+
+    async def main():
+        state = await run_constructor_conversation(graph, "conversation-a")
+        meta_graph = build_metaflow(MemorySaver())
+        inputs = {
+            "meta_messages": [HumanMessage(content=state["rewritten_prompt"], name="human")],
+            "plan": state["plan"],
+            "meta_prompt_one": state["meta_prompt_one"],
+            "meta_prompt_two": state["meta_prompt_two"],
+            "subject": state["subject"],
+            **meta_budget(max_iterations=2),
+        }
+        return state, await meta_graph.ainvoke(inputs, {"configurable": {"thread_id": "conversation-a"}})
+
+    state, meta_state = asyncio.run(main())
+
+    assert (state["analyser_decision"], state["plan"]) == ("Proceed", "simple")
+    assert state["meta_prompt_one"] and state["meta_prompt_two"]
+    assert meta_state["iterations"] == 2
+    assert meta_state["meta_supervisor_decision"] == "Continue"
@@ -0,0 +1,101 @@
+import asyncio
+
+from langchain_core.messages import HumanMessage
+from sqlalchemy import select
+
+from adam.agents.analyser import AnalyserResponse
+from adam.agents.fast_path import ANALYSER_RULES, FastPathChain, KeywordRules, default_fast_paths
+from adam.agents.registry import agent_registry
+from adam.agents.response_cache import ResponseCache
+from adam.database import RoutingDecisionRecord
+
+
+def analyse(response: str):
+    async def main():
+        analyser = await agent_registry.get("analyser")
+        return await analyser.ainvoke({"human_response": [HumanMessage(content=response, name="human")]})
+    return asyncio.run(main())
+
+
+def test_rules_answer_without_the_llm(probe, db, monkeypatch):
+    fast_paths = default_fast_paths(db)
+    monkeypatch.setattr(agent_registry, "fast_paths", fast_paths)
+    agent_registry.clear()
+
+    assert isinstance(asyncio.run(agent_registry.get("analyser")), FastPathChain)
+    assert analyse("Yes, looks good!") == AnalyserResponse(next_action="Proceed")
+    assert analyse("No, make it shorter") == AnalyserResponse(next_action="Try Again")
+    assert analyse("Hmm, I suppose that works") == AnalyserResponse(next_action="Proceed")
+
+    planner = fast_paths["planner"]
+    assert planner.classify({"rewritten_prompt": "Summarise the latest news on fusion power"}) == "complex"
+    assert planner.classify({"rewritten_prompt": "Explain how trees grow"}) is None
+
+    assert probe.calls == 1
+    assert fast_paths["analyser"].stats == {"rules": 2, "model": 0, "cache": 0, "llm": 1}
+    assert fast_paths["analyser"].fast_path_rate == 2 / 3
+    assert "2/3 decisions without the LLM" in agent_registry.fast_path_report()["analyser"]
+
+
+def test_rules_leave_approvals_with_objections_to_the_llm():
+    rules = KeywordRules(ANALYSER_RULES)
+
+    for reply in (
+        "No changes needed, looks good",
+        "No notes, go ahead",
+        "No, that's perfect",
+        "Looks good, no need to change anything",
+        "Great, can you proceed?",
+        "Looks good, but rewrite the intro",
+    ):
+        assert rules.predict(reply) is None, reply
+    assert rules.predict("Nope.") == ("Try Again", 1.0)
+    assert rules.predict("No problem") is None
+
+
+def test_model_learns_from_logged_decisions(db):
+    supervisor = default_fast_paths(db)["meta_supervisor"]
+    supervisor.min_training_samples = 20
+    supervisor.retrain_every = 20
+    critiques = {
+        "Stop": ["The answer covers everything well and reads clearly", "This covers everything the user asked for"],
+        "Continue": ["It needs more detail on root systems", "Please expand with more detail on photosynthesis"],
+    }
+
+    async def main():
+        assert supervisor.classify({"meta_messages": ["covers everything well"]}) is None
+        for _ in range(5):
+            for label, texts in critiques.items():
+                for text in texts:
+                    await supervisor.arecord({"meta_messages": [HumanMessage(content=text)]}, label)
+        return supervisor.model
+
+    model = asyncio.run(main())
+
+    assert model is not None
+    assert supervisor.classify({"meta_messages": [HumanMessage(content="It covers everything well")]}) == "Stop"
+    assert supervisor.classify({"meta_messages": [HumanMessage(content="Needs more detail on roots")]}) == "Continue"
+    assert supervisor.classify({"meta_messages": [HumanMessage(content="Unrelated words entirely")]}) is None
+    assert supervisor.stats == {"rules": 0, "model": 2, "cache": 0, "llm": 2}
+
+
+def test_response_cache_hits_are_not_logged_as_llm_decisions(probe, db, monkeypatch):
+    fast_paths = default_fast_paths(db)
+    monkeypatch.setattr(agent_registry, "fast_paths", fast_paths)
+    monkeypatch.setattr(agent_registry, "response_cache", ResponseCache(db))
+    agent_registry.clear()
+
+    async def main():
+        analyser = await agent_registry.get("analyser")
+        for _ in range(2):
+            await analyser.ainvoke({"human_response": [HumanMessage(content="Hmm, I suppose that works", name="human")]})
+        await agent_registry.drain_fast_paths()
+        async with db.session() as session:
+            return (await session.execute(select(RoutingDecisionRecord.label))).scalars().all()
+
+    logged = asyncio.run(main())
+
+    assert logged == ["Proceed"]
+    assert probe.calls == 1
+    assert fast_paths["analyser"].stats == {"rules": 0, "model": 0, "cache": 1, "llm": 1}
+    assert fast_paths["analyser"].fast_path_rate == 1 / 2
@@ -0,0 +1,91 @@
+"""
+Regression test: two conversations running at once must overlap their LLM calls instead of
+taking turns on the event loop.
+"""
+import asyncio
+import pytest
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from adam.agents.agent_builder import META_AGENT_PROMPTS
+from adam.constructor_graph import constructflow
+from adam.meta_graph import build_metaflow
+from adam.nodes.builder_node import check_meta_prompt_fields
+
+async def run_constructor_conversation(graph, thread_id: str):
+    thread = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content=f"Explain trees ({thread_id})", name="human")]}
+    async for _ in graph.astream(inputs, thread, stream_mode="updates"):
+        pass
+    await graph.aupdate_state(thread, {"messages": [HumanMessage(content="Looks good", name="human")]}, as_node="human_node")
+    async for _ in graph.astream(None, thread, stream_mode="updates"):
+        pass
+    return (await graph.aget_state(thread)).values
+
+
+async def run_meta_conversation(graph, thread_id: str):
+    thread = {"configurable": {"thread_id": thread_id}}
+    inputs = {
+        "meta_messages": [HumanMessage(content=f"Explain trees ({thread_id})", name="human")],
+        "plan": "simple",
+        "meta_prompt_one": "You are an expert.",
+        "meta_prompt_two": "You are a reviewer.",
+        "subject": "Trees",
+    }
+    async for _ in graph.astream(inputs, thread, stream_mode="updates"):
+        pass
+    return (await graph.aget_state(thread)).values
+
+
+def test_constructor_conversations_overlap(probe):
+    graph = constructflow.compile(checkpointer=MemorySaver(), interrupt_before=["human_node", "meta_graph_node"])
+
+    async def main():
+        return await asyncio.gather(
+            run_constructor_conversation(graph, "conversation-a"),
+            run_constructor_conversation(graph, "conversation-b"),
+        )
+
+    results = asyncio.run(main())
+
+    assert [state["plan"] for state in results] == ["simple", "simple"]
+    assert probe.calls == 12
+    assert probe.max_in_flight >= 2
+    assert probe.overlapping_calls >= 6
+
+
+def test_builder_fans_out_meta_prompts(probe):
+    builder_node = constructflow.nodes["builder_node"].runnable.afunc
+    state = {"messages": [], "subject": "Trees", "rewritten_prompt": "Explain trees"}
+
+    state = asyncio.run(builder_node(state))
+
+    agent_types = list(META_AGENT_PROMPTS)
+    assert all(state[f"meta_prompt_{agent_type}"].startswith("fake response") for agent_type in agent_types)
+    assert state["plan"] == "simple"
+    assert probe.calls == len(agent_types) + 1
+    assert probe.max_in_flight == len(agent_types) + 1
+
+
+def test_every_meta_agent_needs_a_declared_state_field():
+    check_meta_prompt_fields(META_AGENT_PROMPTS)
+    with pytest.raises(RuntimeError, match="meta_prompt_three"):
+        check_meta_prompt_fields([*META_AGENT_PROMPTS, "three"])
+
+
+def test_meta_conversations_overlap(probe):
+    graph = build_metaflow()
+
+    async def main():
+        return await asyncio.gather(
+            run_meta_conversation(graph, "conversation-a"),
+            run_meta_conversation(graph, "conversation-b"),
+        )
+
+    results = asyncio.run(main())
+
+    assert [state["meta_supervisor_decision"] for state in results] == ["Stop", "Stop"]
+    assert probe.calls == 8
+    assert probe.max_in_flight >= 2
+    assert probe.overlapping_calls == 4
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from fastapi import WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+import adam.server as server
+from adam.database import ConversationModel, MessageModel
+from adam.server import handlers, websocket_endpoint
+
+
+class ScriptedWebSocket:
+    """A client that sends the messages put on `incoming` and collects the frames it receives."""
+    application_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.received = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self) -> str:
+        message = await self.incoming.get()
+        if message is None:
+            raise WebSocketDisconnect()
+        return json.dumps(message)
+
+    async def send_text(self, message: str):
+        self.sent.append(json.loads(message))
+        self.received.set()
+
+    async def frame(self, type: str) -> dict:
+        while True:
+            frames = [frame for frame in self.sent if frame["type"] == type]
+            if frames:
+                return frames[0]
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), 5)
+
+
+def test_reads_are_served_while_a_graph_run_is_in_progress(db, monkeypatch):
+    runs = {"active": 0, "max_active": 0, "finished": 0}
+    failed = handlers["get_conversation_history"].stats["failed"]
+
+    async def main():
+        release = asyncio.Event()
+
+        async def slow_run_construct(inputs, websocket, data, thread):
+            runs["active"] += 1
+            runs["max_active"] = max(runs["max_active"], runs["active"])
+            await release.wait()
+            runs["active"] -= 1
+            runs["finished"] += 1
+
+        monkeypatch.setattr(server, "run_construct", slow_run_construct)
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="trees"))
+        await db.add_message(MessageModel(conversation_id=conversation_id, sender_name="System", message="hello", type="outer"))
+        websocket = ScriptedWebSocket()
+        endpoint = asyncio.create_task(websocket_endpoint(websocket))
+
+        for content in ("first", "again"):
+            websocket.incoming.put_nowait({"type": "first_message", "conversation_id": conversation_id, "content": content, "sender_name": "User"})
+        websocket.incoming.put_nowait({"type": "get_conversations"})
+        websocket.incoming.put_nowait({"type": "get_conversation_history"})
+        websocket.incoming.put_nowait({"type": "get_conversation_history", "conversation_id": conversation_id})
+
+        conversations = await websocket.frame("conversations")
+        error = await websocket.frame("error")
+        history = await websocket.frame("conversation_history")
+        in_flight = handlers.in_flight()
+
+        release.set()
+        websocket.incoming.put_nowait(None)
+        await endpoint
+        await handlers.drain()
+        return conversations, error, history, in_flight
+
+    conversations, error, history, in_flight = asyncio.run(main())
+
+    assert [conversation["conversationName"] for conversation in conversations["data"]] == ["trees"]
+    assert error["request_type"] == "get_conversation_history"
+    assert [message["message"] for message in history["data"]] == ["hello", "first", "again"]
+    assert in_flight == {"first_message": 2}
+    assert runs == {"active": 0, "max_active": 1, "finished": 2}
+    assert handlers["get_conversation_history"].stats["failed"] == failed + 1
@@ -0,0 +1,65 @@
+import asyncio
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from adam.agents.registry import agent_registry
+from adam.meta_budget import meta_budget
+from adam.meta_graph import build_metaflow
+from tests.conftest import STRUCTURED_VALUES
+
+
+def run_meta(**budget):
+    graph = build_metaflow()
+    thread = {"configurable": {"thread_id": "budget"}}
+    inputs = {
+        "meta_messages": [HumanMessage(content="Explain trees", name="human")],
+        "plan": "simple",
+        "meta_prompt_one": "You are an expert.",
+        "meta_prompt_two": "You are a reviewer.",
+        "subject": "Trees",
+        **meta_budget(**budget),
+    }
+
+    async def main():
+        nodes = [node async for output in graph.astream(inputs, thread, stream_mode="updates") for node in output]
+        return nodes, (await graph.aget_state(thread)).values
+
+    return asyncio.run(main())
+
+
+def test_iterations_are_bounded(probe, monkeypatch):
+    monkeypatch.setitem(STRUCTURED_VALUES, "MetaSupervisorResponse", {"next_action": "Continue"})
+
+    nodes, state = run_meta(max_iterations=2)
+
+    # The last iteration can't be continued, so it skips the supervisor
+    assert nodes == ["meta_node_search", "meta_node_one", "meta_node_two", "meta_node_supervisor", "meta_node_one", "meta_node_two"]
+    assert state["iterations"] == 2
+    assert probe.calls == 6
+
+
+def test_token_budget_and_deadline_stop_the_loop(probe, monkeypatch):
+    monkeypatch.setitem(STRUCTURED_VALUES, "MetaSupervisorResponse", {"next_action": "Continue"})
+
+    nodes, state = run_meta(max_iterations=10, max_tokens=30)
+    assert nodes == ["meta_node_search", "meta_node_one", "meta_node_two"]
+    assert state["tokens_used"] >= 30
+
+    nodes, state = run_meta(max_iterations=10, time_limit=0.01)
+    assert nodes.count("meta_node_one") == 1
+    assert "meta_node_supervisor" not in nodes
+
+
+def test_complete_sentinel_skips_the_supervisor(probe, monkeypatch):
+    async def complete_meta_two():
+        return RunnableLambda(lambda inputs: "COMPLETE.")
+
+    monkeypatch.setitem(agent_registry.factories, "meta_two", complete_meta_two)
+    agent_registry.clear()
+
+    nodes, state = run_meta()
+
+    assert nodes == ["meta_node_search", "meta_node_one", "meta_node_two"]
+    assert state["meta_messages"][-1].content == "COMPLETE."
+    assert probe.calls == 2
@@ -0,0 +1,54 @@
+from langchain_core.messages import HumanMessage
+
+from adam import meta_context
+from adam.meta_budget import estimate_tokens
+from adam.meta_context import compact_meta_messages
+from tests.conftest import STRUCTURED_VALUES
+from tests.meta_budget_test import run_meta
+
+
+def turn(name: str, text: str, sentences: int = 40) -> HumanMessage:
+    return HumanMessage(content=" ".join(f"{text} sentence {number}." for number in range(sentences)), name=name)
+
+
+def meta_conversation(iterations: int):
+    messages = [HumanMessage(content="Explain trees", name="human"), turn("meta_search", "search")]
+    for iteration in range(iterations):
+        messages += [turn("meta_one", f"draft {iteration}"), turn("meta_two", f"critique {iteration}")]
+        messages.append(HumanMessage(content="Supervisor deciding...", name="meta_supervisor"))
+    return messages
+
+
+def test_latest_turns_are_kept_and_older_ones_shrink_to_the_budget():
+    messages = meta_conversation(4)
+
+    context = compact_meta_messages(messages, max_tokens=1000)
+
+    assert context[0] is messages[0]
+    assert context[-2] is messages[-3] and context[-1] is messages[-2]
+    assert "meta_supervisor" not in [message.name for message in context]
+    assert estimate_tokens(context) <= 1000
+    assert estimate_tokens(context) < estimate_tokens(messages) / 2
+    shortened = [message for message in context if message.content.startswith("[Earlier")]
+    assert shortened and shortened[-1].name == "meta_two"
+    drafts = [message.content for message in context if message.name == "meta_one"]
+    assert drafts[-1].startswith("draft 3") and all("draft 3" not in draft for draft in drafts[:-1])
+
+
+def test_context_under_budget_only_loses_placeholders():
+    messages = meta_conversation(1)
+
+    context = compact_meta_messages(messages, max_tokens=100000)
+
+    assert context == messages[:-1]
+
+
+def test_compaction_keeps_prompt_size_flat_across_iterations(probe, monkeypatch):
+    monkeypatch.setitem(STRUCTURED_VALUES, "MetaSupervisorResponse", {"next_action": "Continue"})
+    monkeypatch.setattr(meta_context, "DEFAULT_CONTEXT_TOKENS", 40)
+
+    _, state = run_meta(max_iterations=4, max_tokens=100000)
+
+    assert state["iterations"] == 4
+    assert state["context_tokens_saved"] > 0
+    assert estimate_tokens(meta_context.compact_meta_messages(state["meta_messages"], 40)) < estimate_tokens(state["meta_messages"])
@@ -0,0 +1,20 @@
+from langgraph.checkpoint.memory import MemorySaver
+
+from adam.meta_graph import build_metaflow, compile_metaflow
+
+
+def test_build_metaflow_reuses_compiled_graph():
+    first = build_metaflow()
+    second = build_metaflow()
+
+    assert first.builder is second.builder
+    assert first.nodes is second.nodes
+    assert first.interrupt_after_nodes == []
+    assert compile_metaflow.cache_info().currsize == 1
+
+
+def test_build_metaflow_injects_checkpointer():
+    checkpointer = MemorySaver()
+
+    assert build_metaflow(checkpointer).checkpointer is checkpointer
+    assert build_metaflow().checkpointer is not build_metaflow().checkpointer
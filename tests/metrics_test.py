@@ -0,0 +1,80 @@
+import asyncio
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from adam import connection_manager
+from adam.constructor_graph import constructflow
+from adam.metrics import DB_DURATION, LLM_LATENCY, LLM_TOKENS, NODE_DURATION, WEBSOCKET_SEND, Histogram, MetricsRegistry, metrics
+
+from tests.connection_manager_test import connected, token
+from tests.graph_concurrency_test import run_constructor_conversation
+
+
+def series_count(histogram: Histogram, *labels: str) -> int:
+    series = histogram.series.get(labels)
+    return series[2] if series else 0
+
+
+def test_histograms_render_in_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test durations.", ("node",), buckets=(0.1, 1))
+    registry.callback("test_depth", "Test depth.", lambda: 3)
+    histogram.observe(0.05, 'say "hi"')
+    histogram.observe(0.5, 'say "hi"')
+    histogram.observe(5, 'say "hi"')
+
+    assert registry.render().splitlines() == [
+        "# HELP test_seconds Test durations.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{node="say \\"hi\\"",le="0.1"} 1',
+        'test_seconds_bucket{node="say \\"hi\\"",le="1"} 2',
+        'test_seconds_bucket{node="say \\"hi\\"",le="+Inf"} 3',
+        'test_seconds_sum{node="say \\"hi\\""} 5.55',
+        'test_seconds_count{node="say \\"hi\\""} 3',
+        "# HELP test_depth Test depth.",
+        "# TYPE test_depth gauge",
+        "test_depth 3",
+    ]
+
+
+def test_a_run_records_node_llm_and_database_metrics(probe, db):
+    graph = constructflow.compile(checkpointer=MemorySaver(), interrupt_before=["human_node", "meta_graph_node"])
+    before = {
+        "node": series_count(NODE_DURATION, "constructor", "engineer_node"),
+        "llm": series_count(LLM_LATENCY, "engineer"),
+        "tokens": series_count(LLM_TOKENS, "engineer", "output"),
+        "db": series_count(DB_DURATION, "get_conversations"),
+    }
+
+    async def main():
+        await run_constructor_conversation(graph, "conversation-a")
+        await db.get_conversations()
+
+    asyncio.run(main())
+
+    assert series_count(NODE_DURATION, "constructor", "engineer_node") == before["node"] + 1
+    assert series_count(LLM_LATENCY, "engineer") == before["llm"] + 1
+    assert series_count(LLM_TOKENS, "engineer", "output") == before["tokens"] + 1
+    assert series_count(DB_DURATION, "get_conversations") == before["db"] + 1
+    assert NODE_DURATION.series[("constructor", "engineer_node")][1] >= 0.05
+
+
+def test_websocket_sends_and_queue_depth_are_recorded(monkeypatch):
+    sent = series_count(WEBSOCKET_SEND)
+
+    async def main():
+        manager, websocket = await connected("drop", max_queue_size=8)
+        monkeypatch.setattr(connection_manager, "manager", manager)
+        for message_id in "abc":
+            await manager.send_personal_message(token(message_id, "word"), websocket)
+        await asyncio.sleep(0)
+        stalled = metrics.render()
+        websocket.resume.set()
+        await manager.drain(websocket)
+        return stalled
+
+    stalled = asyncio.run(main())
+
+    assert "adam_outbound_queue_depth 2" in stalled.splitlines()
+    assert "adam_websocket_connections 1" in stalled.splitlines()
+    assert series_count(WEBSOCKET_SEND) == sent + 3
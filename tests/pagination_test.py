@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import event
+
+from adam.database import ConversationModel, MessageModel
+
+
+async def fill(db, conversations=3, messages=7):
+    conversation_ids = []
+    for number in range(conversations):
+        conversation_id = await db.add_conversation(ConversationModel(
+            conversation_name=f"conversation {number}", conversation_state="user_input", rewritten_prompt="x" * 1000
+        ))
+        conversation_ids.append(conversation_id)
+        for index in range(messages):
+            await db.add_message(MessageModel(conversation_id=conversation_id, sender_name="User", message=f"{number}:{index}", type="outer"))
+    return conversation_ids
+
+
+def test_history_pages_walk_back_in_chronological_order(db):
+    async def main():
+        conversation_id = (await fill(db))[1]
+        pages, before_id = [], None
+        while True:
+            page, state = await db.get_conversation_messages(conversation_id, before_id=before_id, limit=3)
+            pages.append([message.message for message in page])
+            if len(page) < 3:
+                return pages, state
+            before_id = page[0].id
+
+    pages, state = asyncio.run(main())
+
+    assert pages == [["1:4", "1:5", "1:6"], ["1:1", "1:2", "1:3"], ["1:0"]]
+    assert state == "user_input"
+
+
+def test_history_without_limit_is_unchanged(db):
+    async def main():
+        conversation_id = (await fill(db))[0]
+        everything, _ = await db.get_conversation_messages(conversation_id)
+        after, _ = await db.get_conversation_messages(conversation_id, after_id=everything[2].id, limit=2)
+        return everything, after
+
+    everything, after = asyncio.run(main())
+
+    assert [message.message for message in everything] == [f"0:{index}" for index in range(7)]
+    assert [message.message for message in after] == ["0:3", "0:4"]
+
+
+def test_conversation_summaries_page_newest_first_and_read_only_listed_columns(db):
+    statements = []
+
+    async def main():
+        await fill(db, conversations=5, messages=0)
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            first = await db.get_conversation_summaries(limit=2)
+            second = await db.get_conversation_summaries(before_id=first[-1].id, limit=2)
+            last = await db.get_conversation_summaries(before_id=second[-1].id, limit=2)
+        finally:
+            event.remove(db.engine.sync_engine, "before_cursor_execute", listener)
+        return first, second, last
+
+    first, second, last = asyncio.run(main())
+
+    assert [conversation.conversation_name for conversation in first + second + last] == [
+        f"conversation {number}" for number in (4, 3, 2, 1, 0)
+    ]
+    selected = [statement for statement in statements if statement.startswith("SELECT")]
+    assert selected and all("rewritten_prompt" not in statement for statement in selected)
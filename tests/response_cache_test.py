@@ -0,0 +1,68 @@
+import asyncio
+
+from adam.agents.registry import agent_registry
+from adam.agents.response_cache import CachedChain, ResponseCache
+
+
+def classify(response: str):
+    async def main():
+        analyser = await agent_registry.get("analyser")
+        return await analyser.ainvoke({"human_response": response})
+    return asyncio.run(main())
+
+
+def test_repeated_classification_costs_no_round_trip(probe, db, monkeypatch):
+    cache = ResponseCache(db)
+    monkeypatch.setattr(agent_registry, "response_cache", cache)
+    agent_registry.clear()
+
+    first = classify("Looks good")
+    second = classify("  Looks   good ")
+    different = classify("Change the subject")
+
+    assert isinstance(asyncio.run(agent_registry.get("analyser")), CachedChain)
+    assert first.next_action == second.next_action == different.next_action == "Proceed"
+    assert probe.calls == 2
+    assert cache.stats == {"memory_hits": 1, "database_hits": 0, "misses": 2}
+
+
+def test_responses_survive_restart_until_ttl(probe, db, monkeypatch):
+    monkeypatch.setattr(agent_registry, "response_cache", ResponseCache(db))
+    agent_registry.clear()
+    classify("Looks good")
+
+    # A fresh cache, as after a restart, is served from the database
+    restarted = ResponseCache(db)
+    monkeypatch.setattr(agent_registry, "response_cache", restarted)
+    agent_registry.clear()
+    assert classify("Looks good").next_action == "Proceed"
+    assert probe.calls == 1
+    assert restarted.stats["database_hits"] == 1
+
+    restarted.clear()
+    restarted.ttl = 0
+    classify("Looks good")
+    assert probe.calls == 2
+    assert restarted.stats["misses"] == 1
+
+
+def test_key_covers_template_model_and_inputs(probe, monkeypatch):
+    cache = ResponseCache(max_entries=1)
+    monkeypatch.setattr(agent_registry, "response_cache", cache)
+    agent_registry.clear()
+
+    async def main():
+        builder_one = await agent_registry.get("builder", "one")
+        builder_two = await agent_registry.get("builder", "two")
+        inputs = {"subject": "Trees"}
+        await builder_one.ainvoke(inputs)
+        await builder_one.ainvoke(inputs)
+        await builder_two.ainvoke(inputs)
+        return builder_one, builder_two
+
+    builder_one, builder_two = asyncio.run(main())
+
+    assert builder_one.template_hash != builder_two.template_hash
+    assert builder_one.key({"subject": "a"}) != builder_one.key({"subject": "b"})
+    assert probe.calls == 2
+    assert len(cache.entries) == 1
@@ -0,0 +1,56 @@
+import asyncio
+import io
+import json
+import logging
+
+import pytest
+
+from adam.handler_registry import HandlerRegistry
+from adam.runtime_profile import PROFILES, configure_logging, get_profile, select_profile
+
+
+@pytest.fixture
+def log_stream(monkeypatch):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    stream = io.StringIO()
+    configure_logging(get_profile("production"), stream)
+    yield stream
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_production_profile_turns_the_debug_aids_off(monkeypatch):
+    monkeypatch.setenv("ADAM_PROFILE", "development")
+
+    profile = select_profile(["--profile", "production", "--port", "8080"])
+
+    assert (profile.tracemalloc, profile.loop_debug, profile.reload, profile.log_level) == (False, False, False, "INFO")
+    assert PROFILES["development"].log_level == "DEBUG"
+    with pytest.raises(ValueError):
+        get_profile("staging")
+
+
+def test_handler_logs_carry_the_conversation_id_of_their_message(log_stream):
+    registry = HandlerRegistry()
+    logger = logging.getLogger("adam.test")
+
+    @registry.register("ping", concurrent=True)
+    async def ping(websocket, json_message, data):
+        await asyncio.sleep(0)
+        logger.info("pong %s", json_message["n"])
+
+    async def main():
+        await registry.dispatch(None, {"type": "ping", "conversation_id": 7, "n": 1}, "")
+        await registry.dispatch(None, {"type": "ping", "n": 2}, "")
+        logger.debug("not logged at INFO")
+        await registry.drain()
+
+    asyncio.run(main())
+
+    records = [json.loads(line) for line in log_stream.getvalue().splitlines()]
+    assert [(record["message"], record.get("conversation_id")) for record in records] == [("pong 1", 7), ("pong 2", None)]
+    assert records[0]["level"] == "INFO" and records[0]["logger"] == "adam.test"
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from adam.agents import providers
+from adam.agents.search_cache import SearchCache
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """
+    Replace the Tavily request with a slow fake and return the queries it was sent.
+    """
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    sent = []
+
+    async def post_search(self, query, params):
+        sent.append(query)
+        await asyncio.sleep(0.05)
+        return {"query": query, "results": [{"url": "https://example.com", "content": f"about {query}"}]}
+
+    monkeypatch.setattr(providers.PooledTavilySearchAPIWrapper, "post_search", post_search)
+    return sent
+
+
+def test_concurrent_identical_queries_are_coalesced(searches, db, monkeypatch):
+    cache = SearchCache(db)
+    monkeypatch.setattr(providers, "search_cache", cache)
+    wrapper = providers.PooledTavilySearchAPIWrapper()
+
+    async def main():
+        queries = ["Oak trees", "oak  trees?", "OAK TREES", "Oak trees", "Pine trees"]
+        return await asyncio.gather(*(wrapper.raw_results_async(query) for query in queries))
+
+    results = asyncio.run(main())
+
+    assert sorted(searches) == ["Oak trees", "Pine trees"]
+    assert results[0] is results[1] is results[2] is results[3]
+    assert cache.stats == {"memory_hits": 0, "database_hits": 0, "coalesced": 3, "misses": 2}
+
+
+def test_results_are_persisted_bounded_and_expire(searches, db, monkeypatch):
+    monkeypatch.setattr(providers, "search_cache", SearchCache(db, max_entries=1, max_stored_entries=2))
+    wrapper = providers.PooledTavilySearchAPIWrapper()
+
+    async def search(*queries):
+        for query in queries:
+            await wrapper.raw_results_async(query)
+
+    asyncio.run(search("oak", "pine", "birch"))
+
+    # A fresh cache, as after a restart, finds the two newest searches in the database
+    restarted = SearchCache(db, max_entries=1, max_stored_entries=2)
+    monkeypatch.setattr(providers, "search_cache", restarted)
+    asyncio.run(search("birch", "pine", "oak"))
+    assert searches == ["oak", "pine", "birch", "oak"]
+    assert restarted.stats["database_hits"] == 2
+
+    restarted.clear()
+    restarted.ttl = 0
+    asyncio.run(search("oak"))
+    assert searches[-1] == "oak" and len(searches) == 5
+
+
+def test_failed_search_is_not_cached(db):
+    cache = SearchCache(db)
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("rate limited")
+
+    async def main():
+        outcomes = await asyncio.gather(*(cache.aget_or_fetch("oak", {}, failing) for _ in range(3)), return_exceptions=True)
+        return outcomes, cache.in_flight
+
+    outcomes, in_flight = asyncio.run(main())
+
+    assert len(attempts) == 1
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert not in_flight and not cache.entries
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_search_for_the_others(db):
+    cache = SearchCache(db)
+    attempts = []
+
+    async def fetch():
+        attempts.append(1)
+        await asyncio.sleep(0.05)
+        return {"query": "oak", "results": []}
+
+    async def main():
+        leader = asyncio.ensure_future(cache.aget_or_fetch("oak", {}, fetch))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.aget_or_fetch("oak", {}, fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter, leader
+
+    result, leader = asyncio.run(main())
+
+    assert result == {"query": "oak", "results": []}
+    assert leader.cancelled()
+    assert len(attempts) == 1
+    assert not cache.in_flight and cache.stats["coalesced"] == 1
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+from adam.settings import Settings
+
+from tests.conftest import ROOT_DIRECTORY
+
+
+def test_settings_are_read_from_the_environment_with_defaults():
+    settings = Settings({"SEND_QUEUE_SIZE": "16", "FAST_PATH_ENABLED": "False", "LOG_LEVEL": ""})
+
+    assert (settings.send_queue_size, settings.fast_path_enabled, settings.log_level) == (16, False, None)
+    assert (settings.profile, settings.meta_time_limit, settings.warm_agents) == ("development", 300.0, True)
+
+
+def test_importing_the_server_leaves_the_provider_packages_unloaded():
+    env = {key: value for key, value in os.environ.items() if key != "PROJECT_DIRECTORY"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, adam.server; print(sorted(m for m in ('langchain_cohere', 'langchain.agents', 'pandas') if m in sys.modules))"],
+        cwd=ROOT_DIRECTORY, env=env, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+from langchain_core.messages import HumanMessage
+
+from adam.database import ConversationModel
+from adam.run_construct import run_construct
+from adam.server import conversation_threads
+from tests.conversation_isolation_test import FakeWebSocket
+
+
+def test_tokens_stream_before_final_message(probe, db):
+    async def main():
+        websocket = FakeWebSocket()
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="streaming"))
+        construct_thread, _ = await conversation_threads(conversation_id)
+        first_message = json.dumps({"conversation_id": conversation_id, "content": "Explain trees"})
+        inputs = {"messages": [HumanMessage(content="Explain trees", name="human")]}
+        await run_construct(inputs, websocket, first_message, construct_thread)
+        return conversation_id, websocket.sent
+
+    conversation_id, sent = asyncio.run(main())
+
+    tokens = [frame for frame in sent if frame["type"] == "token"]
+    final = next(frame for frame in sent if frame["type"] == "new_message")
+
+    assert len(tokens) > 1
+    assert sent.index(final) > sent.index(tokens[-1])
+    assert {frame["node"] for frame in tokens} == {"engineer_node"}
+    assert {frame["message_id"] for frame in tokens} == {final["message_id"]}
+    assert all(frame["conversation_id"] == conversation_id for frame in tokens)
+    assert "".join(frame["content"] for frame in tokens) == final["message"] == "fake response to: Explain trees"
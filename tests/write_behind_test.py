@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from langchain_core.messages import HumanMessage
+
+from adam.database import ConversationModel, MessageModel
+from adam.run_construct import run_construct
+from adam.server import conversation_threads, main_graph
+from adam.write_behind import WriteBehindQueue, write_behind
+from tests.conversation_isolation_test import FakeWebSocket
+
+
+def message(conversation_id: int, text: str) -> MessageModel:
+    return MessageModel(conversation_id=conversation_id, message=text, sender_name="engineer", type="outer")
+
+
+def test_writes_are_batched_and_merged(db):
+    queue = WriteBehindQueue(db, flush_interval=0.01)
+
+    async def main():
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="batched"))
+        for number in range(5):
+            queue.add_message(message(conversation_id, f"step {number}"))
+            queue.update_conversation(conversation_id, subject=f"subject {number}", plan=None if number < 4 else "simple")
+        queued_before_flush = len(queue.messages)
+        await asyncio.sleep(0.05)
+        return conversation_id, queued_before_flush, await db.get_messages(conversation_id), await db.get_conversation(conversation_id)
+
+    conversation_id, queued_before_flush, messages, conversation = asyncio.run(main())
+
+    assert queued_before_flush == 5
+    assert [stored.message for stored in messages] == [f"step {number}" for number in range(5)]
+    assert (conversation.subject, conversation.plan) == ("subject 4", "simple")
+    assert queue.stats == {"batches": 1, "messages": 5, "conversation_updates": 1, "merged_updates": 4}
+
+
+def test_failed_flush_keeps_writes_queued(db, monkeypatch):
+    queue = WriteBehindQueue(db)
+    session = db.session
+
+    def failing_session():
+        raise RuntimeError("disk full")
+
+    async def main():
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="retry"))
+        queue.add_message(message(conversation_id, "kept"))
+        queue.update_conversation(conversation_id, subject="kept")
+        monkeypatch.setattr(db, "session", failing_session)
+        try:
+            await queue.flush()
+        except RuntimeError:
+            pass
+        queue.update_conversation(conversation_id, plan="simple")
+        monkeypatch.setattr(db, "session", session)
+        await queue.flush()
+        return await db.get_messages(conversation_id), await db.get_conversation(conversation_id)
+
+    messages, conversation = asyncio.run(main())
+
+    assert [stored.message for stored in messages] == ["kept"]
+    assert (conversation.subject, conversation.plan) == ("kept", "simple")
+
+
+def test_run_construct_does_not_wait_on_disk(probe, db, monkeypatch):
+    # Hold the background writer back: node updates are still delivered, and the writes are only
+    # committed by the flush at the end of each run
+    monkeypatch.setattr(write_behind, "flush_interval", 60)
+    monkeypatch.setattr(write_behind, "stats", dict.fromkeys(write_behind.stats, 0))
+
+    async def main():
+        conversation_id = await db.add_conversation(ConversationModel(conversation_name="run"))
+        construct_thread, _ = await conversation_threads(conversation_id)
+        first_message = json.dumps({"conversation_id": conversation_id, "content": "Explain trees"})
+        inputs = {"messages": [HumanMessage(content="Explain trees", name="human")]}
+        await run_construct(inputs, FakeWebSocket(), first_message, construct_thread)
+        user_input = json.dumps({"conversation_id": conversation_id, "content": "Looks good"})
+        await main_graph.aupdate_state(construct_thread, {"messages": [HumanMessage(content="Looks good", name="human")]}, as_node="human_node")
+        await run_construct(None, FakeWebSocket(), user_input, construct_thread)
+        return conversation_id, await db.get_conversation(conversation_id), await db.get_messages(conversation_id)
+
+    conversation_id, conversation, messages = asyncio.run(main())
+
+    assert conversation.rewritten_prompt == "fake response to: Explain trees"
+    assert [stored.sender_name for stored in messages] == ["engineer", "Analyser", "Subjectifier", "Builder"]
+    assert write_behind.stats == {"batches": 2, "messages": 4, "conversation_updates": 2, "merged_updates": 2}
+    assert not write_behind.messages and not write_behind.conversation_updates
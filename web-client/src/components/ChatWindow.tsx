@@ -9,6 +9,7 @@ interface Message {
   message: string
   type: string
   timestamp: string
+  message_id?: string
 }
 
 interface Conversation {
@@ -34,6 +35,8 @@ const ChatWindow: React.FC<ChatWindowProps> = ({
 }) => {
   const [messages, setMessages] = useState<Message[]>([])
   const [localConversation, setLocalConversation] = useState(conversation)
+  // Cursor of the next page of older messages, null once the history is complete
+  const [nextBeforeId, setNextBeforeId] = useState<number | null>(null)
 
   // Use a ref to store the latest conversation state
   const conversationRef = useRef(conversation)
@@ -59,7 +62,28 @@ const ChatWindow: React.FC<ChatWindowProps> = ({
 
         switch (data.type) {
           case 'conversation_history':
-            setMessages(data.data)
+            // Older pages are prepended, the first page replaces the history
+            setMessages(prevMessages => data.before_id ? [...data.data, ...prevMessages] : data.data)
+            setNextBeforeId(data.next_before_id ?? null)
+            break
+          case 'token':
+            // Append the token to the message being streamed, or start a new one
+            setMessages(prevMessages => {
+              const streaming = prevMessages.find(message => message.message_id === data.message_id)
+              if (streaming) {
+                return prevMessages.map(message => message.message_id === data.message_id
+                  ? { ...message, message: message.message + data.content }
+                  : message)
+              }
+              return [...prevMessages, {
+                id: Date.now(),
+                sender_name: data.node,
+                message: data.content,
+                type: 'new_message',
+                timestamp: new Date().toISOString(),
+                message_id: data.message_id
+              }]
+            })
             break
           case 'new_message':
             const newMessage: Message = {
@@ -67,9 +91,13 @@ const ChatWindow: React.FC<ChatWindowProps> = ({
               sender_name: data.sender_name,
               message: data.message,
               type: data.type,
-              timestamp: new Date().toISOString()
+              timestamp: new Date().toISOString(),
+              message_id: data.message_id ?? undefined
             }
-            setMessages(prevMessages => [...prevMessages, newMessage])
+            // The final message replaces the tokens streamed under the same message_id
+            setMessages(prevMessages => newMessage.message_id && prevMessages.some(message => message.message_id === newMessage.message_id)
+              ? prevMessages.map(message => message.message_id === newMessage.message_id ? { ...newMessage, id: message.id } : message)
+              : [...prevMessages, newMessage])
             break
           case 'conversation_updated':
             if (localConversation && localConversation.conversationId === data.conversation_id) {
@@ -143,6 +171,17 @@ const ChatWindow: React.FC<ChatWindowProps> = ({
     }
   }, [ws, localConversation]);
 
+  // Request the page of messages before the oldest one loaded
+  const loadEarlierMessages = useCallback(() => {
+    if (ws && localConversation && nextBeforeId !== null) {
+      ws.send(JSON.stringify({
+        type: 'get_conversation_history',
+        conversation_id: localConversation.conversationId,
+        before_id: nextBeforeId
+      }))
+    }
+  }, [ws, localConversation, nextBeforeId])
+
   // Scroll to bottom when messages change
   useEffect(() => {
     if (messagesEndRef.current) {
@@ -155,6 +194,11 @@ const ChatWindow: React.FC<ChatWindowProps> = ({
     <div className="flex flex-col h-[93vh]"> {/* Change to h-full */}
       {/* Scrollable Messages Container */}
       <div className="flex-1 overflow-y-auto">
+        {nextBeforeId !== null && (
+          <button className="btn btn-ghost btn-sm w-full" onClick={loadEarlierMessages}>
+            Load earlier messages
+          </button>
+        )}
         <MessageList messages={messages} />
         <div ref={messagesEndRef} />
       </div>
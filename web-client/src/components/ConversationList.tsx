@@ -25,6 +25,8 @@ const ConversationList: React.FC<ConversationListProps> = ({
 }) => {
   const [conversations, setConversations] = useState<Conversation[]>([])
   const [newConversationName, setNewConversationName] = useState('')
+  // Cursor of the next page of older conversations, null once the list is complete
+  const [nextBeforeId, setNextBeforeId] = useState<number | null>(null)
 
   useEffect(() => {
     if (ws) {
@@ -32,10 +34,12 @@ const ConversationList: React.FC<ConversationListProps> = ({
         const message = JSON.parse(event.data);
         if (message.type === 'conversations') {
           console.log('Received conversations:', message.data);
-          setConversations(message.data);
+          // Older pages are appended, the first page replaces the list
+          setConversations(prevConversations => message.before_id ? [...prevConversations, ...message.data] : message.data);
+          setNextBeforeId(message.next_before_id ?? null);
         } else if (message.type === 'new_conversation') {
           console.log('Received new conversation:', message.data);
-          setConversations(prevConversations => [...prevConversations, message.data]);
+          setConversations(prevConversations => [message.data, ...prevConversations]);
           onNewConversation(message.data);
         }
       };
@@ -76,6 +80,12 @@ const ConversationList: React.FC<ConversationListProps> = ({
     }
   }
 
+  const handleLoadMore = () => {
+    if (ws && ws.readyState === WebSocket.OPEN && nextBeforeId !== null) {
+      ws.send(JSON.stringify({ type: 'get_conversations', before_id: nextBeforeId }))
+    }
+  }
+
   return (
     <div className="w-64 bg-base-100 p-4">
       <h2 className="text-xl font-bold mb-4">Conversations</h2>
@@ -98,6 +108,11 @@ const ConversationList: React.FC<ConversationListProps> = ({
           ))}
         </ul>
       )}
+      {nextBeforeId !== null && (
+        <button className="btn btn-ghost btn-sm mt-2 w-56" onClick={handleLoadMore}>
+          Load more
+        </button>
+      )}
       <div className="mt-4">
         <input
           type="text"